@@ -0,0 +1,82 @@
+"""
+Per-window checkpoints for long `optimize_strategy` runs.
+
+A run directory holds a manifest with the run fingerprint, one pickle per finished window
+(best params, train/test metrics and trades, test indicators) and the hyperopt `Trials` of
+the window in progress. Every file is written to a temporary name, fsynced and renamed, so
+a crash or Ctrl-C leaves either the previous or the new checkpoint, never a torn one.
+"""
+
+import glob
+import json
+import os
+import pickle
+from typing import Optional
+
+MANIFEST = "manifest.json"
+
+
+def _atomic_dump(path: str, obj) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _load(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class RunCheckpoint:
+    """Checkpoint directory of one optimization run, identified by a fingerprint of its inputs."""
+
+    def __init__(self, run_dir: str, fingerprint: str, resume: bool = False):
+        self.run_dir = run_dir
+        os.makedirs(run_dir, exist_ok=True)
+        manifest_path = os.path.join(run_dir, MANIFEST)
+        if resume and os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                stored = json.load(f).get("fingerprint")
+            if stored != fingerprint:
+                raise ValueError(
+                    f"Checkpoint directory '{run_dir}' belongs to a different run "
+                    "(data, rules, indicators or optimizer settings changed); start without resume"
+                )
+            return
+        # Fresh run: drop checkpoints of any earlier run in this directory
+        for pattern in ("window_*.pkl", "trials_*.pkl", "*.tmp"):
+            for path in glob.glob(os.path.join(run_dir, pattern)):
+                os.remove(path)
+        tmp = f"{manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint}, f)
+        os.replace(tmp, manifest_path)
+
+    def _window_path(self, window_idx: int) -> str:
+        return os.path.join(self.run_dir, f"window_{window_idx:04d}.pkl")
+
+    def _trials_path(self, window_idx: int) -> str:
+        return os.path.join(self.run_dir, f"trials_{window_idx:04d}.pkl")
+
+    def load_window(self, window_idx: int) -> Optional[dict]:
+        """Results of a finished window, or None if it has not finished yet."""
+        return _load(self._window_path(window_idx))
+
+    def save_window(self, window_idx: int, payload: dict) -> None:
+        _atomic_dump(self._window_path(window_idx), payload)
+        # The finished window supersedes its in-progress trials
+        trials_path = self._trials_path(window_idx)
+        if os.path.exists(trials_path):
+            os.remove(trials_path)
+
+    def load_trials(self, window_idx: int):
+        """hyperopt Trials of an unfinished window, or None."""
+        return _load(self._trials_path(window_idx))
+
+    def save_trials(self, window_idx: int, trials) -> None:
+        _atomic_dump(self._trials_path(window_idx), trials)
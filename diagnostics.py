@@ -0,0 +1,59 @@
+"""
+Counted, rate-limited runtime diagnostics.
+
+Errors raised inside hot loops (a rule evaluated on every bar of every trial) are recorded
+here instead of being printed each time: the first `limit` occurrences of each distinct
+error are printed, later ones are only counted, and `report` prints one line per error
+with its total count at the end of a run.
+"""
+
+import threading
+from collections import Counter
+
+
+class Diagnostics:
+    """Per-key error counter that prints each distinct error at most `limit` times."""
+
+    def __init__(self, limit: int = 3):
+        self.limit = int(limit)
+        self.counts = Counter()
+        self.messages = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, context: str, error) -> None:
+        """Count one `kind` error (e.g. "Evaluation error") raised while evaluating `context`."""
+        key = (kind, context, type(error).__name__, str(error))
+        with self._lock:
+            self.counts[key] += 1
+            count = self.counts[key]
+            if count == 1:
+                self.messages[key] = f"{kind}: {error}, expr: {context}"
+        if count <= self.limit:
+            suffix = " (further occurrences are counted, not printed)" if count == self.limit else ""
+            print(f"❌ {self.messages[key]}{suffix}")
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self):
+        """(count, message) per distinct error, most frequent first."""
+        with self._lock:
+            return [(count, self.messages[key]) for key, count in self.counts.most_common()]
+
+    def report(self) -> None:
+        """Print every distinct error with its total count."""
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"[INFO] {self.total()} runtime errors in {len(summary)} distinct diagnostics:")
+        for count, message in summary:
+            print(f"  {count:>8} x {message}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self.messages.clear()
+
+
+# Shared by the strategy engine; main() reports and resets it once per run
+DIAGNOSTICS = Diagnostics()
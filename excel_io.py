@@ -23,6 +23,11 @@ def write_best_params_to_dashboard(file_path: str, best_params: dict):
     print(f"[INFO] Updated Dashboard parameters: {sorted(updated)}")
 import pandas as pd
 from openpyxl import load_workbook
+from indicator_builder import compile_indicator_plan
+from timeframes import add_timeframe_columns
+from trade_log import TradeLog
+from validation import check_logic_table
+from walk_forward import is_period
 
 
 
@@ -62,7 +67,31 @@ def extract_table(ws, anchor_text, max_cols=20, max_rows=5000):
     df = pd.DataFrame(data, columns=headers)
     return df
 
-def read_dashboard_inputs(file_path: str) -> dict:
+def read_market_data(file_path: str) -> pd.DataFrame:
+    """
+    Read one symbol's bars: the Dashboard market data table of a workbook, the first sheet
+    of any other workbook, or a CSV file. A "Date" column is required.
+    """
+    if file_path.lower().endswith(".csv"):
+        df = pd.read_csv(file_path)
+    else:
+        wb = load_workbook(filename=file_path, data_only=True)
+        if "Dashboard" in wb.sheetnames:
+            df = extract_table(wb["Dashboard"], "Date", max_cols=100, max_rows=5000)
+        else:
+            df = pd.read_excel(file_path)
+    if "Date" not in df.columns:
+        raise ValueError(f"No 'Date' column in market data file '{file_path}'")
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+def read_dashboard_inputs(file_path: str, ta_backend: str = "auto", indicator_threads: int = 1) -> dict:
+    """
+    Read market data, parameters, builder tables and settings from the Dashboard sheet.
+    `ta_backend` selects the TA-Lib implementation ("auto", "talib" or "numpy");
+    `indicator_threads` > 1 builds independent indicator rows in parallel (0: one thread per CPU).
+    """
     wb = load_workbook(filename=file_path, data_only=True)
     ws = wb["Dashboard"]
 
@@ -112,173 +141,19 @@ def read_dashboard_inputs(file_path: str) -> dict:
 
 
     # === Build indicators before logic extraction ===
-    # Build arithmetic indicators from the builder table with combination logic
-    if 'Combination' in builder_df.columns:
-        # Group by Indicator Name, process each chain
-        for name, group in builder_df.groupby('Indicator Name', sort=False):
-            result = None
-            for idx, row in group.iterrows():
-                ind_a = row.get("Indicator A")
-                op = row.get("Operator")
-                val_or_param = row.get("Value / Param")
-                comb = str(row.get("Combination", "END")).strip().upper()
-                if not (name and ind_a and op and val_or_param):
-                    continue
-                if str(ind_a) not in market_df.columns:
-                    continue
-                val = param_map.get(str(val_or_param), val_or_param)
-                if str(val) in market_df.columns:
-                    val_operand = market_df[str(val)]
-                else:
-                    try:
-                        val_operand = float(val)
-                    except Exception:
-                        print(f"[DEBUG] Skipping indicator '{name}': value '{val}' is not a valid number or column. Available columns: {list(market_df.columns)}")
-                        continue
-                # Compute this step
-                try:
-                    step_result = None
-                    if op == "+":
-                        step_result = market_df[str(ind_a)] + val_operand
-                    elif op == "-":
-                        step_result = market_df[str(ind_a)] - val_operand
-                    elif op == "*":
-                        step_result = market_df[str(ind_a)] * val_operand
-                    elif op == "/":
-                        step_result = market_df[str(ind_a)] / val_operand
-                    elif op == "**":
-                        step_result = market_df[str(ind_a)] ** val_operand
-                    else:
-                        continue
-                    if result is None:
-                        result = step_result
-                    else:
-                        # Combine with previous result
-                        if comb == "+":
-                            result = result + step_result
-                        elif comb == "-":
-                            result = result - step_result
-                        elif comb == "*":
-                            result = result * step_result
-                        elif comb == "/":
-                            result = result / step_result
-                        elif comb == "END":
-                            pass  # END, do nothing
-                except Exception:
-                    continue
-            if result is not None:
-                market_df[name] = result
-    else:
-        # Fallback: original logic for legacy sheets
-        for _, row in builder_df.iterrows():
-            name = row.get("Indicator Name")
-            ind_a = row.get("Indicator A")
-            op = row.get("Operator")
-            val_or_param = row.get("Value / Param")
-            # Skip if any required field is missing
-            if not (name and ind_a and op and val_or_param):
-                continue
-            # Ensure the base indicator exists
-            if str(ind_a) not in market_df.columns:
-                continue
-            # Determine the operand: either a column or a value/parameter
-            val = param_map.get(str(val_or_param), val_or_param)
-            if str(val) in market_df.columns:
-                val_operand = market_df[str(val)]
-            else:
-                try:
-                    val_operand = float(val)
-                except Exception:
-                    print(f"[DEBUG] Skipping indicator '{name}': value '{val}' is not a valid number or column. Available columns: {list(market_df.columns)}")
-                    continue
-            # Perform the arithmetic operation
-            try:
-                if op == "+":
-                    market_df[name] = market_df[str(ind_a)] + val_operand
-                elif op == "-":
-                    market_df[name] = market_df[str(ind_a)] - val_operand
-                elif op == "*":
-                    market_df[name] = market_df[str(ind_a)] * val_operand
-                elif op == "/":
-                    market_df[name] = market_df[str(ind_a)] / val_operand
-                elif op == "**":
-                    market_df[name] = market_df[str(ind_a)] ** val_operand
-            except Exception:
-                continue
-
-    # Build TA-Lib indicators after arithmetic indicators
-    import talib
-    for idx, row in talib_df.iterrows():
-        name = row.get("TA-Lib Name")
-        func = row.get("TA-Lib Function")
-        in_col = row.get("In order Indicators")
-        param_str = row.get("In order Param")
-        if not (name and func):
-            continue
-        # Support comma-separated input columns for multi-input functions
-        input_cols = [c.strip() for c in str(in_col).split(",") if c.strip()] if in_col else []
-        input_series = []
-        if input_cols and all(c in market_df.columns for c in input_cols):
-            input_series = [market_df[c] for c in input_cols]
-        else:
-            continue
-        param_keys = [p.strip() for p in str(param_str).split(",") if p.strip()] if param_str else []
-        param_vals = [param_map.get(k, k) for k in param_keys]
-        for i, v in enumerate(param_vals):
-            try:
-                param_vals[i] = int(float(v))
-            except Exception:
-                try:
-                    param_vals[i] = float(v)
-                except Exception:
-                    pass
-        try:
-            talib_func = getattr(talib, func)
-        except Exception:
-            continue
-        try:
-            if len(input_series) == 1:
-                out = talib_func(input_series[0], *param_vals)
-            else:
-                out = talib_func(*input_series, *param_vals)
-            out_names = [n.strip() for n in name.split(",")]
-            assigned = False
-            if isinstance(out, (tuple, list)) and len(out_names) == len(out):
-                if all(hasattr(o, '__len__') and not isinstance(o, str) and len(o) == len(market_df) for o in out):
-                    for n, o in zip(out_names, out):
-                        market_df[n] = o
-                    assigned = True
-            if not assigned:
-                if hasattr(out, '__len__') and not isinstance(out, str) and len(out) == len(market_df):
-                    market_df[name] = out
-        except Exception as e:
-            continue
-
-    # Paste new indicators to the right of existing indicators in the Dashboard sheet
-    # Assumes indicators start at column 'L' (12) and row 2
-    ws_dashboard = ws
-    indicator_start_col = 12  # 'L'
-    indicator_row = 2
-    # Find the last non-empty column in the indicator row
-    last_col = indicator_start_col
-    while ws_dashboard.cell(row=indicator_row, column=last_col).value is not None:
-        last_col += 1
-    # Get the list of original indicator columns
-    original_cols = [ws_dashboard.cell(row=indicator_row, column=col).value for col in range(indicator_start_col, last_col)]
-    # Identify new indicators to add (exclude standard OHLCV columns)
-    exclude_cols = ["Date", "Open", "High", "Low", "Close", "Volume"]
-    new_indicators = [col for col in market_df.columns if col not in original_cols and col not in exclude_cols]
-    # Write new indicator headers and values
-    for idx, ind in enumerate(new_indicators):
-        ws_dashboard.cell(row=indicator_row, column=last_col + idx, value=ind)
-        for row_idx, val in enumerate(market_df[ind], start=indicator_row + 1):
-            ws_dashboard.cell(row=row_idx, column=last_col + idx, value=val)
+    # Same compiled plan as the optimizer uses, so load-time and trial-time indicators agree
+    indicator_plan = compile_indicator_plan(builder_df, talib_df, backend=ta_backend,
+                                            threads=indicator_threads)
+    # Higher-timeframe inputs ("Close@1D") are resampled once here; trials only slice them
+    market_df = add_timeframe_columns(market_df, indicator_plan.timeframe_references())
+    market_df = indicator_plan.evaluate(market_df, param_map)
 
     config["market_data"] = market_df
     config["param_map"] = param_map
     config["param_ranges"] = param_ranges
     config["indicator_builder"] = builder_df
     config["talib_builder"] = talib_df
+    config["indicator_plan"] = indicator_plan
 
     # --- Step 5: Extract Backtest Setting (anchor: "Duration") ---
     bt_row, bt_col = find_anchor(ws, "Duration")
@@ -287,8 +162,13 @@ def read_dashboard_inputs(file_path: str) -> dict:
 
     # --- Step 6: Extract Train-Test Settings (anchor: "Settings") ---
     train_row, train_col = find_anchor(ws, "Settings")
-    config["train_window"] = int(ws.cell(row=train_row + 1, column=train_col + 1).value)
-    config["test_window"] = int(ws.cell(row=train_row + 2, column=train_col + 1).value)
+    # A bar count, or a calendar span such as "6M" / "1M" for calendar walk-forward windows
+    for offset, key in ((1, "train"), (2, "test")):
+        value = ws.cell(row=train_row + offset, column=train_col + 1).value
+        if is_period(value):
+            config[f"{key}_period"] = str(value).strip()
+        else:
+            config[f"{key}_window"] = int(value)
 
     # --- Step 7: Optimize Objection List (anchor: "Optimize Parameters") ---
     opt_row, opt_col = find_anchor(ws, "Optimize Parameters")
@@ -315,26 +195,23 @@ def read_dashboard_inputs(file_path: str) -> dict:
     logic_df = extract_table(ws, "Rule Type", max_cols=7, max_rows=100)
     config["logic_table"] = logic_df
 
-    # --- Step 10: Validate columns in logic table ---
-    # Only validate after update_excel_with_market_data has run and all indicators are present
-    # This function should only build and return config, not raise errors for missing columns
-    valid_columns = set(config["market_data"].columns)
-    invalid_rows = []
-    for i, row in logic_df.iterrows():
-        col_a = str(row["Column A"]).strip()
-        col_b = str(row["Column B / Value"]).strip()
-        if col_a not in valid_columns:
-            invalid_rows.append((i + 2, f"Column A '{col_a}' 不存在於 market_data 中"))
-    config["logic_table_invalid_rows"] = invalid_rows
+    # --- Step 10: Validate the logic table against the columns and indicators ---
+    # Only reported here; validation.preflight checks the whole config and fails fast before a run
+    known_columns = set(indicator_plan.bind(market_df.columns).names)
+    config["logic_table_invalid_rows"] = [
+        (issue.row, issue.message) for issue in check_logic_table(logic_df, known_columns)
+        if issue.severity == "error"
+    ]
 
     return config
 
 
 
-def write_results(file_path: str, results_df: pd.DataFrame, metrics: dict = None):
+def write_results(file_path: str, results_df, metrics: dict = None):
     """
     Write backtest or optimization results and metrics to the Results sheet in the Excel file.
     Clears old results (except headers) and writes new results.
+    `results_df` is a TradeLog or a DataFrame of trades.
     """
     wb = load_workbook(filename=file_path)
     ws = wb["Results"]
@@ -346,16 +223,17 @@ def write_results(file_path: str, results_df: pd.DataFrame, metrics: dict = None
 
     # Write new results DataFrame
     if not results_df.empty:
-        for col_idx, col_name in enumerate(results_df.columns, start=1):
+        trades_df = results_df.to_pandas() if isinstance(results_df, TradeLog) else results_df
+        # Column by column: no per-row Series allocation
+        for col_idx, col_name in enumerate(trades_df.columns, start=1):
             ws.cell(row=1, column=col_idx, value=col_name)
-        for row_idx, row in results_df.iterrows():
-            for col_idx, value in enumerate(row, start=1):
+            for row_idx, value in zip(trades_df.index, trades_df[col_name].tolist()):
                 ws.cell(row=row_idx + 2, column=col_idx, value=value)
 
     # Optionally write metrics to the right of the results table
     if metrics:
         # Find the first empty column after the results table
-        start_col = results_df.shape[1] + 2  # leave one column gap
+        start_col = (0 if results_df.empty else len(results_df.columns)) + 2  # leave one column gap
         ws.cell(row=1, column=start_col, value="Performance Metrics")
         for i, (k, v) in enumerate(metrics.items()):
             ws.cell(row=i + 2, column=start_col, value=k)
@@ -364,6 +242,37 @@ def write_results(file_path: str, results_df: pd.DataFrame, metrics: dict = None
     wb.save(file_path)
 
 
+def export_indicators_to_dashboard(file_path: str, market_df: pd.DataFrame) -> list:
+    """
+    Write the indicator columns of market_df that the Dashboard market data table (anchored at
+    its "Date" header) does not have yet to the right of its last column, then save once.
+    Returns the exported column names.
+    """
+    wb = load_workbook(filename=file_path)
+    ws = wb["Dashboard"]
+    header_row, start_col = find_anchor(ws, "Date")
+    if header_row is None:
+        raise ValueError("找不到 anchor 'Date'")
+    last_col = start_col
+    while ws.cell(row=header_row, column=last_col).value is not None:
+        last_col += 1
+    existing = {ws.cell(row=header_row, column=col).value for col in range(start_col, last_col)}
+    exclude_cols = {"Date", "Open", "High", "Low", "Close", "Volume"}
+    new_indicators = [col for col in market_df.columns if col not in existing and col not in exclude_cols]
+    if new_indicators:
+        # One pass over the target block, filled column by column from plain lists
+        values = [market_df[col].astype(object).where(market_df[col].notna(), None).tolist()
+                  for col in new_indicators]
+        rows = ws.iter_rows(min_row=header_row, max_row=header_row + len(market_df),
+                            min_col=last_col, max_col=last_col + len(new_indicators) - 1)
+        for row_idx, cells in enumerate(rows):
+            for col_idx, cell in enumerate(cells):
+                cell.value = new_indicators[col_idx] if row_idx == 0 else values[col_idx][row_idx - 1]
+        wb.save(file_path)
+    print(f"[INFO] Exported {len(new_indicators)} indicator columns to the Dashboard: {new_indicators}")
+    return new_indicators
+
+
 def write_data_table(file_path: str, df: pd.DataFrame, sheet_name: str = "Data"):
     """
     Write a DataFrame to a specified sheet in the Excel file, replacing its content.
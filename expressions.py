@@ -0,0 +1,174 @@
+"""
+Fused evaluation of Indicator Builder chains and strategy rule expressions.
+
+A chain `A op1 x <c1> B op2 y <c2> ...` is combined left to right into one preallocated result
+buffer (plus one scratch buffer for the current step) with ufunc `out=` arguments, instead of a
+new temporary array per step and per combination. A rule (comparisons joined by `and`/`or`) is
+compiled once into a tree of comparison and logical ufuncs writing into one boolean buffer per
+nesting level.
+
+With numexpr installed, arrays of at least NUMEXPR_MIN_ROWS bars are evaluated as one numexpr
+expression instead (multi-threaded, no temporaries). Chains only take that route when every
+operator is +, -, * or /, whose IEEE results numexpr reproduces exactly; the values are the
+same as the step-by-step NumPy evaluation either way.
+"""
+
+import ast
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+NUMEXPR_MIN_ROWS = 100_000
+# numexpr accepts at most this many distinct operands per expression
+NUMEXPR_MAX_OPERANDS = 30
+_NUMEXPR_ARITHMETIC = {"+", "-", "*", "/"}
+
+COMPARISON_UFUNCS = {ast.Lt: ("<", np.less), ast.Gt: (">", np.greater), ast.LtE: ("<=", np.less_equal),
+                     ast.GtE: (">=", np.greater_equal), ast.Eq: ("==", np.equal), ast.NotEq: ("!=", np.not_equal)}
+LOGICAL_UFUNCS = {ast.And: ("&", np.logical_and), ast.Or: ("|", np.logical_or)}
+
+
+def _use_numexpr(n_rows: int, n_operands: int) -> bool:
+    return numexpr is not None and n_rows >= NUMEXPR_MIN_ROWS and n_operands <= NUMEXPR_MAX_OPERANDS
+
+
+def evaluate_chain(terms: Sequence[tuple], ops: Dict[str, np.ufunc]) -> Optional[np.ndarray]:
+    """
+    Value of an arithmetic chain from its resolved steps `(operator, left, operand, combination)`
+    in sheet order: r = s1, then r = r <combination of the previous step> s_k for every later
+    step, where an END combination starts over from the next step. None for an empty chain.
+    """
+    if not terms:
+        return None
+    n_rows = len(terms[0][1])
+    combinations = {t[3] for t in terms[:-1]} - {"END"}
+    if (_use_numexpr(n_rows, 2 * len(terms)) and {t[0] for t in terms} <= _NUMEXPR_ARITHMETIC
+            and combinations <= _NUMEXPR_ARITHMETIC):
+        return _numexpr_chain(terms)
+    result = np.empty(n_rows)
+    scratch = None
+    prev_comb = None
+    for operator, left, operand, combination in terms:
+        if prev_comb is None or prev_comb == "END":
+            ops[operator](left, operand, out=result)
+        elif prev_comb in ops:
+            if scratch is None:
+                scratch = np.empty(n_rows)
+            ops[operator](left, operand, out=scratch)
+            ops[prev_comb](result, scratch, out=result)
+        else:
+            raise ValueError(f"Unknown combination operator: {prev_comb}")
+        prev_comb = combination
+    return result
+
+
+def _numexpr_chain(terms: Sequence[tuple]) -> np.ndarray:
+    names = {}
+
+    def operand_name(value):
+        name = f"v{len(names)}"
+        names[name] = value
+        return name
+
+    expression = None
+    prev_comb = None
+    for operator, left, operand, combination in terms:
+        term = f"({operand_name(left)} {operator} {operand_name(operand)})"
+        if prev_comb is None or prev_comb == "END":
+            expression = term
+        else:
+            expression = f"({expression} {prev_comb} {term})"
+        prev_comb = combination
+    return numexpr.evaluate(expression, local_dict=names)
+
+
+class MaskPlan:
+    """
+    A rule expression of comparisons (`row['A'] < row['B']`, `row['A'] >= 1.5`) joined by
+    `and`/`or`, compiled to ufunc calls. `and`/`or` group exactly as Python parses them and
+    combine element-wise, as the vectorized `eval` of the expression did.
+    """
+
+    def __init__(self, root: tuple, columns: Tuple[str, ...], depth: int):
+        self.root = root
+        self.columns = columns
+        self.depth = depth
+
+    def evaluate(self, columns: Dict[str, np.ndarray], n_rows: int) -> np.ndarray:
+        """Boolean mask over n_rows bars from the referenced column arrays."""
+        if _use_numexpr(n_rows, len(self.columns)) and all(columns[c].dtype.kind in "if" for c in self.columns):
+            local = {f"c{i}": columns[c] for i, c in enumerate(self.columns)}
+            result = numexpr.evaluate(self._numexpr(self.root), local_dict=local)
+            return np.broadcast_to(result, (n_rows,)).copy()
+        buffers = [np.empty(n_rows, dtype=bool) for _ in range(self.depth)]
+        return self._evaluate(self.root, columns, buffers, 0)
+
+    def _evaluate(self, node: tuple, columns, buffers, level: int) -> np.ndarray:
+        out = buffers[level]
+        if node[0] == "compare":
+            _, _, ufunc, left, right = node
+            ufunc(self._operand(left, columns), self._operand(right, columns), out=out)
+            return out
+        _, _, ufunc, values = node
+        self._evaluate(values[0], columns, buffers, level)
+        for value in values[1:]:
+            ufunc(out, self._evaluate(value, columns, buffers, level + 1), out=out)
+        return out
+
+    @staticmethod
+    def _operand(operand: tuple, columns):
+        return columns[operand[1]] if operand[0] == "column" else operand[1]
+
+    def _numexpr(self, node: tuple) -> str:
+        if node[0] == "compare":
+            _, symbol, _, left, right = node
+            return f"({self._numexpr_operand(left)} {symbol} {self._numexpr_operand(right)})"
+        _, symbol, _, values = node
+        return "(" + f" {symbol} ".join(self._numexpr(v) for v in values) + ")"
+
+    def _numexpr_operand(self, operand: tuple) -> str:
+        if operand[0] == "column":
+            return f"c{self.columns.index(operand[1])}"
+        return repr(float(operand[1]))
+
+
+def compile_mask_plan(tree: ast.Expression) -> Optional[MaskPlan]:
+    """MaskPlan of a parsed rule expression, or None when it uses anything but comparisons and and/or."""
+    columns = {}
+
+    def operand(node):
+        if (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "row"
+                and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str)):
+            columns.setdefault(node.slice.value, None)
+            return ("column", node.slice.value)
+        if (isinstance(node, ast.Constant) and isinstance(node.value, (int, float))
+                and not isinstance(node.value, bool)):
+            return ("constant", node.value)
+        return None
+
+    def build(node) -> Optional[Tuple[tuple, int]]:
+        # (plan node, number of boolean buffers it needs)
+        if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in COMPARISON_UFUNCS:
+            left, right = operand(node.left), operand(node.comparators[0])
+            if left is None or right is None:
+                return None
+            symbol, ufunc = COMPARISON_UFUNCS[type(node.ops[0])]
+            return ("compare", symbol, ufunc, left, right), 1
+        if isinstance(node, ast.BoolOp):
+            built = [build(value) for value in node.values]
+            if any(b is None for b in built):
+                return None
+            symbol, ufunc = LOGICAL_UFUNCS[type(node.op)]
+            depth = max([built[0][1]] + [b[1] + 1 for b in built[1:]])
+            return ("logic", symbol, ufunc, tuple(b[0] for b in built)), depth
+        return None
+
+    built = build(tree.body)
+    if built is None:
+        return None
+    return MaskPlan(built[0], tuple(columns), built[1])
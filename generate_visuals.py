@@ -1,27 +1,45 @@
+import base64
+import json
+import math
 import os
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.dates as mdates
+from trade_log import TradeLog
+
+try:
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+except ImportError:  # plotly is optional; only the interactive HTML chart needs it
+    go = None
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
 
 
 def plot_visualization(
     df: pd.DataFrame,
-    results_df: pd.DataFrame,
-    output_folder: str = "images"
+    results_df,
+    output_folder: str = "images",
+    html: bool = False
 ) -> str:
     """
-    Generate and save trading visualizations (matplotlib PNG, optionally Bokeh HTML) from market and results data.
+    Generate and save trading visualizations (matplotlib PNG, optionally interactive HTML) from market and results data.
 
     Args:
         df (pd.DataFrame): Market data with at least 'Date', 'Open', 'High', 'Low', 'Close', 'Volume'.
-        results_df (pd.DataFrame): Backtest results with at least 'Date', 'Action', 'Entry', 'PnL'.
+        results_df (TradeLog | pd.DataFrame): Backtest trades with at least 'Date' or 'EntryDate', 'Action', 'Entry', 'PnL'.
         output_folder (str): Directory to save output images.
+        html (bool): Also write the interactive WebGL chart (needs plotly), see plot_interactive.
 
     Returns:
         str: Path to the saved PNG visualization.
     """
     os.makedirs(output_folder, exist_ok=True)
 
+    if isinstance(results_df, TradeLog):
+        results_df = results_df.to_pandas()
+
     # --- Sanity checks ---
     if results_df.empty:
         raise ValueError("❌ 無回測結果資料（results_df 為空），無法產生視覺化。")
@@ -52,8 +70,10 @@ def plot_visualization(
     equity["Drawdown"] = (equity["Equity"] - equity["Peak"]) / equity["Peak"]
 
     # --- Matplotlib Plot for Excel ---
-    fig, axs = plt.subplots(
-        4, 1, figsize=(12, 14), sharex=True,
+    # Figure API instead of pyplot: no global state, so renders can run on a background writer thread
+    fig = Figure(figsize=(12, 14))
+    axs = fig.subplots(
+        4, 1, sharex=True,
         gridspec_kw={'height_ratios': [3, 1, 2, 1]}
     )
 
@@ -98,11 +118,217 @@ def plot_visualization(
             label.set_rotation(30)
             label.set_horizontalalignment('right')
 
-    plt.tight_layout()
+    fig.tight_layout()
     png_path = os.path.join(output_folder, "trading_visualization.png")
-    plt.savefig(png_path)
-    plt.close()
+    fig.savefig(png_path)
+
+    # --- (Optional) Interactive HTML ---
+    if html:
+        html_path = plot_interactive(df.reset_index(), results_df, equity, output_folder)
+        if html_path:
+            print(f"[INFO] Interactive chart saved to {html_path}")
+
+    return png_path
+
+
+def bucket_sizes(n: int, max_points: int = 2000, zoom_levels: int = 3, zoom_factor: int = 4) -> list:
+    """
+    Bars per bucket of each zoom level, coarsest first: the coarsest level shows all n bars in at
+    most max_points buckets, each further level is zoom_factor times finer (down to single bars).
+    """
+    sizes = [max(1, math.ceil(n / max(1, int(max_points))))]
+    while len(sizes) < zoom_levels and sizes[-1] > 1:
+        sizes.append(max(1, math.ceil(sizes[-1] / zoom_factor)))
+    return sizes
+
+
+def downsample_ohlc(x: np.ndarray, open_, high, low, close, size: int):
+    """Aggregate consecutive bars in buckets of `size`: first open/date, highest high, lowest low, last close."""
+    starts = np.arange(0, len(x), size)
+    ends = np.minimum(starts + size, len(x)) - 1
+    return (x[starts], open_[starts], np.maximum.reduceat(high, starts), np.minimum.reduceat(low, starts),
+            close[ends])
+
+
+def minmax_indices(y: np.ndarray, size: int) -> np.ndarray:
+    """Indices of the lowest and highest point of every bucket of `size` points, in order."""
+    if size <= 1:
+        return np.arange(len(y))
+    n_buckets = math.ceil(len(y) / size)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:len(y)] = y
+    buckets = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+    return np.unique(np.concatenate((lows, highs)))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: n_out indices that keep the visual shape of the (x, y) line."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        # Pick the point forming the largest triangle with the previous pick and the next bucket's mean
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _line_levels(x: np.ndarray, y: np.ndarray, sizes: list, method: str) -> list:
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    levels = []
+    for size in sizes:
+        if method == "lttb":
+            idx = lttb_indices(x, y, math.ceil(len(y) / size))
+        else:
+            idx = minmax_indices(y, size)
+        levels.append({"x": x[idx], "y": y[idx]})
+    return levels
+
+
+def _encode(values: np.ndarray, dtype: str = "<f4") -> str:
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode("ascii")
+
+
+# Swaps every downsampled trace to the finest precomputed level that keeps the visible x range
+# under maxPoints whenever the chart is zoomed or panned; runs in the page, no server involved.
+_ZOOM_SCRIPT = r"""
+(function() {
+  var gd = document.getElementById('{plot_id}');
+  var series = %(series)s, maxPoints = %(max_points)d;
+  // Dates are float64 epoch milliseconds, values float32
+  function decode(b64, key) {
+    var s = atob(b64), bytes = new Uint8Array(s.length);
+    for (var i = 0; i < s.length; i++) bytes[i] = s.charCodeAt(i);
+    return key === 'x' ? new Float64Array(bytes.buffer) : new Float32Array(bytes.buffer);
+  }
+  series.forEach(function(s) {
+    s.levels.forEach(function(level) { for (var key in level) level[key] = decode(level[key], key); });
+  });
+  function toMs(v) {
+    if (typeof v === 'number') return v;
+    var text = String(v).replace(' ', 'T');
+    if (text.length <= 10) text += 'T00:00:00';
+    return Date.parse(text + 'Z');
+  }
+  function lowerBound(a, v) {
+    var lo = 0, hi = a.length;
+    while (lo < hi) { var mid = (lo + hi) >> 1; if (a[mid] < v) lo = mid + 1; else hi = mid; }
+    return lo;
+  }
+  function render(x0, x1) {
+    series.forEach(function(s) {
+      var pick = null, lo = 0, hi = 0;
+      for (var k = 0; k < s.levels.length; k++) {
+        var level = s.levels[k];
+        var a = x0 === null ? 0 : Math.max(0, lowerBound(level.x, x0) - 1);
+        var b = x1 === null ? level.x.length : Math.min(level.x.length, lowerBound(level.x, x1) + 1);
+        if (pick !== null && b - a > maxPoints) break;
+        pick = level; lo = a; hi = b;
+      }
+      var update = {};
+      for (var key in pick) update[key] = [pick[key].slice(lo, hi)];
+      Plotly.restyle(gd, update, [s.trace]);
+    });
+  }
+  gd.on('plotly_relayout', function(ev) {
+    var x0 = null, x1 = null, reset = false;
+    for (var key in ev) {
+      if (/^xaxis\d*\.range\[0\]$/.test(key)) x0 = toMs(ev[key]);
+      else if (/^xaxis\d*\.range\[1\]$/.test(key)) x1 = toMs(ev[key]);
+      else if (/^xaxis\d*\.range$/.test(key)) { x0 = toMs(ev[key][0]); x1 = toMs(ev[key][1]); }
+      else if (/^xaxis\d*\.autorange$/.test(key)) reset = true;
+    }
+    if (x0 !== null && x1 !== null) render(x0, x1);
+    else if (reset) render(null, null);
+  });
+})();
+"""
+
+
+def plot_interactive(df: pd.DataFrame, results_df, equity: pd.DataFrame = None, output_folder: str = "images",
+                     max_points: int = 2000, zoom_levels: int = 3, method: str = "minmax",
+                     include_plotlyjs=True) -> str:
+    """
+    Write an interactive HTML chart of price (candlesticks), Pt, trades, equity and drawdown,
+    with WebGL (Scattergl) line and marker traces.
+
+    Price and the lines are downsampled ahead of time at `zoom_levels` resolutions (OHLC buckets
+    for candles, min/max or LTTB points for lines); a script in the page swaps in the finest level
+    that keeps at most max_points points in view on every zoom, so the file stays small and
+    smooth with hundreds of thousands of bars. include_plotlyjs="cdn" leaves the plotly.js bundle
+    out of the file. Returns the HTML path, or None when plotly is not installed.
+    """
+    if go is None:
+        print("⚠️ plotly is not installed; skipping the interactive HTML chart.")
+        return None
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsample method {method!r}; expected one of {DOWNSAMPLE_METHODS}")
+    if isinstance(results_df, TradeLog):
+        results_df = results_df.to_pandas()
+    os.makedirs(output_folder, exist_ok=True)
+
+    def ms(values):
+        return pd.to_datetime(values).to_numpy(dtype="datetime64[ms]").astype(float)
+
+    df = df.sort_values("Date")
+    x = ms(df["Date"])
+    sizes = bucket_sizes(len(df), max_points, zoom_levels)
+    prices = [df[c].to_numpy(dtype=float) for c in ("Open", "High", "Low", "Close")]
+    candles = [dict(zip(("x", "open", "high", "low", "close"), downsample_ohlc(x, *prices, size)))
+               for size in sizes]
+    series = [("Price", candles)]
+    if "Pt" in df.columns:
+        series.append(("Pt", _line_levels(x, df["Pt"].to_numpy(dtype=float), sizes, method)))
+    if equity is None:
+        equity = results_df.assign(Equity=results_df["PnL"].cumsum())
+        peak = equity["Equity"].cummax()
+        equity["Drawdown"] = (equity["Equity"] - peak) / peak
+        equity.index = pd.to_datetime(equity["ExitDate"])
+    equity = equity.sort_index(kind="stable")
+    equity_x = ms(equity.index)
+    equity_sizes = bucket_sizes(len(equity), max_points, zoom_levels)
+    for name in ("Equity", "Drawdown"):
+        series.append((name, _line_levels(equity_x, equity[name].to_numpy(dtype=float), equity_sizes, method)))
 
-    # --- (Optional) Interactive Bokeh Plot ---
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.04, row_heights=[0.6, 0.2, 0.2],
+                        subplot_titles=("Price with Pt and Buy/Sell Signals", "PnL Curve", "Drawdown"))
+    fig.add_trace(go.Candlestick(x=candles[0]["x"], open=candles[0]["open"], high=candles[0]["high"],
+                                 low=candles[0]["low"], close=candles[0]["close"], name="Price"), row=1, col=1)
+    trace_ids = {"Price": 0}
+    rows = {"Pt": 1, "Equity": 2, "Drawdown": 3}
+    colors = {"Pt": "blue", "Equity": "blue", "Drawdown": "red"}
+    for name, levels in series[1:]:
+        trace_ids[name] = len(fig.data)
+        fig.add_trace(go.Scattergl(x=levels[0]["x"], y=levels[0]["y"], mode="lines", name=name,
+                                   line={"color": colors[name]}, fill="tozeroy" if name == "Drawdown" else None),
+                      row=rows[name], col=1)
+    for action, symbol, color in (("Buy", "triangle-up", "seagreen"), ("Sell", "triangle-down", "crimson")):
+        trades = results_df[results_df["Action"] == action]
+        fig.add_trace(go.Scattergl(x=ms(trades["EntryDate"]), y=trades["Entry"].to_numpy(dtype=float),
+                                   mode="markers", name=action,
+                                   marker={"symbol": symbol, "color": color, "size": 9}), row=1, col=1)
+    fig.update_xaxes(type="date", rangeslider_visible=False)
+    fig.update_layout(height=900, hovermode="x", legend={"orientation": "h"})
 
-    return png_path
\ No newline at end of file
+    payload = [{"trace": trace_ids[name],
+                "levels": [{key: _encode(values, "<f8" if key == "x" else "<f4") for key, values in level.items()}
+                           for level in levels]}
+               for name, levels in series]
+    script = _ZOOM_SCRIPT % {"series": json.dumps(payload), "max_points": int(max_points)}
+    html_path = os.path.join(output_folder, "trading_visualization.html")
+    fig.write_html(html_path, include_plotlyjs=include_plotlyjs, post_script=script)
+    return html_path
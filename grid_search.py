@@ -0,0 +1,207 @@
+"""
+Exhaustive walk-forward grid sweep.
+
+For a few optimized parameters the whole `param_ranges` grid is scored on every train window,
+instead of sampling it with TPE one trial at a time. Swept TA-Lib rows are precomputed for the
+grid once per window (`IndicatorPlan.sweep`), rules are evaluated as vectorized masks and trades
+are read off the masks with `strategy_from_masks`. The result is a (parameter sets x windows x
+metrics) cube; the weighted score is smoothed over each grid point's neighbourhood, and the most
+stable neighbourhood, not the single best point, is picked for each window's test period.
+"""
+
+import itertools
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from indicator_builder import compile_indicator_plan
+from optimizer import param_grid
+from performance_metrics import calculate_performance_metrics, metric_key_map
+from strategy import compile_strategy_logic, strategy_from_masks
+from walk_forward import window_schedule
+
+
+@dataclass
+class GridSweepResult:
+    """Metric cube of a grid sweep; axis 0 follows `points`, axis 1 `windows`, axis 2 `metrics`."""
+    params: List[str]
+    axes: List[list]
+    points: pd.DataFrame
+    windows: List[Tuple[int, int, int]]
+    metrics: List[str]
+    cube: np.ndarray
+    scores: np.ndarray
+    stability: np.ndarray
+    selection: pd.DataFrame
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per (parameter set, window): parameters, metrics, Score and Stability."""
+        n_points, n_windows = self.scores.shape
+        frame = self.points.loc[np.tile(np.arange(n_points), n_windows)].reset_index(drop=True)
+        frame.insert(0, "Window", np.repeat(np.arange(1, n_windows + 1), n_points))
+        metrics = self.cube.transpose(1, 0, 2).reshape(-1, len(self.metrics))
+        for k, name in enumerate(self.metrics):
+            frame[name] = metrics[:, k]
+        frame["Score"] = self.scores.T.ravel()
+        frame["Stability"] = self.stability.T.ravel()
+        return frame
+
+
+def neighbourhood_mean(values: np.ndarray, shape: Tuple[int, ...], radius: int = 1) -> np.ndarray:
+    """
+    Mean of `values` (grid points x windows, points in C order of `shape`) over the box of
+    +/- radius grid steps around every point, counting only neighbours inside the grid.
+    """
+    grid = values.reshape(*shape, -1)
+    total, count = grid.astype(float), np.ones(grid.shape)
+    for axis in range(len(shape)):
+        total, count = _box_sum(total, axis, radius), _box_sum(count, axis, radius)
+    return (total / count).reshape(values.shape)
+
+
+def _box_sum(values: np.ndarray, axis: int, radius: int) -> np.ndarray:
+    """Sum over a window of +/- radius along axis, from one cumulative sum."""
+    n = values.shape[axis]
+    padded = np.cumsum(np.insert(values, 0, 0.0, axis=axis), axis=axis)
+    upper = np.minimum(np.arange(n) + radius + 1, n)
+    lower = np.maximum(np.arange(n) - radius, 0)
+    return np.take(padded, upper, axis=axis) - np.take(padded, lower, axis=axis)
+
+
+def grid_sweep(config: dict, radius: Optional[int] = None, max_points: Optional[int] = None) -> GridSweepResult:
+    """
+    Score every parameter set of the `opt_params` grid on every walk-forward train window,
+    pick the most stable one per window and evaluate it on the window's test period.
+
+    `radius` (config "grid_radius", default 1) is the neighbourhood half-width in grid steps;
+    `max_points` (config "grid_max_points", default 5000) caps the number of parameter sets.
+    """
+    radius = int(config.get("grid_radius", 1) if radius is None else radius)
+    max_points = int(config.get("grid_max_points", 5000) if max_points is None else max_points)
+    param_ranges = config["param_ranges"]
+    params = [p for p in config.get("opt_params", []) if p in param_ranges]
+    if not params:
+        raise ValueError("Grid sweep needs at least one optimized parameter with a Low/High/Step range")
+    casts = [int if float(param_ranges[p][2]).is_integer() else float for p in params]
+    axes = [param_grid(*param_ranges[p], cast=cast) for p, cast in zip(params, casts)]
+    shape = tuple(len(values) for values in axes)
+    n_points = int(np.prod(shape))
+    if n_points > max_points:
+        raise ValueError(f"Grid of {' x '.join(map(str, shape))} = {n_points} parameter sets exceeds "
+                         f"grid_max_points ({max_points}); narrow the ranges or use TPE")
+    points = pd.DataFrame(list(itertools.product(*axes)), columns=params)
+    grid = dict(zip(params, axes))
+
+    df, windows = window_schedule(config)
+    rules = compile_strategy_logic(config["logic_table"])
+    plan = config.get("indicator_plan") or compile_indicator_plan(config.get("indicator_builder"),
+                                                                  config.get("talib_builder"))
+    base_params = dict(config.get("param_map", {}))
+    key_map = metric_key_map()
+    metrics = list(key_map)
+    weights = config.get("objective_weights", {})
+    incremental = bool(config.get("incremental_walk_forward", False))
+    print(f"[INFO] Grid sweep: {n_points} parameter sets x {len(windows)} windows")
+
+    def measure(frame, masks=None):
+        trades = strategy_from_masks(frame, rules, masks if masks is not None else rules.evaluate_frame(frame))
+        return calculate_performance_metrics(trades, frame)
+
+    def param_set(i):
+        return {**base_params, **{p: cast(points.iat[i, k]) for k, (p, cast) in enumerate(zip(params, casts))}}
+
+    def history(i):
+        frame = plan.evaluate(df, param_set(i), sweeps)
+        return frame, rules.evaluate_frame(frame)
+
+    cube = np.zeros((n_points, len(windows), len(metrics)))
+    if incremental:
+        # Indicators and rule masks once over the whole history per parameter set, sliced per window
+        sweeps = plan.sweep(df, base_params, grid)
+        for i in range(n_points):
+            frame, masks = history(i)
+            for w, (start, train_stop, _) in enumerate(windows):
+                result = measure(frame.iloc[start:train_stop], {r: m[start:train_stop] for r, m in masks.items()})
+                cube[i, w] = [result.get(key_map[m], 0) for m in metrics]
+    else:
+        for w, (start, train_stop, _) in enumerate(windows):
+            train_df = df.iloc[start:train_stop]
+            sweeps = plan.sweep(train_df, base_params, grid)
+            for i in range(n_points):
+                result = measure(plan.evaluate(train_df, param_set(i), sweeps))
+                cube[i, w] = [result.get(key_map[m], 0) for m in metrics]
+
+    # Weighted score as the TPE objective computes it, oriented so that higher is better
+    scores = np.zeros((n_points, len(windows)))
+    names = {**{key: name for name, key in key_map.items()}, **{name: name for name in metrics}}
+    for metric, weight in weights.items():
+        if metric in names:
+            scores += float(weight) * cube[:, :, metrics.index(names[metric])]
+    if str(config.get("objective_type", "MAX")).upper() != "MAX":
+        scores = -scores
+    stability = neighbourhood_mean(scores, shape, radius) if len(windows) else scores
+
+    rows = []
+    selected = {}
+    for w, (start, train_stop, test_stop) in enumerate(windows):
+        # Most stable neighbourhood first, then the point's own score
+        i = int(np.lexsort((scores[:, w], stability[:, w]))[-1])
+        if incremental:
+            if i not in selected:
+                selected[i] = history(i)
+            frame, masks = selected[i]
+            test = measure(frame.iloc[train_stop:test_stop], {r: m[train_stop:test_stop] for r, m in masks.items()})
+        else:
+            test = measure(plan.evaluate(df.iloc[train_stop:test_stop], param_set(i)))
+        rows.append({"Window": w + 1, **{p: param_set(i)[p] for p in params}, "Stability": stability[i, w],
+                     "Score": scores[i, w], "BestScore": scores[:, w].max(),
+                     **{f"Test {m}": test.get(key_map[m], 0) for m in metrics}})
+    return GridSweepResult(params, axes, points, windows, metrics, cube, scores, stability, pd.DataFrame(rows))
+
+
+def plot_stability_heatmaps(result: GridSweepResult, path: str) -> str:
+    """
+    Heatmaps of the neighbourhood-mean score, standardized within each window so windows are
+    comparable: per parameter value and window (how the stable region drifts), and for each
+    parameter pair averaged over windows and the other parameters.
+    """
+    shape = tuple(len(values) for values in result.axes)
+    std = result.stability.std(axis=0)
+    standardized = (result.stability - result.stability.mean(axis=0)) / np.where(std > 0, std, 1.0)
+    stability = standardized.reshape(*shape, -1)
+    n_params = len(result.params)
+    pairs = list(itertools.combinations(range(n_params), 2))
+    panels = [("drift", k) for k in range(n_params)] + [("pair", pair) for pair in pairs]
+    fig = Figure(figsize=(12, 4 * len(panels)))
+    axs = np.atleast_1d(fig.subplots(len(panels), 1))
+    for ax, (kind, what) in zip(axs, panels):
+        if kind == "drift":
+            other = tuple(a for a in range(n_params) if a != what)
+            data = stability.mean(axis=other)
+            image = ax.imshow(data, aspect="auto", origin="lower", cmap="viridis")
+            ax.set_title(f"Neighbourhood score by {result.params[what]} and window")
+            ax.set_xlabel("Window")
+            ax.set_xticks(range(data.shape[1]))
+            ax.set_xticklabels(range(1, data.shape[1] + 1))
+            ax.set_ylabel(result.params[what])
+            ax.set_yticks(range(shape[what]))
+            ax.set_yticklabels(result.axes[what])
+        else:
+            a, b = what
+            other = tuple(k for k in range(n_params) if k not in what) + (n_params,)
+            data = stability.mean(axis=other)
+            image = ax.imshow(data, aspect="auto", origin="lower", cmap="viridis")
+            ax.set_title(f"Neighbourhood score by {result.params[a]} and {result.params[b]} (mean over windows)")
+            ax.set_ylabel(result.params[a])
+            ax.set_xlabel(result.params[b])
+            ax.set_yticks(range(shape[a]))
+            ax.set_yticklabels(result.axes[a])
+            ax.set_xticks(range(shape[b]))
+            ax.set_xticklabels(result.axes[b], rotation=90)
+        fig.colorbar(image, ax=ax)
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
@@ -1,147 +1,813 @@
+import os
 import numpy as np
 import pandas as pd
+import talib_numpy
+import talib_stream
+from expressions import evaluate_chain
+from timeframes import parse_reference
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
 
-def build_indicators(df, param_map, builder_df=None, talib_df=None):
+
+ARITHMETIC_OPS = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+    "**": np.power,
+}
+
+# "auto": TA-Lib when installed, NumPy fallback otherwise; "talib"/"numpy": that backend only
+TA_BACKENDS = ("auto", "talib", "numpy")
+
+# Frames shorter than this are built row by row even with threads: pool overhead would dominate
+PARALLEL_MIN_ROWS = 20_000
+
+_POOLS: Dict[int, ThreadPoolExecutor] = {}
+
+
+def _thread_pool(threads: int) -> ThreadPoolExecutor:
+    """Shared worker pool per thread count, created on first use."""
+    pool = _POOLS.get(threads)
+    if pool is None:
+        pool = _POOLS.setdefault(threads, ThreadPoolExecutor(threads, thread_name_prefix="indicators"))
+    return pool
+
+
+_TALIB_MODULE = None
+_TALIB_LOADED = False
+
+
+def _load_talib():
+    """Import TA-Lib once; return None when it is not installed."""
+    global _TALIB_MODULE, _TALIB_LOADED
+    if not _TALIB_LOADED:
+        try:
+            import talib
+        except ImportError:
+            talib = None
+            print("[INFO] TA-Lib is not installed; using the NumPy implementations in talib_numpy.")
+        _TALIB_MODULE = talib
+        _TALIB_LOADED = True
+    return _TALIB_MODULE
+
+
+def resolve_ta_function(name: str, backend: str = "auto") -> Optional[Callable]:
+    """Return the callable for TA-Lib function `name` on the given backend, or None if unavailable."""
+    if backend not in TA_BACKENDS:
+        raise ValueError(f"Unknown TA backend '{backend}', expected one of {TA_BACKENDS}")
+    if backend != "numpy":
+        talib = _load_talib()
+        talib_func = getattr(talib, name, None) if talib is not None else None
+        if talib_func is not None or backend == "talib":
+            return talib_func
+    return talib_numpy.FUNCTIONS.get(name)
+
+
+def _is_blank(value) -> bool:
+    """True for empty Excel cells (None, NaN or empty string)."""
+    if value is None:
+        return True
     try:
-        import talib
-    except ImportError:
-        talib = None
-    df = df.copy()
-    # Arithmetic indicators with combination logic
-    if builder_df is not None and 'Combination' in builder_df.columns:
-        for name, group in builder_df.groupby('Indicator Name', sort=False):
-            result = None
-            prev_comb = None
-            for idx, row in group.iterrows():
-                # print(f"[DEBUG] Indicator: {name}, Step {idx}, ind_a: {row.get('Indicator A')}, op: {row.get('Operator')}, val/param: {row.get('Value / Param')}, comb: {row.get('Combination')}")
-                ind_a = row.get("Indicator A")
-                op = row.get("Operator")
-                val_or_param = row.get("Value / Param")
-                comb = str(row.get("Combination", "END")).strip().upper()
-                if not (ind_a and op and val_or_param):
-                    continue
-                # Get left operand
-                left = df[str(ind_a)] if str(ind_a) in df.columns else None
-                if left is None:
-                    continue
-                # Get right operand (parameter or column)
-                val = param_map.get(str(val_or_param), val_or_param)
-                if str(val) in df.columns:
-                    val_operand = df[str(val)]
-                else:
-                    try:
-                        val_operand = float(val)
-                    except Exception:
-                        continue
-                # Compute this step (always a product for your use case)
+        if pd.isna(value):
+            return True
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip() == ""
+
+
+def _split_cell(value) -> Tuple[str, ...]:
+    """Split a comma-separated Excel cell ('Hy, Ly, Cy') into stripped tokens."""
+    if _is_blank(value):
+        return ()
+    return tuple(p.strip() for p in str(value).split(",") if p.strip())
+
+
+def _coerce_param(value):
+    """Cast a TA-Lib parameter: integral values become int, others float, text is kept."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number.is_integer() else number
+
+
+@dataclass(frozen=True)
+class ArithmeticStep:
+    """One row of the Indicator Builder: `Indicator A <Operator> Value / Param`, then `Combination`."""
+    indicator_a: str
+    operator: str
+    operand: object
+    combination: str
+
+
+@dataclass(frozen=True)
+class ArithmeticIndicator:
+    """A named chain of arithmetic steps joined left to right by each step's Combination."""
+    name: str
+    steps: Tuple[ArithmeticStep, ...]
+
+
+@dataclass(frozen=True)
+class TalibIndicator:
+    """One row of the TA-Lib builder: output name(s), function, input columns and parameter keys."""
+    name: str
+    function: str
+    inputs: Tuple[str, ...]
+    params: Tuple[str, ...]
+
+    @property
+    def output_names(self) -> Tuple[str, ...]:
+        return tuple(n.strip() for n in self.name.split(","))
+
+
+_UNLOADED = object()
+
+
+class _SlotTable:
+    """Per-evaluation arrays: base columns are converted to float64 on first use."""
+    __slots__ = ("df", "n_base", "arrays", "written")
+
+    def __init__(self, df: pd.DataFrame, n_slots: int):
+        self.df = df
+        self.n_base = df.shape[1]
+        self.arrays = [_UNLOADED] * n_slots
+        self.written: Dict[int, None] = {}
+
+    def get(self, slot: int) -> Optional[np.ndarray]:
+        values = self.arrays[slot]
+        if values is _UNLOADED:
+            values = None
+            if slot < self.n_base:
                 try:
-                    step_result = None
-                    if op == "+":
-                        step_result = left + val_operand
-                    elif op == "-":
-                        step_result = left - val_operand
-                    elif op == "*":
-                        step_result = left * val_operand
-                    elif op == "/":
-                        step_result = left / val_operand
-                    elif op == "**":
-                        step_result = left ** val_operand
-                    else:
-                        continue
-                except Exception:
-                    continue
-                # Chain with previous result using Combination
-                if result is None or prev_comb is None:
-                    result = step_result
-                else:
-                    if prev_comb == "+":
-                        result = result + step_result
-                    elif prev_comb == "-":
-                        result = result - step_result
-                    elif prev_comb == "*":
-                        result = result * step_result
-                    elif prev_comb == "/":
-                        result = result / step_result
-                    elif prev_comb == "**":
-                        result = result ** step_result
-                    elif prev_comb == "END":
-                        result = step_result  # Or break, but here we just reset
-                    else:
-                        raise ValueError(f"Unknown combination operator: {prev_comb}")
-                prev_comb = comb
+                    values = np.ascontiguousarray(self.df.iloc[:, slot].to_numpy(dtype=float))
+                except (TypeError, ValueError):
+                    values = None
+            self.arrays[slot] = values
+        return values
+
+    def set(self, slot: int, values) -> None:
+        self.arrays[slot] = np.asarray(values, dtype=float)
+        self.written[slot] = None
+
+
+class _TaskTable:
+    """A _SlotTable as seen by one row of a parallel build: writes are logged for sheet-order assembly."""
+    __slots__ = ("table", "log")
+
+    def __init__(self, table: _SlotTable, log: list):
+        self.table = table
+        self.log = log
+
+    def get(self, slot: int) -> Optional[np.ndarray]:
+        return self.table.get(slot)
+
+    def set(self, slot: int, values) -> None:
+        self.table.arrays[slot] = np.asarray(values, dtype=float)
+        self.log.append(slot)
+
+
+@dataclass(frozen=True)
+class _BoundStep:
+    left: int
+    operator: str
+    param_key: str
+    fallback_slot: int
+    fallback_value: Optional[float]
+    combination: str
+
+
+@dataclass(frozen=True)
+class _BoundChain:
+    slot: int
+    steps: Tuple[_BoundStep, ...]
+
+
+@dataclass(frozen=True)
+class _BoundTalib:
+    function: str
+    func: Callable
+    inputs: Tuple[int, ...]
+    param_keys: Tuple[str, ...]
+    param_defaults: tuple
+    output_slots: Tuple[int, ...]
+    name_slot: int
+    input_deps: frozenset
+
+
+@dataclass(frozen=True)
+class _SweepEntry:
+    """Outputs of one TA-Lib row for every grid value of one parameter."""
+    param_key: str
+    index: Dict[float, int]
+    outputs: Tuple[np.ndarray, ...]
+    valid: np.ndarray
+    multi_output: bool
+
+    def lookup(self, param_map: dict):
+        i = self.index.get(_grid_key(param_map.get(self.param_key)))
+        if i is None or not self.valid[i]:
+            return None
+        if self.multi_output:
+            return tuple(m[i] for m in self.outputs)
+        return self.outputs[0][i]
+
+
+@dataclass(frozen=True)
+class IndicatorSweep:
+    """
+    Precomputed (values x bars) matrices for the TA-Lib rows of a bound plan that depend on
+    a single optimized parameter. Valid only for the DataFrame it was computed on.
+    """
+    columns: Tuple[str, ...]
+    n_rows: int
+    entries: Dict[int, _SweepEntry]
+
+
+def _grid_key(value) -> Optional[float]:
+    try:
+        return round(float(value), 9)
+    except (TypeError, ValueError):
+        return None
+
+
+class BoundIndicatorPlan:
+    """
+    An IndicatorPlan resolved against one column layout.
+
+    Holds the TA-Lib callables, input slot indices and parameter slots, so evaluating a
+    parameter set only looks up parameter values and runs the numeric kernels.
+    """
+
+    def __init__(self, plan: "IndicatorPlan", columns: Tuple[str, ...]):
+        self.columns = columns
+        self.backend = plan.backend
+        self.threads = plan.threads
+        # Dependency levels per set of column-valued parameters (see _levels)
+        self._schedules: Dict[tuple, List[List[int]]] = {}
+        self.slot_of: Dict[str, int] = {}
+        self.names = []
+        # Parameter tokens each slot depends on, as of the row being bound
+        self.deps: Dict[int, frozenset] = {}
+        for col in columns:
+            self._slot(col)
+        self.chains = tuple(self._bind_chain(ind) for ind in plan.arithmetic)
+        talib_rows = (self._bind_talib(ind) for ind in plan.talib)
+        self.talib_rows = tuple(row for row in talib_rows if row is not None)
+
+    def _slot(self, name) -> int:
+        if name not in self.slot_of:
+            self.slot_of[name] = len(self.names)
+            self.names.append(name)
+        return self.slot_of[name]
+
+    def _bind_chain(self, indicator: ArithmeticIndicator) -> _BoundChain:
+        steps = []
+        deps = set()
+        for step in indicator.steps:
+            if step.indicator_a not in self.slot_of:
+                continue
+            token = str(step.operand)
+            fallback_slot = self.slot_of.get(token, -1)
+            deps |= {token} | self.deps.get(self.slot_of[step.indicator_a], frozenset())
+            deps |= self.deps.get(fallback_slot, frozenset())
+            fallback_value = None
+            if fallback_slot < 0:
+                try:
+                    fallback_value = float(step.operand)
+                except (TypeError, ValueError):
+                    fallback_value = None
+            steps.append(_BoundStep(
+                left=self.slot_of[step.indicator_a],
+                operator=step.operator,
+                param_key=token,
+                fallback_slot=fallback_slot,
+                fallback_value=fallback_value,
+                combination=step.combination,
+            ))
+        # The output slot is allocated after the inputs, so a chain never sees its own result
+        slot = self._slot(indicator.name)
+        if steps:
+            self.deps[slot] = frozenset(deps)
+        return _BoundChain(slot=slot, steps=tuple(steps))
+
+    def _bind_talib(self, indicator: TalibIndicator) -> Optional[_BoundTalib]:
+        talib_func = resolve_ta_function(indicator.function, self.backend)
+        if talib_func is None or not indicator.inputs:
+            return None
+        if not all(col in self.slot_of for col in indicator.inputs):
+            return None
+        inputs = tuple(self.slot_of[col] for col in indicator.inputs)
+        input_deps = frozenset().union(*(self.deps.get(slot, frozenset()) for slot in inputs))
+        row = _BoundTalib(
+            function=indicator.function,
+            func=talib_func,
+            inputs=inputs,
+            param_keys=indicator.params,
+            param_defaults=tuple(_coerce_param(k) for k in indicator.params),
+            output_slots=tuple(self._slot(n) for n in indicator.output_names),
+            name_slot=self._slot(indicator.name),
+            input_deps=input_deps,
+        )
+        for slot in row.output_slots + (row.name_slot,):
+            self.deps[slot] = input_deps | frozenset(indicator.params)
+        return row
+
+    def _run(self, df: pd.DataFrame, param_map: dict, sweeps: Optional[IndicatorSweep] = None,
+             capture: Optional[Dict[int, list]] = None) -> _SlotTable:
+        table = _SlotTable(df, len(self.names))
+        entries = sweeps.entries if sweeps is not None else {}
+        n_tasks = len(self.chains) + len(self.talib_rows)
+        if self.threads > 1 and n_tasks > 1 and len(df) >= PARALLEL_MIN_ROWS:
+            self._run_parallel(table, param_map, entries, capture, len(df))
+            return table
+        with np.errstate(all="ignore"):
+            for task in range(n_tasks):
+                self._run_task(task, table, param_map, entries, capture, len(df))
+        return table
+
+    def _run_task(self, task: int, table, param_map: dict, entries, capture, n_rows: int) -> None:
+        """Build one row: the arithmetic chains in sheet order, then the TA-Lib rows."""
+        if task < len(self.chains):
+            chain = self.chains[task]
+            result = self._evaluate_chain(chain, table, param_map)
             if result is not None:
-                df[name] = result
-    elif builder_df is not None:
-        for _, row in builder_df.iterrows():
-            name = row.get("Indicator Name")
-            ind_a = row.get("Indicator A")
-            op = row.get("Operator")
-            val_or_param = row.get("Value / Param")
-            if not (name and ind_a and op and val_or_param):
+                table.set(chain.slot, result)
+            return
+        i = task - len(self.chains)
+        row = self.talib_rows[i]
+        if capture is not None and i in capture:
+            capture[i] = [table.get(slot) for slot in row.inputs]
+        precomputed = entries[i].lookup(param_map) if i in entries else None
+        self._evaluate_talib(row, table, param_map, n_rows, precomputed)
+
+    def _run_parallel(self, table: _SlotTable, param_map: dict, entries, capture, n_rows: int) -> None:
+        """
+        Run rows level by level on the thread pool (TA-Lib and NumPy kernels release the GIL).
+        Every row of a level only needs rows of earlier levels, so each one reads exactly what it
+        would read in sheet order; columns are then registered in sheet order as well.
+        """
+        logs = [[] for _ in range(len(self.chains) + len(self.talib_rows))]
+
+        def run(task):
+            with np.errstate(all="ignore"):
+                self._run_task(task, _TaskTable(table, logs[task]), param_map, entries, capture, n_rows)
+
+        pool = _thread_pool(self.threads)
+        for level in self._levels(param_map):
+            if len(level) == 1:
+                run(level[0])
+            else:
+                list(pool.map(run, level))
+        for log in logs:
+            for slot in log:
+                table.written[slot] = None
+
+    def _task_slots(self, task: int, param_map: dict) -> Tuple[set, set]:
+        """Slots a row may read and write."""
+        if task < len(self.chains):
+            chain = self.chains[task]
+            reads = set()
+            for step in chain.steps:
+                reads |= {step.left, step.fallback_slot}
+                if step.param_key in param_map:
+                    reads.add(self.slot_of.get(str(param_map[step.param_key]), -1))
+            reads.discard(-1)
+            return reads, {chain.slot}
+        row = self.talib_rows[task - len(self.chains)]
+        return set(row.inputs), set(row.output_slots) | {row.name_slot}
+
+    def _levels(self, param_map: dict) -> List[List[int]]:
+        """
+        Rows grouped into dependency levels, sheet order within a level. A row comes after the
+        last earlier row writing a slot it reads or writes, and after every earlier row reading
+        a slot it overwrites, so sheet-order results are kept.
+        """
+        # A parameter whose value names a column makes that column an input of the chain
+        key = tuple(self.slot_of.get(str(param_map[step.param_key])) if step.param_key in param_map else None
+                    for chain in self.chains for step in chain.steps)
+        levels = self._schedules.get(key)
+        if levels is not None:
+            return levels
+        last_write: Dict[int, int] = {}
+        last_read: Dict[int, int] = {}
+        levels = []
+        for task in range(len(self.chains) + len(self.talib_rows)):
+            reads, writes = self._task_slots(task, param_map)
+            level = max([last_write.get(s, -1) + 1 for s in reads | writes]
+                        + [last_read.get(s, -1) + 1 for s in writes] + [0])
+            for s in reads:
+                last_read[s] = max(last_read.get(s, -1), level)
+            for s in writes:
+                last_write[s] = level
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(task)
+        self._schedules[key] = levels
+        return levels
+
+    def evaluate(self, df: pd.DataFrame, param_map: dict,
+                 sweeps: Optional[IndicatorSweep] = None) -> pd.DataFrame:
+        """
+        Return a copy of df with every indicator added (or overwritten) for param_map.
+        TA-Lib rows covered by `sweeps` take their output from the precomputed matrices.
+        """
+        if sweeps is not None and (sweeps.columns != self.columns or sweeps.n_rows != len(df)):
+            sweeps = None
+        table = self._run(df, param_map, sweeps)
+        outputs = {self.names[slot]: table.arrays[slot] for slot in table.written}
+        return _attach_outputs(df, outputs)
+
+    def sweep(self, df: pd.DataFrame, param_map: dict, grid: Dict[str, list],
+              max_values: int = 256) -> IndicatorSweep:
+        """
+        Precompute TA-Lib rows for every candidate value of an optimized parameter.
+
+        A row is swept when exactly one of its parameters is a key of `grid` and its inputs
+        do not depend on any grid parameter. Vectorized kernels from talib_numpy are used
+        where available; other functions are evaluated once per grid value.
+        """
+        candidates = {}
+        for i, row in enumerate(self.talib_rows):
+            swept = {k for k in row.param_keys if k in grid}
+            if len(swept) != 1 or row.input_deps & set(grid):
                 continue
-            if str(ind_a) not in df.columns:
+            key = swept.pop()
+            if 0 < len(grid[key]) <= max_values:
+                candidates[i] = key
+        capture = {i: None for i in candidates}
+        self._run(df, param_map, capture=capture)
+
+        entries = {}
+        for i, key in candidates.items():
+            row, inputs = self.talib_rows[i], capture[i]
+            if inputs is None or any(values is None for values in inputs):
                 continue
-            val = param_map.get(str(val_or_param), val_or_param)
-            if str(val) in df.columns:
-                val_operand = df[str(val)]
-            else:
+            values = list(grid[key])
+            params = [_coerce_param(param_map[k]) if k in param_map else default
+                      for k, default in zip(row.param_keys, row.param_defaults)]
+            positions = tuple(j for j, k in enumerate(row.param_keys) if k == key)
+            with np.errstate(all="ignore"):
+                entry = self._sweep_row(row, inputs, params, positions, values, key, len(df))
+            if entry is not None:
+                entries[i] = entry
+        return IndicatorSweep(columns=self.columns, n_rows=len(df), entries=entries)
+
+    def _sweep_row(self, row: _BoundTalib, inputs, params, positions, values, key, n_rows):
+        index = {}
+        for j, v in enumerate(values):
+            index.setdefault(_grid_key(v), j)
+        matrices = talib_numpy.sweep(row.function, inputs, params, positions,
+                                     [_coerce_param(v) for v in values])
+        if matrices is not None:
+            valid = np.ones(len(values), dtype=bool)
+        else:
+            # No vectorized kernel: evaluate once per grid value, still once per window
+            results = []
+            for v in values:
+                trial = list(params)
+                for pos in positions:
+                    trial[pos] = _coerce_param(v)
                 try:
-                    val_operand = float(val)
+                    out = row.func(*inputs, *trial)
                 except Exception:
-                    continue
+                    out = None
+                results.append(out if isinstance(out, (tuple, list)) else (out,))
+            n_out = max((len(r) for r in results if r[0] is not None), default=0)
+            if n_out == 0:
+                return None
+            valid = np.array([r[0] is not None and len(r) == n_out for r in results])
+            matrices = tuple(
+                np.vstack([np.asarray(r[k], dtype=float) if ok else np.full(n_rows, np.nan)
+                           for r, ok in zip(results, valid)])
+                for k in range(n_out))
+        return _SweepEntry(param_key=key, index=index, outputs=tuple(matrices), valid=valid,
+                           multi_output=len(matrices) > 1)
+
+    def stream(self, param_map: dict) -> "IndicatorStream":
+        """Incremental evaluator producing this plan's indicators one bar at a time."""
+        return IndicatorStream(self, param_map)
+
+    def _operand(self, step: _BoundStep, table: _SlotTable, param_map: dict):
+        """Resolve `Value / Param`: parameter lookup first, then a column name, then a number."""
+        if step.param_key in param_map:
+            val = param_map[step.param_key]
+            slot = self.slot_of.get(str(val))
+            if slot is not None:
+                values = table.get(slot)
+                if values is not None:
+                    return values
             try:
-                if op == "+":
-                    df[name] = df[str(ind_a)] + val_operand
-                elif op == "-":
-                    df[name] = df[str(ind_a)] - val_operand
-                elif op == "*":
-                    df[name] = df[str(ind_a)] * val_operand
-                elif op == "/":
-                    df[name] = df[str(ind_a)] / val_operand
-                elif op == "**":
-                    df[name] = df[str(ind_a)] ** val_operand
-            except Exception:
+                return float(val)
+            except (TypeError, ValueError):
+                return None
+        if step.fallback_slot >= 0:
+            return table.get(step.fallback_slot)
+        return step.fallback_value
+
+    def _evaluate_chain(self, chain: _BoundChain, table: _SlotTable, param_map: dict):
+        # Steps whose input or operand does not resolve are skipped, as if absent from the chain
+        terms = []
+        for step in chain.steps:
+            left = table.get(step.left)
+            if left is None:
                 continue
-    if talib is not None and talib_df is not None:
-        for idx, row in talib_df.iterrows():
-            name = row.get("TA-Lib Name")
-            func = row.get("TA-Lib Function")
-            in_col = row.get("In order Indicators")
-            param_str = row.get("In order Param")
-            if not (name and func):
+            operand = self._operand(step, table, param_map)
+            if operand is None:
                 continue
-            input_cols = [c.strip() for c in str(in_col).split(",") if c.strip()] if in_col else []
-            input_series = []
-            if input_cols and all(c in df.columns for c in input_cols):
-                input_series = [df[c] for c in input_cols]
-            else:
-                continue
-            param_keys = [p.strip() for p in str(param_str).split(",") if p.strip()] if param_str else []
-            param_vals = [param_map.get(k, k) for k in param_keys]
-            for i, v in enumerate(param_vals):
-                try:
-                    param_vals[i] = float(v)
-                except Exception:
-                    continue
+            terms.append((step.operator, left, operand, step.combination))
+        return evaluate_chain(terms, ARITHMETIC_OPS)
+
+    def _evaluate_talib(self, row: _BoundTalib, table: _SlotTable, param_map: dict, n_rows: int,
+                        precomputed=None) -> None:
+        if precomputed is not None:
+            out = precomputed
+        else:
+            inputs = []
+            for slot in row.inputs:
+                values = table.get(slot)
+                if values is None:
+                    return
+                inputs.append(values)
+            param_vals = [
+                _coerce_param(param_map[k]) if k in param_map else default
+                for k, default in zip(row.param_keys, row.param_defaults)
+            ]
             try:
-                talib_func = getattr(talib, func)
+                out = row.func(*inputs, *param_vals)
             except Exception:
-                continue
+                return
+        if isinstance(out, (tuple, list)) and len(row.output_slots) == len(out):
+            assigned = False
+            for slot, o in zip(row.output_slots, out):
+                if hasattr(o, "__len__") and len(o) == n_rows:
+                    table.set(slot, o)
+                    assigned = True
+            if assigned:
+                return
+        if hasattr(out, "__len__") and not isinstance(out, (tuple, list, str)) and len(out) == n_rows:
+            table.set(row.name_slot, out)
+
+
+class _BarTable:
+    """One bar laid out like _SlotTable: base columns as 1-element float arrays."""
+    __slots__ = ("arrays", "written")
+
+    def __init__(self, base: list, n_slots: int):
+        self.arrays = base + [None] * (n_slots - len(base))
+        self.written: Dict[int, None] = {}
+
+    def get(self, slot: int) -> Optional[np.ndarray]:
+        return self.arrays[slot]
+
+    def set(self, slot: int, values) -> None:
+        self.arrays[slot] = np.asarray(values, dtype=float).reshape(1)
+        self.written[slot] = None
+
+
+def _bar_value(value) -> Optional[np.ndarray]:
+    if value is None:
+        return np.array([np.nan])
+    try:
+        return np.array([float(value)])
+    except (TypeError, ValueError):
+        return None
+
+
+class _StreamRow:
+    """A TA-Lib row of a stream: an incremental kernel, or its history for recomputation."""
+    __slots__ = ("row", "params", "kernel", "history")
+
+    def __init__(self, row: _BoundTalib, params: list):
+        self.row = row
+        self.params = params
+        self.kernel = talib_stream.make_kernel(row.function, params)
+        self.history = None if self.kernel is not None else [[] for _ in row.inputs]
+
+    def update(self, inputs: list):
+        if self.kernel is not None:
+            return self.kernel.update(*(float(values[0]) for values in inputs))
+        # No incremental kernel: rerun the function on the history and keep the last bar
+        for history, values in zip(self.history, inputs):
+            history.append(float(values[0]))
+        out = self.row.func(*(np.asarray(h) for h in self.history), *self.params)
+        if isinstance(out, (tuple, list)):
+            return tuple(o[-1] if hasattr(o, "__len__") and len(o) else o for o in out)
+        return out[-1] if hasattr(out, "__len__") and len(out) else out
+
+
+class IndicatorStream:
+    """
+    Bar-by-bar evaluation of a bound plan for one parameter set.
+
+    Arithmetic chains run on the current bar; TA-Lib rows use the O(1) kernels of
+    talib_stream where one exists and otherwise recompute the function over the bars seen
+    so far. Replaying a history through `update` reproduces `evaluate` on that history
+    (to floating-point tolerance, see talib_stream).
+    """
+
+    def __init__(self, bound: BoundIndicatorPlan, param_map: dict):
+        self.bound = bound
+        self.param_map = dict(param_map)
+        self.rows = []
+        recomputed = []
+        for row in bound.talib_rows:
+            params = [_coerce_param(self.param_map[k]) if k in self.param_map else default
+                      for k, default in zip(row.param_keys, row.param_defaults)]
             try:
-                if len(input_series) == 1:
-                    out = talib_func(input_series[0], *param_vals)
-                else:
-                    out = talib_func(*input_series, *param_vals)
-                out_names = [n.strip() for n in name.split(",")]
-                assigned = False
-                if isinstance(out, (tuple, list)) and len(out_names) == len(out):
-                    for n, o in zip(out_names, out):
-                        if hasattr(o, '__len__') and not isinstance(o, str) and len(o) == len(df):
-                            df[n] = o
-                            assigned = True
-                if not assigned:
-                    if hasattr(out, '__len__') and not isinstance(out, str) and len(out) == len(df):
-                        df[name] = out
+                # Rows whose parameters TA-Lib rejects are skipped, as in `evaluate`
+                with np.errstate(all="ignore"):
+                    row.func(*(np.ones(1) for _ in row.inputs), *params)
             except Exception:
+                self.rows.append(None)
                 continue
+            stream_row = _StreamRow(row, params)
+            if stream_row.kernel is None:
+                recomputed.append(row.function)
+            self.rows.append(stream_row)
+        if recomputed:
+            print(f"[INFO] No incremental kernel for {sorted(set(recomputed))}; "
+                  "those rows are recomputed over the full history on every bar.")
+
+    def update(self, bar: dict) -> dict:
+        """Return a copy of `bar` (column -> value) with every indicator added for this bar."""
+        bound = self.bound
+        table = _BarTable([_bar_value(bar.get(col)) for col in bound.columns], len(bound.names))
+        with np.errstate(all="ignore"):
+            for chain in bound.chains:
+                result = bound._evaluate_chain(chain, table, self.param_map)
+                if result is not None:
+                    table.set(chain.slot, result)
+            for stream_row in self.rows:
+                if stream_row is not None:
+                    self._update_row(stream_row, table)
+        out = dict(bar)
+        for slot in table.written:
+            out[bound.names[slot]] = float(table.arrays[slot][0])
+        return out
+
+    @staticmethod
+    def _update_row(stream_row: _StreamRow, table: _BarTable) -> None:
+        row = stream_row.row
+        inputs = []
+        for slot in row.inputs:
+            values = table.get(slot)
+            if values is None:
+                return
+            inputs.append(values)
+        out = stream_row.update(inputs)
+        # Same output assignment as BoundIndicatorPlan._evaluate_talib
+        if isinstance(out, (tuple, list)):
+            if len(row.output_slots) == len(out):
+                for slot, value in zip(row.output_slots, out):
+                    table.set(slot, value)
+            return
+        table.set(row.name_slot, out)
+
+
+@dataclass(frozen=True)
+class IndicatorPlan:
+    """
+    Parsed Indicator Builder and TA-Lib builder tables.
+
+    Compile once per run with `compile_indicator_plan` and call `evaluate` for every
+    parameter set. The plan is bound to a column layout on first use and the binding is
+    cached, so trials sharing a layout never re-parse or re-resolve anything. With
+    `threads` > 1, independent rows of frames with PARALLEL_MIN_ROWS bars or more run on
+    a thread pool by dependency level.
+    """
+    arithmetic: Tuple[ArithmeticIndicator, ...] = ()
+    talib: Tuple[TalibIndicator, ...] = ()
+    backend: str = "auto"
+    # Execution setting only: left out of repr and equality, so trial-store and checkpoint keys ignore it
+    threads: int = field(default=1, compare=False, repr=False)
+    _bound: Dict[Tuple[str, ...], BoundIndicatorPlan] = field(
+        default_factory=dict, init=False, repr=False, compare=False, hash=False)
+
+    def __getstate__(self):
+        # Bindings hold callables; workers rebuild them on first use
+        return {"arithmetic": self.arithmetic, "talib": self.talib, "backend": self.backend,
+                "threads": self.threads, "_bound": {}}
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+    def bind(self, columns) -> BoundIndicatorPlan:
+        """Resolve the plan against a column layout (cached per layout)."""
+        columns = tuple(columns)
+        bound = self._bound.get(columns)
+        if bound is None:
+            bound = BoundIndicatorPlan(self, columns)
+            self._bound[columns] = bound
+        return bound
+
+    def evaluate(self, df: pd.DataFrame, param_map: dict,
+                 sweeps: Optional[IndicatorSweep] = None) -> pd.DataFrame:
+        """Return a copy of df with every indicator of the plan added (or overwritten)."""
+        return self.bind(df.columns).evaluate(df, param_map, sweeps)
+
+    def sweep(self, df: pd.DataFrame, param_map: dict, grid: Dict[str, list]) -> IndicatorSweep:
+        """Precompute sweepable TA-Lib rows on df for every grid value (see BoundIndicatorPlan.sweep)."""
+        return self.bind(df.columns).sweep(df, param_map, grid)
+
+    def stream(self, columns, param_map: dict) -> IndicatorStream:
+        """Incremental evaluator for bars with the given columns (see IndicatorStream)."""
+        return self.bind(columns).stream(param_map)
+
+    def timeframe_references(self) -> Tuple[str, ...]:
+        """Builder inputs written as `Column@Timeframe` (see timeframes.add_timeframe_columns)."""
+        names = []
+        for indicator in self.arithmetic:
+            for step in indicator.steps:
+                names += [step.indicator_a, str(step.operand)]
+        for row in self.talib:
+            names += list(row.inputs)
+        return tuple(dict.fromkeys(n for n in names if parse_reference(n) is not None))
+
+
+def _attach_outputs(df: pd.DataFrame, outputs: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Copy df once, overwrite existing indicator columns and append new ones in build order."""
+    df = df.copy()
+    fresh = {}
+    for name, values in outputs.items():
+        if name in df.columns:
+            df[name] = values
+        else:
+            fresh[name] = values
+    if fresh:
+        df = pd.concat([df, pd.DataFrame(fresh, index=df.index)], axis=1)
     return df
+
+
+def compile_indicator_plan(builder_df: Optional[pd.DataFrame] = None,
+                           talib_df: Optional[pd.DataFrame] = None,
+                           backend: str = "auto", threads: int = 1) -> IndicatorPlan:
+    """
+    Parse the Indicator Builder and TA-Lib builder tables into an IndicatorPlan.
+
+    Rows with missing fields or unknown operators are dropped here, so evaluation only
+    has to resolve columns and parameter values. `backend` selects the TA-Lib
+    implementation (see TA_BACKENDS); `threads` is the number of worker threads for
+    independent rows (0 for one per CPU).
+    """
+    if backend not in TA_BACKENDS:
+        raise ValueError(f"Unknown TA backend '{backend}', expected one of {TA_BACKENDS}")
+    arithmetic = []
+    if builder_df is not None and "Combination" in builder_df.columns:
+        for name, group in builder_df.groupby("Indicator Name", sort=False):
+            steps = []
+            for _, row in group.iterrows():
+                step = _parse_step(row, str(row.get("Combination", "END")).strip().upper())
+                if step is not None:
+                    steps.append(step)
+            if steps:
+                arithmetic.append(ArithmeticIndicator(name=name, steps=tuple(steps)))
+    elif builder_df is not None:
+        # Legacy sheets without Combination: every row assigns its own result
+        for _, row in builder_df.iterrows():
+            name = row.get("Indicator Name")
+            step = _parse_step(row, "END")
+            if name and step is not None:
+                arithmetic.append(ArithmeticIndicator(name=name, steps=(step,)))
+
+    talib_rows = []
+    if talib_df is not None:
+        for _, row in talib_df.iterrows():
+            name = row.get("TA-Lib Name")
+            func = row.get("TA-Lib Function")
+            if _is_blank(name) or _is_blank(func):
+                continue
+            talib_rows.append(TalibIndicator(
+                name=str(name),
+                function=str(func).strip(),
+                inputs=_split_cell(row.get("In order Indicators")),
+                params=_split_cell(row.get("In order Param")),
+            ))
+    threads = int(threads) or os.cpu_count() or 1
+    return IndicatorPlan(arithmetic=tuple(arithmetic), talib=tuple(talib_rows), backend=backend, threads=threads)
+
+
+def _parse_step(row: pd.Series, combination: str) -> Optional[ArithmeticStep]:
+    ind_a = row.get("Indicator A")
+    op = row.get("Operator")
+    val_or_param = row.get("Value / Param")
+    if not (ind_a and op and val_or_param):
+        return None
+    if op not in ARITHMETIC_OPS:
+        return None
+    return ArithmeticStep(indicator_a=str(ind_a), operator=op, operand=val_or_param, combination=combination)
+
+
+def build_indicators(df, param_map, builder_df=None, talib_df=None, plan=None, sweeps=None):
+    """
+    Build arithmetic and TA-Lib indicators on a copy of df for one parameter set.
+
+    Pass a plan from `compile_indicator_plan` to skip parsing the builder tables; the
+    optimizer compiles one per run and reuses it for every trial. `sweeps` from
+    `plan.sweep(df, ...)` lets swept TA-Lib rows index precomputed results.
+    """
+    if plan is None:
+        plan = compile_indicator_plan(builder_df, talib_df)
+    return plan.evaluate(df, param_map, sweeps)
@@ -14,6 +14,19 @@ Key Features:
 
 Usage:
     python main.py                    # Run basic backtest
+    python main.py --optimize --checkpoint-dir runs/demo           # Optimize with per-window checkpoints
+    python main.py --optimize --checkpoint-dir runs/demo --resume  # Resume an interrupted optimization
+    python main.py --portfolio data/AAPL.csv data/MSFT.xlsx          # Backtest the strategy on several symbols
+    python main.py --export-indicators                               # Also write built indicators to the Dashboard
+    python main.py --grid                                            # Score the full parameter grid per window
+    python main.py --optimize --sweep-indicators                     # Precompute swept TA-Lib rows per window
+    python main.py --optimize --warm-start top_k --early-stop-patience 30  # Seed from the last window, stop early
+    python main.py --optimize --prune --prune-audit                  # Successive halving, checked on full windows
+    python main.py --optimize --trial-store                          # Reuse trial scores from earlier runs
+    python main.py --optimize --multi-objective                      # Also write each window's Pareto front
+    python main.py --optimize --pt-model my_models:PtModel --pt-refit  # Refit the Pt model on every train window
+    python main.py --robustness-samples 5000 --seed 1                # Add a Monte Carlo check of the trades
+    python main.py --interactive-chart                               # Also write an interactive HTML chart
     main(optimize=True)              # Run parameter optimization
     main(optimize=False)             # Run single backtest
 
@@ -21,13 +34,24 @@ Author: Excel Trading Optimizer Project
 License: MIT
 """
 
-from excel_io import read_dashboard_inputs, write_results
+from excel_io import (export_indicators_to_dashboard, read_dashboard_inputs, read_market_data,
+                      write_data_table, write_results)
 from performance_metrics import calculate_performance_metrics
 from generate_visuals import plot_visualization
-from strategy import parse_strategy_logic, strategy_from_logic
+from strategy import compile_strategy_logic, strategy_from_logic
 from openpyxl import load_workbook
 from openpyxl.drawing.image import Image as ExcelImage
-from optimizer import optimize_strategy
+from optimizer import WARM_START_MODES, optimize_strategy
+from output_writer import BackgroundWriter
+from portfolio import backtest_portfolio
+from robustness import ROBUSTNESS_METHODS, robustness_report
+from trade_log import TradeLog
+from diagnostics import DIAGNOSTICS
+from grid_search import grid_sweep, plot_stability_heatmaps
+from predictions import apply_pt_model
+from validation import preflight
+import argparse
+import os
 import pandas as pd
 
 
@@ -45,107 +69,279 @@ def insert_plot_into_excel(excel_path: str, image_path: str, sheet_name: str = "
     wb.save(excel_path)
 
 
-def main(optimize: bool = False):
-    """Main entry point for running backtest or optimization workflow."""
-    excel_path = "excel/trading_template.xlsx"
+def render_plot_into_excel(excel_path: str, df: pd.DataFrame, trades: pd.DataFrame, sheet_name: str = "Visualization",
+                           html: bool = False):
+    """Render the PNG visualization and insert it into the workbook (one background-writer task)."""
+    png_path = plot_visualization(df, trades, output_folder="images", html=html)
+    insert_plot_into_excel(excel_path, png_path, sheet_name=sheet_name)
+
+
+def submit_robustness(excel_path: str, config: dict, trades, writer):
+    """Percentile summary of resampled trades to the Robustness sheet, if robustness_samples is set."""
+    n_samples = int(config.get("robustness_samples") or 0)
+    if n_samples <= 0:
+        return None
+    summary = robustness_report(trades, n_samples, method=config.get("robustness_method", "bootstrap"),
+                                chunk_size=config.get("robustness_chunk_size"), seed=config.get("seed"))
+    writer.submit(write_data_table, excel_path, summary, sheet_name="Robustness")
+    return summary
+
+
+def run_portfolio(excel_path: str, config: dict, paths, writer):
+    """Backtest the Dashboard strategy on every market data file in paths (one symbol per file)."""
+    data = {}
+    for path in paths:
+        symbol = os.path.splitext(os.path.basename(path))[0]
+        if symbol in data:
+            raise ValueError(f"Duplicate symbol '{symbol}' in portfolio files")
+        data[symbol] = read_market_data(path)
+    print(f"[INFO] Portfolio backtest on {len(data)} symbols: {list(data)}")
+    result = backtest_portfolio(data, compile_strategy_logic(config["logic_table"]),
+                                config["indicator_plan"], config["param_map"])
+    writer.submit(write_results, excel_path, result.trade_log(), result.portfolio_metrics())
+    writer.submit(write_data_table, excel_path, result.metrics, sheet_name="Portfolio")
+    writer.submit(write_data_table, excel_path, result.equity, sheet_name="Portfolio Equity")
+    return result
+
+
+def render_grid_heatmaps(excel_path: str, result, sheet_name: str = "Grid Stability"):
+    """Render the grid sweep's stability heatmaps and insert them into the workbook."""
+    os.makedirs("images", exist_ok=True)
+    png_path = plot_stability_heatmaps(result, os.path.join("images", "grid_stability.png"))
+    insert_plot_into_excel(excel_path, png_path, sheet_name=sheet_name)
+
+
+def run_grid(excel_path: str, config: dict, writer):
+    """Exhaustive grid sweep over the optimized parameters on every walk-forward window."""
+    result = grid_sweep(config)
+    writer.submit(write_data_table, excel_path, result.to_frame(), sheet_name="Grid Sweep")
+    writer.submit(write_data_table, excel_path, result.selection, sheet_name="Grid Selection")
+    if result.windows:
+        writer.submit(render_grid_heatmaps, excel_path, result)
+    return result
+
+
+def main(optimize: bool = False, checkpoint_dir: str = None, resume: bool = False, portfolio=None,
+         export_indicators: bool = False, grid: bool = False, pt_model: str = None,
+         indicator_threads: int = 1, robustness_samples: int = 0, robustness_method: str = "bootstrap",
+         seed: int = None, interactive_chart: bool = False, sweep_indicators: bool = False,
+         warm_start: str = "none", warm_start_k: int = 5, min_evals: int = 0, early_stop_patience: int = None,
+         prune: bool = False, prune_audit: bool = False, trial_store=None,
+         multi_objective: bool = False, pt_refit: bool = False,
+         excel_path: str = "excel/trading_template.xlsx"):
+    """
+    Main entry point for running backtest or optimization workflow.
+    With checkpoint_dir, optimization checkpoints every window there; resume continues that run.
+    With portfolio (a list of market data files), backtest the strategy on every symbol instead.
+    With export_indicators, the indicator columns built from the config are written to the Dashboard.
+    With grid, every parameter set of the optimized ranges is scored on every window instead of TPE.
+    With pt_model ("module:attribute"), the Pt column is predicted by that model instead of read from the sheet;
+    with pt_refit, optimization refits it on every train window.
+    With indicator_threads > 1 (0: one per CPU), independent indicator rows are built in parallel.
+    With robustness_samples > 0, the trades are resampled that many times (robustness_method) and
+    summarized on the Robustness sheet; seed fixes that resampling and the optimizer's search.
+    With interactive_chart, images/trading_visualization.html is written next to the PNG (needs plotly).
+    With sweep_indicators, optimization precomputes TA-Lib rows for the whole parameter grid per window.
+    With warm_start ("top_k", "neighbours"), each window's search starts from the previous window's best
+    warm_start_k trials or best neighbours; with early_stop_patience, a window stops once that many trials
+    after min_evals bring no better score.
+    With prune, trials are scored on train prefixes and only the promising ones finish (successive halving);
+    prune_audit re-scores the pruned ones on the full window and reports whether the best still matches.
+    With trial_store (True for data/trial_store.sqlite, or a path), scored trials are kept for later runs.
+    With multi_objective, each window's Pareto front of full metric vectors goes to the Pareto Front sheet.
+    """
     # symbol = "ES=F"
 
     # Update market data and build indicators
     # update_excel_with_market_data(excel_path, symbol, download_data=False)
 
     # Read config and logic after market_data is updated
-    config = read_dashboard_inputs(excel_path)
+    config = read_dashboard_inputs(excel_path, indicator_threads=indicator_threads)
     config["excel_path"] = excel_path
+    config["checkpoint_dir"] = checkpoint_dir
+    config["resume"] = resume
+    config["robustness_samples"] = robustness_samples
+    config["robustness_method"] = robustness_method
+    if seed is not None:
+        config["seed"] = seed
+    config["interactive_chart"] = interactive_chart
+    config["sweep_indicators"] = sweep_indicators
+    config["warm_start"] = warm_start
+    config["warm_start_k"] = warm_start_k
+    config["min_evals"] = min_evals
+    config["early_stop_patience"] = early_stop_patience
+    config["prune"] = prune
+    config["prune_audit"] = prune_audit
+    config["trial_store"] = trial_store
+    config["multi_objective"] = multi_objective
+    if pt_refit and not pt_model:
+        raise ValueError("pt_refit requires pt_model")
+    if pt_model:
+        config["pt_model"] = pt_model
+        config["pt_refit"] = pt_refit
+        apply_pt_model(config)
+    # Fail fast with one report instead of per-bar errors deep inside the run
+    preflight(config, optimize=(optimize or grid) and not portfolio)
+    DIAGNOSTICS.reset()
 
-    df = config["market_data"]
-    print("[DEBUG] Columns in market_data after config:", df.columns.tolist())
-    if optimize:
-        print("Running optimization mode...")
-        results_df, test_trades_list, best_params_list, test_indicator_dfs = optimize_strategy(config)
-        all_trades = pd.concat(test_trades_list, ignore_index=True)
-        combined_metrics = calculate_performance_metrics(all_trades, config["market_data"])
-        write_results(excel_path, all_trades, combined_metrics)
-
-        # Find best parameter set by objective
-        best_metric = next(iter(config["objective_weights"].keys()))
-        # Robust handling for all-NA or missing best_metric
-        if best_metric not in results_df.columns:
-            print(f"[ERROR] Metric '{best_metric}' not found in results_df columns: {results_df.columns.tolist()}")
-            best_params = best_params_list[0] if best_params_list else {}
-        elif results_df[best_metric].isna().all():
-            print(f"[ERROR] All values for metric '{best_metric}' are NA. Cannot select best parameters.")
-            best_params = best_params_list[0] if best_params_list else {}
-        else:
-            if config["objective_type"] == "MAX":
-                best_idx_label = results_df[best_metric].idxmax()
-            else:
-                best_idx_label = results_df[best_metric].idxmin()
-            if pd.isna(best_idx_label):
-                print(f"[ERROR] idxmax/idxmin returned NaN for metric '{best_metric}'. Using first parameter set as fallback.")
+    # Workbook writes and renders run on a background thread, in submission order, while the
+    # main thread keeps computing; leaving the block flushes everything
+    with BackgroundWriter() as writer:
+        config["writer"] = writer
+        df = config["market_data"]
+        print("[DEBUG] Columns in market_data after config:", df.columns.tolist())
+        if export_indicators:
+            writer.submit(export_indicators_to_dashboard, excel_path, df)
+        if portfolio:
+            run_portfolio(excel_path, config, portfolio, writer)
+        elif grid:
+            run_grid(excel_path, config, writer)
+        elif optimize:
+            print("Running optimization mode...")
+            results_df, test_trades_list, best_params_list, test_indicator_dfs = optimize_strategy(config)
+            # One concatenate per column; Equity/Returns are recomputed over the combined trades
+            all_trades = TradeLog.concat(test_trades_list).with_equity()
+            combined_metrics = calculate_performance_metrics(all_trades, config["market_data"])
+            writer.submit(write_results, excel_path, all_trades, combined_metrics)
+            submit_robustness(excel_path, config, all_trades, writer)
+
+            # Find best parameter set by objective
+            best_metric = next(iter(config["objective_weights"].keys()))
+            # Robust handling for all-NA or missing best_metric
+            if best_metric not in results_df.columns:
+                print(f"[ERROR] Metric '{best_metric}' not found in results_df columns: {results_df.columns.tolist()}")
+                best_params = best_params_list[0] if best_params_list else {}
+            elif results_df[best_metric].isna().all():
+                print(f"[ERROR] All values for metric '{best_metric}' are NA. Cannot select best parameters.")
                 best_params = best_params_list[0] if best_params_list else {}
             else:
-                best_idx = results_df.index.get_loc(best_idx_label)
-                best_params = best_params_list[best_idx]
-        config.update(best_params)
-
-        # --- Completely rewrite Data sheet: only test set rows, include all indicators and params ---
-        param_cols = list(best_params_list[0].keys())
-        test_rows = []
-        for i, test_df in enumerate(test_indicator_dfs):
-            if test_df is not None and not test_df.empty:
-                # Add *_used columns for this window
-                for k in param_cols:
-                    test_df[f"{k}_used"] = best_params_list[i][k]
-                test_rows.append(test_df)
-        if test_rows:
-            df_data = pd.concat(test_rows, ignore_index=True)
-        else:
-            df_data = pd.DataFrame()
-
-        # Ensure all base columns are present by merging with original market data
-        base_cols = ["Date", "Open", "High", "Low", "Close", "Volume", "Pt"]
-        market_base = config["market_data"][base_cols].copy() if all(col in config["market_data"].columns for col in base_cols) else config["market_data"].copy()
-        # Merge on Date, giving priority to test set values
-        if not df_data.empty:
-            df_data = pd.merge(df_data, market_base, on="Date", how="left", suffixes=("", "_mkt"))
-            # For each base col, if missing in df_data, fill from market_base
-            for col in base_cols:
-                if col not in df_data.columns:
-                    df_data[col] = df_data[f"{col}_mkt"]
-            # Remove any *_mkt columns
-            df_data = df_data[[c for c in df_data.columns if not c.endswith("_mkt")]]
+                if config["objective_type"] == "MAX":
+                    best_idx_label = results_df[best_metric].idxmax()
+                else:
+                    best_idx_label = results_df[best_metric].idxmin()
+                if pd.isna(best_idx_label):
+                    print(f"[ERROR] idxmax/idxmin returned NaN for metric '{best_metric}'. Using first parameter set as fallback.")
+                    best_params = best_params_list[0] if best_params_list else {}
+                else:
+                    best_idx = results_df.index.get_loc(best_idx_label)
+                    best_params = best_params_list[best_idx]
+            config.update(best_params)
+
+            # --- Completely rewrite Data sheet: only test set rows, include all indicators and params ---
+            param_cols = list(best_params_list[0].keys())
+            test_rows = []
+            for i, test_df in enumerate(test_indicator_dfs):
+                if test_df is not None and not test_df.empty:
+                    # Add *_used columns for this window
+                    # assign() leaves the window frame untouched for the pending checkpoint write
+                    test_df = test_df.assign(**{f"{k}_used": best_params_list[i][k] for k in param_cols})
+                    test_rows.append(test_df)
+            if test_rows:
+                df_data = pd.concat(test_rows, ignore_index=True)
+            else:
+                df_data = pd.DataFrame()
+
+            # Ensure all base columns are present by merging with original market data
+            base_cols = ["Date", "Open", "High", "Low", "Close", "Volume", "Pt"]
+            market_base = config["market_data"][base_cols].copy() if all(col in config["market_data"].columns for col in base_cols) else config["market_data"].copy()
+            # Merge on Date, giving priority to test set values
+            if not df_data.empty:
+                df_data = pd.merge(df_data, market_base, on="Date", how="left", suffixes=("", "_mkt"))
+                # For each base col, if missing in df_data, fill from market_base
+                for col in base_cols:
+                    if col not in df_data.columns:
+                        df_data[col] = df_data[f"{col}_mkt"]
+                # Remove any *_mkt columns
+                df_data = df_data[[c for c in df_data.columns if not c.endswith("_mkt")]]
+            else:
+                df_data = market_base.iloc[0:0].copy()
+
+            # Reorder columns: Date, Open, High, Low, Close, Volume, Pt, indicators, *_used
+            base_cols_present = [col for col in base_cols if col in df_data.columns]
+            indicator_cols = [col for col in df_data.columns if col not in base_cols_present and not col.endswith("_used")]
+            used_cols = [col for col in df_data.columns if col.endswith("_used")]
+            ordered_cols = base_cols_present + indicator_cols + used_cols
+            df_data = df_data[ordered_cols]
+
+            # Visualization (use the test set rows)
+            writer.submit(render_plot_into_excel, excel_path, df_data, all_trades,
+                          html=config["interactive_chart"])
+
+            # Write only the test set rows to the Data sheet
+            writer.submit(write_data_table, excel_path, df_data, sheet_name="Data")
         else:
-            df_data = market_base.iloc[0:0].copy()
-
-        # Reorder columns: Date, Open, High, Low, Close, Volume, Pt, indicators, *_used
-        base_cols_present = [col for col in base_cols if col in df_data.columns]
-        indicator_cols = [col for col in df_data.columns if col not in base_cols_present and not col.endswith("_used")]
-        used_cols = [col for col in df_data.columns if col.endswith("_used")]
-        ordered_cols = base_cols_present + indicator_cols + used_cols
-        df_data = df_data[ordered_cols]
-
-        # Visualization (use the test set rows)
-        png_path = plot_visualization(df_data, all_trades, output_folder="images")
-        insert_plot_into_excel(excel_path, png_path, sheet_name="Visualization")
-
-        from excel_io import write_data_table
-        # Write only the test set rows to the Data sheet
-        write_data_table(excel_path, df_data, sheet_name="Data")
-    else:
-        # Run normal backtest
-        logic_df = config["logic_table"]
-        rule_dict = parse_strategy_logic(logic_df)
-        result_df = strategy_from_logic(df, rule_dict)
-        metrics = calculate_performance_metrics(result_df, df)
-        write_results(excel_path, result_df, metrics)
-        png_path = plot_visualization(df, result_df, output_folder="images")
-        insert_plot_into_excel(excel_path, png_path, sheet_name="Visualization")
-
-    # # Optional: open interactive HTML
+            # Run normal backtest
+            logic_df = config["logic_table"]
+            compiled_rules = compile_strategy_logic(logic_df)
+            result_df = strategy_from_logic(df, compiled_rules).with_equity()
+            metrics = calculate_performance_metrics(result_df, df)
+            writer.submit(write_results, excel_path, result_df, metrics)
+            submit_robustness(excel_path, config, result_df, writer)
+            writer.submit(render_plot_into_excel, excel_path, df, result_df, html=config["interactive_chart"])
+
+    DIAGNOSTICS.report()
+
+    # # Optional: open interactive HTML (written to images/ with interactive_chart / --interactive-chart)
     # if Path(html_path).exists():
     #     webbrowser.open(f"file://{Path(html_path).resolve()}")
 
 
 if __name__ == "__main__":
-    # Set optimize=True to run optimization, False for normal backtest
-    main(optimize=False)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Excel trading backtest or optimization.")
+    parser.add_argument("--optimize", action="store_true", help="run rolling-window optimization")
+    parser.add_argument("--checkpoint-dir", help="directory for per-window optimization checkpoints")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip windows already checkpointed in --checkpoint-dir and continue the run")
+    parser.add_argument("--portfolio", nargs="+", metavar="FILE",
+                        help="backtest on several symbols: one CSV or workbook of market data per symbol")
+    parser.add_argument("--export-indicators", action="store_true",
+                        help="write the indicator columns built from the config to the Dashboard sheet")
+    parser.add_argument("--grid", action="store_true",
+                        help="score the full grid of optimized parameters on every window (sheets Grid Sweep/Selection)")
+    parser.add_argument("--pt-model", metavar="MODULE:ATTR",
+                        help="predict the Pt column with a batch model (see predictions.py)")
+    parser.add_argument("--pt-refit", action="store_true",
+                        help="with --pt-model, refit the model on every train window during optimization")
+    parser.add_argument("--sweep-indicators", action="store_true",
+                        help="precompute TA-Lib rows for the whole parameter grid once per window")
+    parser.add_argument("--warm-start", choices=WARM_START_MODES, default="none",
+                        help="seed each window's search from the previous window's best trials or neighbours")
+    parser.add_argument("--warm-start-k", type=int, default=5, metavar="K",
+                        help="number of previous best trials re-scored with --warm-start top_k")
+    parser.add_argument("--min-evals", type=int, default=0, metavar="N",
+                        help="trials every window runs before --early-stop-patience can stop it")
+    parser.add_argument("--early-stop-patience", type=int, metavar="N",
+                        help="stop a window once N consecutive trials bring no better score")
+    parser.add_argument("--prune", action="store_true",
+                        help="score trials on train prefixes and only finish the promising ones")
+    parser.add_argument("--prune-audit", action="store_true",
+                        help="with --prune, re-score pruned trials on the full window and report mismatches")
+    parser.add_argument("--trial-store", nargs="?", const=True, metavar="PATH",
+                        help="store scored trials and reuse them in later runs (default path data/trial_store.sqlite)")
+    parser.add_argument("--multi-objective", action="store_true",
+                        help="write each window's Pareto front of trial metrics to the Pareto Front sheet")
+    parser.add_argument("--indicator-threads", type=int, default=1, metavar="N",
+                        help="build independent indicator rows on N threads (0: one per CPU)")
+    parser.add_argument("--robustness-samples", type=int, default=0, metavar="N",
+                        help="resample the trades N times and write percentiles to the Robustness sheet")
+    parser.add_argument("--robustness-method", choices=ROBUSTNESS_METHODS, default="bootstrap",
+                        help="resample trades with replacement (bootstrap) or reorder them (shuffle)")
+    parser.add_argument("--interactive-chart", action="store_true",
+                        help="also write images/trading_visualization.html (WebGL chart, needs plotly)")
+    parser.add_argument("--seed", type=int, help="random seed for the optimizer search and the robustness resampling")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume requires --checkpoint-dir")
+    if args.pt_refit and not args.pt_model:
+        parser.error("--pt-refit requires --pt-model")
+    if args.prune_audit and not args.prune:
+        parser.error("--prune-audit requires --prune")
+    main(optimize=args.optimize or args.resume, checkpoint_dir=args.checkpoint_dir, resume=args.resume,
+         portfolio=args.portfolio, export_indicators=args.export_indicators, grid=args.grid,
+         pt_model=args.pt_model, indicator_threads=args.indicator_threads,
+         robustness_samples=args.robustness_samples, robustness_method=args.robustness_method, seed=args.seed,
+         interactive_chart=args.interactive_chart, sweep_indicators=args.sweep_indicators,
+         warm_start=args.warm_start, warm_start_k=args.warm_start_k, min_evals=args.min_evals,
+         early_stop_patience=args.early_stop_patience, prune=args.prune, prune_audit=args.prune_audit,
+         trial_store=args.trial_store, multi_objective=args.multi_objective,
+         pt_refit=args.pt_refit)
\ No newline at end of file
@@ -1,10 +1,18 @@
 import pandas as pd
 import numpy as np
 from hyperopt import fmin, tpe, hp, Trials, STATUS_OK
-from strategy import parse_strategy_logic, strategy_from_logic
-from performance_metrics import calculate_performance_metrics
-from excel_io import read_dashboard_inputs
+from hyperopt.fmin import generate_trials_to_calculate
+from strategy import compile_strategy_logic, strategy_from_logic
+from performance_metrics import calculate_performance_metrics, metric_key_map
+from excel_io import read_dashboard_inputs, write_data_table
 from openpyxl import load_workbook
+from trial_store import TrialStore, DEFAULT_DB_PATH, context_key, frame_digest
+from checkpoint import RunCheckpoint
+from output_writer import InlineWriter
+from validation import preflight
+from walk_forward import window_schedule
+from pareto import objective_vector, pareto_front
+from predictions import provider_key, walk_forward_predictions
 
 
 def write_optimization_results(excel_path, all_results):
@@ -30,7 +38,7 @@ def write_optimization_results(excel_path, all_results):
         pnl = metrics.get("PnL", None)
         if pnl is None or pnl == "":
             trades_df = result.get("TestTrades", None)
-            if trades_df is not None and "PnL" in trades_df.columns:
+            if trades_df is not None and not trades_df.empty and "PnL" in trades_df.columns:
                 pnl = trades_df["PnL"].sum()
             else:
                 eq_final = metrics.get("Equity Final [$]", None)
@@ -64,7 +72,7 @@ def write_optimization_results(excel_path, all_results):
             pnl = metrics.get("PnL", None)
             if pnl is None or pnl == "":
                 trades_df = result.get("TrainTrades", None)
-                if trades_df is not None and "PnL" in trades_df.columns:
+                if trades_df is not None and not trades_df.empty and "PnL" in trades_df.columns:
                     pnl = trades_df["PnL"].sum()
                 else:
                     eq_final = metrics.get("Equity Final [$]", None)
@@ -81,24 +89,131 @@ def write_optimization_results(excel_path, all_results):
     wb.save(excel_path)
 
 
-def metric_key_map():
-    """Map Excel/weight keys to actual metric keys in metrics dict."""
-    return {
-        'AccReturn': 'Return [%]',
-        'Sharpe': 'Sharpe Ratio',
-        'Max Drawdown': 'Max Drawdown [%]',
-        'Accuracy': 'Win Rate [%]',
-        'SqrtMSE': 'SqrtMSE',
-    }
+def window_front(window_idx, results, best):
+    """Pareto front of one window's fully evaluated trials; Selected marks the weighted-score best."""
+    rows = [{"Window": window_idx + 1, **r["params"], **r["metrics"]} for r in results if "metrics" in r]
+    if not rows:
+        return pd.DataFrame()
+    # TPE proposes the same grid point repeatedly; keep one row per parameter set
+    front = pareto_front(pd.DataFrame(rows).drop_duplicates(subset=["Window", *best]))
+    return front.assign(Selected=[all(row[k] == v for k, v in best.items()) for row in front.to_dict("records")])
+
+
+def param_grid(low, high, step, cast=float):
+    """Every value hp.quniform(low, high, step) can return, cast like the trial parameters."""
+    q = float(step)
+    values = q * np.arange(np.round(float(low) / q), np.round(float(high) / q) + 1)
+    return [cast(v) for v in values]
+
+
+WARM_START_MODES = ("none", "top_k", "neighbours")
+
+
+def warm_start_points(scored, mode, k, param_ranges):
+    """
+    Seed points for the next window's TPE search from the previous window's (loss, params) pairs.
+
+    "top_k" re-evaluates the k best distinct parameter sets on the new train slice;
+    "neighbours" evaluates the previous best and its +/- one step neighbours (at most k points).
+    """
+    if mode == "none" or not scored or k <= 0:
+        return []
+    ranked = sorted((s for s in scored if np.isfinite(s[0])), key=lambda s: s[0])
+    if not ranked:
+        return []
+    if mode == "top_k":
+        candidates = [params for _, params in ranked]
+    else:
+        best = ranked[0][1]
+        candidates = [best]
+        for p, value in best.items():
+            low, high, step = param_ranges[p]
+            for delta in (-step, step):
+                if low <= value + delta <= high:
+                    candidates.append({**best, p: value + delta})
+    points, seen = [], set()
+    for params in candidates:
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            points.append({p: float(v) for p, v in params.items()})
+        if len(points) >= k:
+            break
+    return points
+
+
+def convergence_stop(min_evals, patience):
+    """hyperopt early_stop_fn: stop once `patience` trials after min_evals bring no new best loss."""
+    def stop(trials, *args):
+        losses = np.array([np.nan if l is None else l for l in trials.losses()], dtype=float)
+        if len(losses) < max(min_evals, 1) or np.isnan(losses).all():
+            return False, []
+        since_best = len(losses) - 1 - int(np.nanargmin(losses))
+        return since_best >= patience, []
+    return stop
+
+
+class SuccessiveHalving:
+    """
+    Asynchronous successive halving for one window's TPE search.
+
+    A trial is first scored on growing prefixes of the train slice (`rungs`, as fractions of
+    its bars). At each rung it must rank within the best `keep` fraction of the prefix scores
+    seen so far at that rung, otherwise it is pruned before the full window is evaluated.
+    Pruned trials report the worst full-window loss seen so far, so TPE still learns to avoid them.
+    """
+
+    def __init__(self, rungs=(0.25, 0.5), keep=0.5, min_trials=5):
+        self.rungs = tuple(sorted(float(r) for r in rungs if 0 < float(r) < 1))
+        self.keep = float(keep)
+        self.min_trials = int(min_trials)
+        self.rung_losses = {r: [] for r in self.rungs}
+        self.pruned_at = {r: 0 for r in self.rungs}
+        self.full_losses = []
+
+    def should_prune(self, rung, loss):
+        history = self.rung_losses[rung]
+        history.append(loss)
+        if len(history) < self.min_trials or not np.isfinite(loss):
+            return False
+        if loss > np.nanquantile(history, self.keep):
+            self.pruned_at[rung] += 1
+            return True
+        return False
+
+    def pruned_loss(self, loss):
+        finite = [l for l in self.full_losses if np.isfinite(l)]
+        return max(finite) if finite else loss
+
+    def replay(self, results):
+        """Rebuild the rung histories from the results of trials restored from a checkpoint."""
+        for result in results:
+            rung_losses = result.get("rung_losses", [])
+            for rung, loss in zip(self.rungs, rung_losses):
+                self.rung_losses[rung].append(loss)
+            if result.get("pruned"):
+                self.pruned_at[self.rungs[len(rung_losses) - 1]] += 1
+            else:
+                self.full_losses.append(result["loss"])
+
+    def stats(self):
+        return {
+            "Trials": len(self.full_losses) + sum(self.pruned_at.values()),
+            "Full": len(self.full_losses),
+            "Pruned": dict(self.pruned_at),
+        }
 
 
 def optimize_strategy(config):
     """Run rolling window optimization and return metrics, trades, and best params for each window."""
     excel_path = config.get("excel_path", "excel/trading_template.xlsx")
-    df_all_orig = config["market_data"].copy()
+    # Only bars inside the Dashboard's backtest range are used
+    df_all_orig, windows = window_schedule(config)
+    df_all_orig = df_all_orig.copy()
     logic_df = config["logic_table"]
     param_ranges = config["param_ranges"]
-    optimize_params = config["opt_params"]
+    # Parameters without a Low/High/Step range keep their initial value (preflight warns about them)
+    optimize_params = [p for p in config["opt_params"] if p in param_ranges]
     objective_weights = config.get("objective_weights", {})
     objective_type = config.get("objective_type", "MAX")
     train_window = int(config.get("train_window", 20))
@@ -106,15 +221,55 @@ def optimize_strategy(config):
     max_evals = int(config.get("max_evals", 100))
     builder_df = config.get("indicator_builder")
     talib_df = config.get("talib_builder")
+    base_params = dict(config.get("param_map", {}))
+    # Precompute swept TA-Lib rows for the whole parameter grid once per window
+    sweep_indicators = bool(config.get("sweep_indicators", False))
+    if config.get("incremental_walk_forward"):
+        # Full-history builds would take indicator warm-up from bars before each window and change
+        # the results, so TPE trials always build their own window
+        print("[INFO] incremental_walk_forward only applies to the grid sweep (--grid); "
+              "indicators are rebuilt on every window.")
+    # Seed each window's TPE search from the previous window and stop it once it converges
+    warm_start = str(config.get("warm_start", "none")).lower()
+    warm_start_k = int(config.get("warm_start_k", 5))
+    min_evals = int(config.get("min_evals", 0))
+    early_stop_patience = config.get("early_stop_patience")
+    if warm_start not in WARM_START_MODES:
+        raise ValueError(f"Unknown warm_start {warm_start!r}; expected one of {WARM_START_MODES}")
+    early_stop_fn = None
+    if early_stop_patience is not None:
+        early_stop_fn = convergence_stop(min_evals, int(early_stop_patience))
+    # Successive halving: score trials on train prefixes and only finish the promising ones
+    prune = bool(config.get("prune", False))
+    prune_audit = bool(config.get("prune_audit", False))
+    # Persistent trial results: True for the default path, or a path to an SQLite file
+    store_path = config.get("trial_store")
+    # Keep every trial's full metric vector and report the Pareto front of each window
+    multi_objective = bool(config.get("multi_objective", False))
+    if multi_objective and store_path:
+        print("[INFO] The trial store keeps only weighted scores; it is not used in multi-objective mode.")
+        store_path = None
+    # Refit the Pt model (see predictions.apply_pt_model) on every train window
+    pt_provider = config.get("pt_provider") if config.get("pt_refit") else None
+    store = None
+    if store_path:
+        store = TrialStore(DEFAULT_DB_PATH if store_path is True else store_path,
+                           config.get("trial_store_size", 200_000))
     print(f"🔍 optimize_params: {optimize_params}")
     print(f"🧪 param_ranges: {param_ranges}")
     print(f"🎯 objective_weights: {objective_weights}")
-    if not param_ranges:
+    if not param_ranges or not optimize_params:
         print("❌ No valid parameter ranges found for optimization. Skipping optimization.")
-        return pd.DataFrame(), [], []
+        return pd.DataFrame(), [], [], []
+    # Callers that did not run preflight (main() does) get the same fail-fast check here
+    if "preflight_issues" not in config:
+        preflight(config, optimize=True)
+    # The logic table does not depend on parameters: parse and validate it once for the run
+    compiled_rules = compile_strategy_logic(logic_df)
 
-    # Use shared build_indicators function
-    from indicator_builder import build_indicators
+    # Use shared build_indicators function with one plan compiled for the whole run
+    from indicator_builder import build_indicators, compile_indicator_plan
+    indicator_plan = config.get("indicator_plan") or compile_indicator_plan(builder_df, talib_df)
 
     all_results = []
     best_params_list = []
@@ -131,48 +286,183 @@ def optimize_strategy(config):
             else:
                 param_types[p] = float
 
-    for window_idx, start_idx in enumerate(range(0, len(df_all_orig) - train_window - test_window + 1, test_window)):
+    grid = {
+        p: param_grid(*param_ranges[p], cast=param_types[p])
+        for p in optimize_params if p in param_ranges
+    }
+
+    def window_indicators(window_df, params, sweeps=None):
+        return build_indicators(window_df, params, plan=indicator_plan, sweeps=sweeps)
+
+    key_map = metric_key_map()
+
+    def evaluate_trial(df_local):
+        """Loss (the negated weighted score for MAX) and the full metrics of one trial."""
+        result_df = strategy_from_logic(df_local, compiled_rules)
+        metrics = calculate_performance_metrics(result_df, df_local)
+        score = 0
+        for metric, weight in objective_weights.items():
+            mapped_key = key_map.get(metric, metric)
+            val = metrics.get(mapped_key, 0)
+            score += weight * val
+        return (-score if objective_type == "MAX" else score), metrics
+
+    def score_trial(df_local):
+        return evaluate_trial(df_local)[0]
+
+    # Checkpoint every window (and every checkpoint_every trials) to resume an interrupted run
+    seed = config.get("seed")
+    # Window checkpoints and the final sheets go through the caller's background writer, if any
+    writer = config.get("writer") or InlineWriter()
+    checkpoint = None
+    checkpoint_every = max_evals
+    if config.get("checkpoint_dir"):
+        checkpoint_every = max(1, int(config.get("checkpoint_every", 10)))
+        fingerprint = context_key(
+            frame_digest(df_all_orig), compiled_rules, indicator_plan, sorted(objective_weights.items()),
+            objective_type, sorted(param_ranges.items()), optimize_params, sorted(base_params.items()),
+            train_window, test_window, config.get("train_period"), config.get("test_period"),
+            config.get("window_mode", "rolling"), max_evals, seed, checkpoint_every, warm_start, warm_start_k,
+            min_evals, early_stop_patience, multi_objective, prune, config.get("prune_rungs"), config.get("prune_keep"),
+            config.get("prune_min_trials"), provider_key(pt_provider) if pt_provider is not None else None)
+        checkpoint = RunCheckpoint(config["checkpoint_dir"], fingerprint, resume=bool(config.get("resume")))
+
+    def search(window_idx, objective, search_space, seeds, pruner):
+        """Run TPE for one window in chunks of checkpoint_every trials, resuming saved trials."""
+        trials = checkpoint.load_trials(window_idx) if checkpoint is not None else None
+        if trials is not None:
+            print(f"[INFO] Window {window_idx}: resuming from {len(trials)} checkpointed trials")
+            if pruner is not None:
+                pruner.replay(trials.results)
+        else:
+            # fmin ignores points_to_evaluate when given a Trials object, so queue the seeds in it directly;
+            # they count toward max_evals
+            trials = generate_trials_to_calculate(seeds) if seeds else Trials()
+        while len(trials) < max_evals:
+            target = min(max_evals, len(trials) + checkpoint_every)
+            # Seed every chunk from its position so a resumed window draws the same trials
+            rstate = np.random.default_rng([int(seed), window_idx, len(trials)]) if seed is not None else None
+            fmin(fn=objective, space=search_space, algo=tpe.suggest, max_evals=target, trials=trials,
+                 rstate=rstate, early_stop_fn=early_stop_fn)
+            if checkpoint is not None:
+                checkpoint.save_trials(window_idx, trials)
+            if len(trials) < target:
+                break  # stopped early by the convergence rule
+        return trials
+
+    previous_scores = []  # (loss, params) of every trial in the previous window
+    prune_stats = []  # one dict per window when pruning is enabled
+    fronts = []  # Pareto front per window in multi-objective mode
+
+    print(f"[INFO] {len(windows)} walk-forward windows over {len(df_all_orig)} bars")
+    window_pt = None
+    if pt_provider is not None:
+        window_pt = walk_forward_predictions(df_all_orig, windows, pt_provider, config.get("pt_cache"))
+    for window_idx, (start_idx, train_stop, test_stop) in enumerate(windows):
         # Always start from the original data for each window
-        train_df = df_all_orig.iloc[start_idx:start_idx + train_window].copy()
-        test_df = df_all_orig.iloc[start_idx + train_window:start_idx + train_window + test_window].copy()
+        train_df = df_all_orig.iloc[start_idx:train_stop].copy()
+        test_df = df_all_orig.iloc[train_stop:test_stop].copy()
+        if window_pt is not None:
+            train_df["Pt"] = window_pt[window_idx][:train_stop - start_idx]
+            test_df["Pt"] = window_pt[window_idx][train_stop - start_idx:]
+
+        restored = checkpoint.load_window(window_idx) if checkpoint is not None else None
+        if restored is not None:
+            print(f"[INFO] Window {window_idx}: restored from checkpoint")
+            train_results.append(restored["train_result"])
+            all_results.append(restored["test_result"])
+            test_indicator_dfs.append(restored["test_indicators"])
+            best_params_list.append(restored["test_result"]["BestParams"])
+            indicators_per_trial.append([])
+            if restored["prune_stats"] is not None:
+                prune_stats.append(restored["prune_stats"])
+            if restored.get("pareto_front") is not None:
+                fronts.append(restored["pareto_front"])
+            previous_scores = restored["scores"]
+            continue
 
         trial_indicator_snapshots = []  # Store indicator DataFrame for each trial in this window
+        pruner = None
+        if prune:
+            pruner = SuccessiveHalving(config.get("prune_rungs", (0.25, 0.5)), config.get("prune_keep", 0.5),
+                                       config.get("prune_min_trials", 5))
+        train_sweeps = None
+        if sweep_indicators:
+            train_sweeps = indicator_plan.sweep(train_df, base_params, grid)
+        store_context = None
+        if store is not None:
+            store_context = context_key(frame_digest(train_df), compiled_rules, indicator_plan,
+                                        sorted(objective_weights.items()), objective_type)
 
         def objective(params):
             param_dict = {p: param_types[p](params[p]) for p in optimize_params}
-            # Build indicators for this parameter set
-            train_df_local = train_df.copy()
-            train_df_local = build_indicators(train_df_local, param_dict, builder_df=builder_df, talib_df=talib_df)
-            # Store a snapshot of indicators for this trial
-            trial_indicator_snapshots.append((param_dict.copy(), train_df_local.copy()))
-            rule_dict = parse_strategy_logic(logic_df)
-            result_df = strategy_from_logic(train_df_local, rule_dict)
-            metrics = calculate_performance_metrics(result_df, train_df_local)
-            key_map = metric_key_map()
-            score = 0
-            for metric, weight in objective_weights.items():
-                mapped_key = key_map.get(metric, metric)
-                val = metrics.get(mapped_key, 0)
-                score += weight * val
-            if objective_type == "MAX":
-                return {"loss": -score, "status": STATUS_OK}
-            else:
-                return {"loss": score, "status": STATUS_OK}
+            if store_context is not None:
+                stored = store.get(store_context, {**base_params, **param_dict})
+                if stored is not None:
+                    if pruner is not None:
+                        pruner.full_losses.append(stored)
+                    return {"loss": stored, "status": STATUS_OK, "params": param_dict}
+            # Build indicators for this parameter set (non-optimized params keep their Dashboard values)
+            train_df_local = window_indicators(train_df, {**base_params, **param_dict}, train_sweeps)
+            # Store a snapshot of indicators for this trial (build_indicators already returns a copy)
+            trial_indicator_snapshots.append((param_dict.copy(), train_df_local))
+            rung_losses = []
+            if pruner is not None:
+                for rung in pruner.rungs:
+                    # Indicators are causal, so a prefix of the window frame is the prefix evaluation
+                    prefix_loss = score_trial(train_df_local.iloc[:max(1, int(len(train_df_local) * rung))])
+                    rung_losses.append(prefix_loss)
+                    if pruner.should_prune(rung, prefix_loss):
+                        return {"loss": pruner.pruned_loss(prefix_loss), "status": STATUS_OK, "params": param_dict,
+                                "pruned": True, "rung_losses": rung_losses}
+            loss, metrics = evaluate_trial(train_df_local)
+            if pruner is not None:
+                pruner.full_losses.append(loss)
+            if store_context is not None:
+                store.put(store_context, {**base_params, **param_dict}, loss)
+            result = {"loss": loss, "status": STATUS_OK, "params": param_dict, "rung_losses": rung_losses}
+            if multi_objective:
+                result["metrics"] = objective_vector(metrics, key_map)
+            return result
 
         search_space = {
             p: hp.quniform(p, *param_ranges[p])
             for p in optimize_params if p in param_ranges
         }
-        trials = Trials()
-        best = fmin(fn=objective, space=search_space, algo=tpe.suggest, max_evals=max_evals, trials=trials)
+        seeds = warm_start_points(previous_scores, warm_start, warm_start_k, param_ranges)
+        trials = search(window_idx, objective, search_space, seeds, pruner)
+        best = trials.argmin
+        if early_stop_fn is not None and len(trials) < max_evals:
+            print(f"[INFO] Window {window_idx}: search converged after {len(trials)}/{max_evals} evaluations")
+        window_scores = [(r["loss"], r["params"]) for r in trials.results if not r.get("pruned")]
+        pruned_params = [r["params"] for r in trials.results if r.get("pruned")]
+        previous_scores = window_scores
+        stats = None
+        if pruner is not None:
+            stats = {"Window": window_idx, **pruner.stats()}
+            if prune_audit and pruned_params:
+                # Score the pruned trials on the full window to check the pruning kept the best one
+                kept_best = min((l for l, _ in window_scores if np.isfinite(l)), default=np.inf)
+                audit = [(score_trial(window_indicators(train_df, {**base_params, **pp}, train_sweeps)), pp)
+                         for pp in pruned_params]
+                missed = [(l, pp) for l, pp in audit if l < kept_best]
+                stats["BestMatchesExhaustive"] = not missed
+                if missed:
+                    print(f"⚠️ Window {window_idx}: pruned {min(missed, key=lambda m: m[0])[1]} scores better "
+                          f"than the kept best")
+            prune_stats.append(stats)
+            print(f"[INFO] Window {window_idx} pruning: {stats['Trials'] - stats['Full']}/{stats['Trials']} "
+                  f"trials pruned {stats['Pruned']}")
         # Cast best params to correct type
-        best = {k: param_types[k](v) for k, v in best.items()}
+        best = {k: param_types[k](best[k]) for k in sorted(best)}  # seeded trials may list keys in any order
+        front = window_front(window_idx, trials.results, best) if multi_objective else None
+        if front is not None:
+            fronts.append(front)
+            print(f"[INFO] Window {window_idx}: {len(front)} parameter sets on the Pareto front")
 
         # --- Train set metrics/trades ---
-        train_df_local = train_df.copy()
-        train_df_local = build_indicators(train_df_local, best, builder_df=builder_df, talib_df=talib_df)
-        rule_dict = parse_strategy_logic(logic_df)
-        train_result_df = strategy_from_logic(train_df_local, rule_dict)
+        train_df_local = window_indicators(train_df, {**base_params, **best}, train_sweeps)
+        train_result_df = strategy_from_logic(train_df_local, compiled_rules)
         train_metrics = calculate_performance_metrics(train_result_df, train_df_local)
         eq_final_tr = train_metrics.get("Equity Final [$]", None)
         eq_start_tr = train_metrics.get("Equity Start [$]", None)
@@ -192,12 +482,10 @@ def optimize_strategy(config):
         })
 
         # --- Test set metrics/trades ---
-        test_df_local = test_df.copy()
-        test_df_local = build_indicators(test_df_local, best, builder_df=builder_df, talib_df=talib_df)
+        test_df_local = window_indicators(test_df, {**base_params, **best})
         # Save a copy of the test set DataFrame with all indicators
         test_indicator_dfs.append(test_df_local.copy())
-        rule_dict = parse_strategy_logic(logic_df)
-        test_result_df = strategy_from_logic(test_df_local, rule_dict)
+        test_result_df = strategy_from_logic(test_df_local, compiled_rules)
         test_metrics = calculate_performance_metrics(test_result_df, test_df_local)
         eq_final = test_metrics.get("Equity Final [$]", None)
         eq_start = test_metrics.get("Equity Start [$]", None)
@@ -217,12 +505,41 @@ def optimize_strategy(config):
         })
         best_params_list.append(best)
         indicators_per_trial.append(trial_indicator_snapshots)
+        if checkpoint is not None:
+            writer.submit(checkpoint.save_window, window_idx, {
+                "train_result": train_results[-1],
+                "test_result": all_results[-1],
+                "test_indicators": test_indicator_dfs[-1],
+                "prune_stats": stats,
+                "scores": window_scores,
+                "pareto_front": front,
+            })
+    if store is not None:
+        stats = store.stats()
+        store.close()
+        print(f"[INFO] Trial store: {stats['Hits']} results reused, {stats['Misses']} evaluated, "
+              f"{stats['Entries']} stored")
+    # Attach pruning statistics to the optimizer for later inspection
+    optimize_strategy.prune_stats = prune_stats
+    # Every window's front; pareto.reweight picks the best row per window for any other weights
+    optimize_strategy.pareto_front = pd.concat([f for f in fronts if not f.empty], ignore_index=True) \
+        if any(not f.empty for f in fronts) else pd.DataFrame()
+    if multi_objective:
+        writer.submit(write_data_table, excel_path, optimize_strategy.pareto_front, sheet_name="Pareto Front")
+    if prune_stats:
+        total = sum(s["Trials"] for s in prune_stats)
+        full = sum(s["Full"] for s in prune_stats)
+        print(f"[INFO] Pruning: {full}/{total} trials evaluated on the full train window")
+        audited = [s["BestMatchesExhaustive"] for s in prune_stats if "BestMatchesExhaustive" in s]
+        if audited:
+            print(f"[INFO] Pruning audit: best params match exhaustive evaluation in "
+                  f"{sum(audited)}/{len(audited)} audited windows")
     # Attach train_results to the writer for later use
     write_optimization_results.train_results = train_results
 
 
 
-    write_optimization_results(excel_path, all_results)
+    writer.submit(write_optimization_results, excel_path, all_results)
     key_map = metric_key_map()
     df_metrics = pd.DataFrame([r["TestMetrics"] for r in all_results])
     # Ensure all mapped keys exist in df_metrics
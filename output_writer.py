@@ -0,0 +1,103 @@
+"""
+Background output stage for workbook writes, PNG renders and checkpoints.
+
+`BackgroundWriter` runs submitted tasks on a single worker thread in submission order, fed by
+a bounded queue, so the main thread keeps computing while the previous results are saved.
+One worker keeps the output deterministic: tasks touching the same workbook never interleave.
+A full queue blocks `submit`, which bounds the memory held by pending results.
+"""
+
+import atexit
+import queue
+import threading
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    Ordered, bounded background task queue.
+
+    Use as a context manager (or call `close`) to flush every pending task; the first task
+    error is re-raised there. Writers still open at interpreter exit are flushed by atexit.
+    """
+
+    def __init__(self, max_pending: int = 8, name: str = "output-writer"):
+        self._queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._errors = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is _STOP:
+                    return
+                fn, args, kwargs = task
+                if self._errors:
+                    continue  # a previous write failed: later writes could depend on it
+                try:
+                    fn(*args, **kwargs)
+                except BaseException as e:
+                    # Reported once, when flush/close re-raises it
+                    self._errors.append(e)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, fn, *args, **kwargs) -> None:
+        """Queue fn(*args, **kwargs); blocks while max_pending tasks are already waiting."""
+        if self._closed:
+            raise RuntimeError("BackgroundWriter is closed")
+        self._queue.put((fn, args, kwargs))
+
+    def flush(self) -> None:
+        """Wait until every submitted task has run; re-raise the first task error."""
+        self._queue.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Keep the original exception; still persist what was already produced
+            try:
+                self.close()
+            except BaseException as e:
+                print(f"❌ Background write failed: {e!r}")
+        return False
+
+
+class InlineWriter:
+    """Drop-in for BackgroundWriter that runs every task immediately on the calling thread."""
+
+    def submit(self, fn, *args, **kwargs) -> None:
+        fn(*args, **kwargs)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
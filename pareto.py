@@ -0,0 +1,90 @@
+"""
+Pareto fronts of multi-objective optimization trials.
+
+In multi-objective mode every fully evaluated trial keeps the vector of all optimization metrics
+(the keys of the Dashboard's "Optimization Metric" table), not only its weighted score. The
+non-dominated trials of each window form its Pareto front; any weighting of the metrics can be
+applied to the front afterwards with `reweight`, without rerunning the optimization.
+"""
+
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+# Direction in which each optimization metric improves (Max Drawdown [%] is negative, so higher is better)
+OBJECTIVE_DIRECTIONS = {
+    "AccReturn": "max",
+    "Sharpe": "max",
+    "Max Drawdown": "max",
+    "Accuracy": "max",
+    "SqrtMSE": "min",
+}
+
+
+def objective_vector(metrics: dict, key_map: Mapping[str, str]) -> Dict[str, float]:
+    """Every optimization metric of one trial, read like the weighted score reads them (missing = 0)."""
+    return {name: float(metrics.get(key_map.get(name, name), 0)) for name in OBJECTIVE_DIRECTIONS}
+
+
+def _oriented(values: np.ndarray, directions) -> np.ndarray:
+    """Flip minimized columns so that larger is better everywhere; NaN counts as the worst value."""
+    signs = np.array([1.0 if d == "max" else -1.0 for d in directions])
+    oriented = np.asarray(values, dtype=float) * signs
+    return np.where(np.isnan(oriented), -np.inf, oriented)
+
+
+def dominance_matrix(values: np.ndarray, directions, max_elements: int = 4_000_000) -> np.ndarray:
+    """(n x n) bool matrix whose [i, j] is True when trial i dominates trial j."""
+    values = _oriented(values, directions)
+    n, m = values.shape
+    dominates = np.empty((n, n), dtype=bool)
+    chunk = max(1, max_elements // max(1, n * m))
+    for start in range(0, n, chunk):
+        block = values[start:start + chunk, None, :]
+        dominates[start:start + chunk] = ((block >= values[None, :, :]).all(axis=2)
+                                          & (block > values[None, :, :]).any(axis=2))
+    return dominates
+
+
+def pareto_ranks(values: np.ndarray, directions) -> np.ndarray:
+    """Non-dominated sorting: 0 for the Pareto front, 1 for the front once it is removed, and so on."""
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    ranks = np.full(len(values), -1)
+    if not len(values):
+        return ranks
+    dominates = dominance_matrix(values, directions)
+    # Number of not yet ranked trials dominating each trial
+    dominated_by = dominates.sum(axis=0)
+    rank = 0
+    current = dominated_by == 0
+    while current.any():
+        ranks[current] = rank
+        dominated_by = dominated_by - dominates[current].sum(axis=0)
+        current = (dominated_by == 0) & (ranks < 0)
+        rank += 1
+    return ranks
+
+
+def pareto_front(trials: pd.DataFrame, directions: Optional[Mapping[str, str]] = None) -> pd.DataFrame:
+    """Rows of `trials` (one per parameter set, a column per metric) on the Pareto front."""
+    directions = dict(directions or OBJECTIVE_DIRECTIONS)
+    columns = [c for c in directions if c in trials.columns]
+    ranks = pareto_ranks(trials[columns].to_numpy(dtype=float), [directions[c] for c in columns])
+    return trials[ranks == 0]
+
+
+def reweight(front: pd.DataFrame, weights: Mapping[str, float], objective_type: str = "MAX",
+             by: str = "Window") -> pd.DataFrame:
+    """
+    The best row of every `by` group under new metric weights, scored like the optimizer's
+    objective (sum of weight x metric, maximized or minimized). The weighted optimum is on the
+    front whenever each weight's sign agrees with its metric's direction.
+    """
+    score = sum(float(w) * front[metric] for metric, w in weights.items())
+    ranked = front.assign(Score=score)
+    if str(objective_type).upper() == "MAX":
+        best = ranked.groupby(by, sort=False)["Score"].idxmax()
+    else:
+        best = ranked.groupby(by, sort=False)["Score"].idxmin()
+    return ranked.loc[best.to_numpy()]
@@ -1,13 +1,31 @@
 import pandas as pd
 import numpy as np
+from typing import Union
+from trade_log import TradeLog
+
+
+def metric_key_map():
+    """Map Excel/weight keys to actual metric keys in metrics dict."""
+    return {
+        'AccReturn': 'Return [%]',
+        'Sharpe': 'Sharpe Ratio',
+        'Max Drawdown': 'Max Drawdown [%]',
+        'Accuracy': 'Win Rate [%]',
+        'SqrtMSE': 'SqrtMSE',
+    }
 
 
 def calculate_performance_metrics(
-    results_df: pd.DataFrame,
+    results_df: Union[TradeLog, pd.DataFrame],
     market_data: pd.DataFrame,
     initial_cash: float = 10_000
 ) -> dict:
-    if results_df.empty:
+    """
+    Performance metrics of a set of trades. Takes a TradeLog (or a trades DataFrame) and leaves
+    it untouched; use `TradeLog.with_equity` for the per-trade Equity/Returns columns.
+    """
+    trades = results_df if isinstance(results_df, TradeLog) else TradeLog.from_pandas(results_df)
+    if trades.empty:
         return {
             "Total Return [%]": 0,
             "Sharpe Ratio": 0,
@@ -17,35 +35,31 @@ def calculate_performance_metrics(
         }
 
     # Use EntryDate and ExitDate for multi-period trades
-    results_df["EntryDate"] = pd.to_datetime(results_df["EntryDate"])
-    results_df["ExitDate"] = pd.to_datetime(results_df["ExitDate"])
-    results_df.sort_values("EntryDate", inplace=True)
-    results_df.reset_index(drop=True, inplace=True)
+    trades = trades.sorted_by_entry()
+    entry_dates = trades["EntryDate"]
+    exit_dates = trades["ExitDate"]
+    pnls = trades["PnL"].astype(float)
 
     # Build equity curve
-    equity_curve = [initial_cash]
-    for pnl in results_df["PnL"]:
-        equity_curve.append(equity_curve[-1] + pnl)
-    equity_curve = equity_curve[1:]
-    results_df["Equity"] = equity_curve
-    results_df["Returns"] = results_df["PnL"] / initial_cash
-    returns = results_df["Returns"]
+    equity_curve = trades.equity(initial_cash)
+    returns = pd.Series(pnls / initial_cash)
 
     # Drawdown Calculation
-    equity_series = pd.Series(equity_curve, index=results_df["ExitDate"])
+    equity_series = pd.Series(equity_curve, index=exit_dates)
     running_max = equity_series.cummax()
     drawdown = equity_series / running_max - 1.0
     max_drawdown = drawdown.min() * 100
 
     # Other Metrics
     total_return = (equity_curve[-1] - initial_cash) / initial_cash * 100
-    trades = len(results_df)
-    wins = sum(results_df["PnL"] > 0)
-    win_rate = wins / trades * 100 if trades > 0 else 0
+    n_trades = len(trades)
+    wins = int(np.count_nonzero(pnls > 0))
+    win_rate = wins / n_trades * 100 if n_trades > 0 else 0
     avg_trade = returns.mean()
     volatility = returns.std()
     sharpe_ratio = avg_trade / volatility * (252 ** 0.5) if volatility > 0 else 0
-    duration = (results_df["ExitDate"].iloc[-1] - results_df["EntryDate"].iloc[0]) + pd.Timedelta(days=1)
+    start, end = pd.Timestamp(entry_dates[0]), pd.Timestamp(exit_dates[-1])
+    duration = (end - start) + pd.Timedelta(days=1)
 
     # SqrtMSE between Pt and Close from full market_data
     if "Pt" in market_data.columns and "Close" in market_data.columns:
@@ -55,12 +69,12 @@ def calculate_performance_metrics(
         sqrt_mse = 0.0
 
     metrics = {
-        "Start": results_df["EntryDate"].iloc[0],
-        "End": results_df["ExitDate"].iloc[-1],
+        "Start": start,
+        "End": end,
         "Duration": duration,
         "Equity Final [$]": round(equity_curve[-1], 2),
         "Return [%]": round(total_return, 4),
-        "# Trades": trades,
+        "# Trades": n_trades,
         "Win Rate [%]": round(win_rate, 2),
         "Avg. Trade [%]": round(avg_trade * 100, 4),
         "Sharpe Ratio": round(sharpe_ratio, 4),
@@ -0,0 +1,112 @@
+"""
+Multi-symbol (portfolio) backtest of one strategy.
+
+`backtest_portfolio` runs one indicator plan and one rule set over many symbols. Symbols
+that share a column layout are stacked into one frame, so each strategy rule is evaluated
+as a single vectorized mask over the bars of all of them. Every symbol's position state
+machine then runs on its slice of the masks (`strategy_from_masks`), jumping from signal to
+signal instead of stepping bar by bar. TA-Lib indicators are still computed per symbol, so
+no lookback window ever spans two symbols.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from indicator_builder import IndicatorPlan
+from performance_metrics import calculate_performance_metrics
+from strategy import CompiledRules, strategy_from_masks
+from timeframes import add_timeframe_columns
+from trade_log import TradeLog
+
+
+@dataclass(frozen=True)
+class PortfolioResult:
+    """
+    Per-symbol trades plus the aggregated portfolio.
+
+    `equity` has one realized-equity column per symbol (each starting at initial_cash and
+    changing on trade exit dates) and their sum in "Portfolio". `metrics` has one row per
+    symbol and a final "Portfolio" row over all trades.
+    """
+    trades: Dict[str, TradeLog]
+    equity: pd.DataFrame
+    metrics: pd.DataFrame
+    initial_cash: float
+
+    def trade_log(self) -> TradeLog:
+        """All trades with a "Symbol" column, in EntryDate order with portfolio Equity/Returns."""
+        logs = [log.with_column("Symbol", symbol) for symbol, log in self.trades.items()]
+        return TradeLog.concat(logs).with_equity(self.initial_cash * len(self.trades))
+
+    def portfolio_metrics(self) -> dict:
+        row = self.metrics.iloc[-1].to_dict()
+        row.pop("Symbol", None)
+        return row
+
+
+def _symbol_trades(frames: Dict[str, pd.DataFrame], rules: CompiledRules) -> Dict[str, TradeLog]:
+    """Evaluate every rule once per column layout over the stacked symbols, then split by symbol."""
+    groups = defaultdict(list)
+    for symbol, df in frames.items():
+        groups[tuple(df.columns)].append(symbol)
+    trades = {}
+    for symbols in groups.values():
+        stacked = pd.concat([frames[s] for s in symbols], ignore_index=True)
+        masks = rules.evaluate_frame(stacked)
+        offsets = np.cumsum([0] + [len(frames[s]) for s in symbols])
+        for symbol, start, stop in zip(symbols, offsets[:-1], offsets[1:]):
+            symbol_masks = {rule: mask[start:stop] for rule, mask in masks.items()}
+            trades[symbol] = strategy_from_masks(frames[symbol], rules, symbol_masks)
+    return {symbol: trades[symbol] for symbol in frames}
+
+
+def portfolio_equity(trades: Dict[str, TradeLog], dates, initial_cash: float = 10_000) -> pd.DataFrame:
+    """Realized equity per symbol and in total on every date of `dates` (PnL booked at ExitDate)."""
+    index = pd.DatetimeIndex(dates)
+    equity = {"Date": index}
+    for symbol, log in trades.items():
+        pnl = pd.Series(log["PnL"].astype(float), index=pd.DatetimeIndex(log["ExitDate"]))
+        daily = pnl.groupby(level=0).sum().reindex(index, fill_value=0.0)
+        equity[symbol] = initial_cash + daily.cumsum().to_numpy()
+    df = pd.DataFrame(equity)
+    df["Portfolio"] = df[list(trades)].sum(axis=1) if trades else 0.0
+    return df
+
+
+def backtest_portfolio(data: Dict[str, pd.DataFrame],
+                       rules: Union[CompiledRules, Dict[str, list]],
+                       plan: Optional[IndicatorPlan] = None,
+                       param_map: Optional[dict] = None,
+                       initial_cash: float = 10_000) -> PortfolioResult:
+    """
+    Backtest one strategy on several symbols (symbol -> market data with a Date column).
+
+    With a plan, indicators are built per symbol for param_map first; without one the
+    frames must already hold every column the rules use. Each symbol trades with its own
+    initial_cash, so the portfolio starts at initial_cash * number of symbols.
+    """
+    if not isinstance(rules, CompiledRules):
+        rules = CompiledRules.from_rule_map(rules)
+    frames = {}
+    for symbol, df in data.items():
+        if plan is not None:
+            df = plan.evaluate(add_timeframe_columns(df, plan.timeframe_references()), param_map or {})
+        frames[symbol] = df
+    trades = _symbol_trades(frames, rules)
+    trades = {symbol: log.with_equity(initial_cash) for symbol, log in trades.items()}
+
+    dates = np.unique(np.concatenate(
+        [pd.to_datetime(df["Date"]).to_numpy() for df in frames.values()])) if frames else []
+    equity = portfolio_equity(trades, dates, initial_cash)
+
+    rows = [{"Symbol": symbol, **calculate_performance_metrics(log, frames[symbol], initial_cash)}
+            for symbol, log in trades.items()]
+    total = TradeLog.concat(trades.values()) if trades else TradeLog()
+    market = pd.concat(frames.values(), ignore_index=True) if frames else pd.DataFrame()
+    rows.append({"Symbol": "Portfolio",
+                 **calculate_performance_metrics(total, market, initial_cash * max(len(trades), 1))})
+    return PortfolioResult(trades=trades, equity=equity, metrics=pd.DataFrame(rows), initial_cash=initial_cash)
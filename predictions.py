@@ -0,0 +1,207 @@
+"""
+Batch prediction providers for the `Pt` model column.
+
+A provider is any object with `predict(X) -> array`, called once on the (bars x features)
+array of a whole frame or window, never per row. Optional attributes:
+
+- `features`: the input columns, in order (default DEFAULT_FEATURES, the previous bar's OHLCV,
+  so a bar's prediction never sees its own prices);
+- `version`: a string identifying the trained model; predictions are cached on disk only
+  when it is set, keyed by model, version, features and a hash of the input data;
+- `fit(X, y)`: refit on a train window (`y` is the Close column), used with `pt_refit`.
+
+`load_provider("my_models:PtModel")` imports a provider (an instance, a class to instantiate
+or a plain predict function). Predictions are written to frames by date, so cached ones are
+reused whenever the same bars come back, in any row order or range.
+"""
+
+import hashlib
+import importlib
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from trial_store import frame_digest
+
+DEFAULT_FEATURES = ("Oy", "Hy", "Ly", "Cy", "Vy")
+DEFAULT_CACHE_DIR = os.path.join("cache", "predictions")
+
+
+class FunctionProvider:
+    """Provider around a plain batch function `predict(X) -> array`."""
+
+    def __init__(self, predict: Callable, features: Optional[Sequence[str]] = None,
+                 version: Optional[str] = None, name: Optional[str] = None):
+        self.predict = predict
+        self.features = tuple(features) if features else DEFAULT_FEATURES
+        self.version = version
+        self.name = name or getattr(predict, "__qualname__", "model")
+
+
+def load_provider(spec, version: Optional[str] = None, features: Optional[Sequence[str]] = None):
+    """
+    Provider from "module:attribute" (or an object already). Classes are instantiated and plain
+    functions wrapped in FunctionProvider; `version` and `features` override the provider's own.
+    """
+    provider = spec
+    if isinstance(spec, str):
+        module_name, sep, attr = spec.partition(":")
+        if not sep or not attr:
+            raise ValueError(f"Invalid model {spec!r}; expected 'module:attribute'")
+        provider = getattr(importlib.import_module(module_name), attr)
+    if isinstance(provider, type):
+        provider = provider()
+    if not hasattr(provider, "predict"):
+        if not callable(provider):
+            raise TypeError(f"Model {spec!r} has no predict method and is not callable")
+        provider = FunctionProvider(provider)
+    if version is not None:
+        provider.version = str(version)
+    if features is not None:
+        provider.features = tuple(features)
+    return provider
+
+
+def provider_features(provider) -> Tuple[str, ...]:
+    return tuple(getattr(provider, "features", None) or DEFAULT_FEATURES)
+
+
+def provider_key(provider) -> Optional[str]:
+    """Model identity used in cache keys; None when the provider has no version."""
+    version = getattr(provider, "version", None)
+    if provider is None or version is None:
+        return None
+    name = getattr(provider, "name", None) or type(provider).__qualname__
+    return f"{type(provider).__module__}.{name}@{version}:{','.join(provider_features(provider))}"
+
+
+def feature_matrix(df: pd.DataFrame, features: Sequence[str]) -> np.ndarray:
+    """(bars x features) float array of df's feature columns."""
+    missing = [c for c in features if c not in df.columns]
+    if missing:
+        raise ValueError(f"Prediction features {missing} are not in the market data")
+    return df[list(features)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+
+def align_to_dates(pred_dates: np.ndarray, values: np.ndarray, dates) -> np.ndarray:
+    """Predictions for `dates` looked up by date (NaN for dates without a prediction)."""
+    dates = pd.to_datetime(dates).to_numpy(dtype="datetime64[ns]")
+    if not len(pred_dates):
+        return np.full(len(dates), np.nan)
+    order = np.argsort(pred_dates, kind="stable")
+    pred_dates, values = pred_dates[order], np.asarray(values, dtype=float)[order]
+    pos = np.minimum(np.searchsorted(pred_dates, dates), len(pred_dates) - 1)
+    return np.where(pred_dates[pos] == dates, values[pos], np.nan)
+
+
+class PredictionCache:
+    """Predictions on disk, one .npz (dates and values) per model version and data hash."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(provider, *frames: pd.DataFrame, target: bool = False) -> Optional[str]:
+        """
+        Cache key of a prediction from a provider and the frames it depends on: their dates and
+        features, plus Close when the model is fit on them (None: do not cache).
+        """
+        model = provider_key(provider)
+        if model is None:
+            return None
+        columns = ["Date", *provider_features(provider)] + (["Close"] if target else [])
+        h = hashlib.sha256(model.encode())
+        for frame in frames:
+            h.update(b"\0")
+            h.update(frame_digest(frame[[c for c in columns if c in frame.columns]]).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key: Optional[str]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if key is None or not os.path.exists(self._path(key)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        with np.load(self._path(key)) as data:
+            return data["dates"], data["values"]
+
+    def put(self, key: Optional[str], dates, values) -> None:
+        if key is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary name and renamed, so a crash never leaves a torn file
+        tmp = self._path(key) + ".tmp.npz"
+        np.savez(tmp, dates=pd.to_datetime(dates).to_numpy(dtype="datetime64[ns]"),
+                 values=np.asarray(values, dtype=float))
+        os.replace(tmp, self._path(key))
+
+
+def _predict(provider, df: pd.DataFrame) -> np.ndarray:
+    values = np.asarray(provider.predict(feature_matrix(df, provider_features(provider))), dtype=float).ravel()
+    if len(values) != len(df):
+        raise ValueError(f"Model returned {len(values)} predictions for {len(df)} bars")
+    return values
+
+
+def predict_frame(df: pd.DataFrame, provider, cache: Optional[PredictionCache] = None,
+                  column: str = "Pt") -> pd.DataFrame:
+    """Copy of df with `column` predicted for every bar in one batch call (or read from the cache)."""
+    key = cache.key(provider, df) if cache is not None else None
+    cached = cache.get(key) if cache is not None else None
+    if cached is None:
+        cached = pd.to_datetime(df["Date"]).to_numpy(dtype="datetime64[ns]"), _predict(provider, df)
+        if cache is not None:
+            cache.put(key, *cached)
+    return df.assign(**{column: align_to_dates(*cached, df["Date"])})
+
+
+def walk_forward_predictions(df: pd.DataFrame, windows: List[Tuple[int, int, int]], provider,
+                             cache: Optional[PredictionCache] = None) -> List[np.ndarray]:
+    """
+    Refit the provider on each window's train bars (features -> Close) and predict the window's
+    train and test bars in one batch; one array of test_stop - train_start values per window.
+    Windows whose train and test bars are unchanged are read from the cache without refitting.
+    """
+    if not hasattr(provider, "fit"):
+        raise TypeError("Refitting per window needs a provider with a fit(X, y) method")
+    features = provider_features(provider)
+    predictions = []
+    for start, train_stop, test_stop in windows:
+        train, window = df.iloc[start:train_stop], df.iloc[start:test_stop]
+        key = cache.key(provider, train, window, target=True) if cache is not None else None
+        cached = cache.get(key) if cache is not None else None
+        if cached is None:
+            X = feature_matrix(train, features)
+            y = pd.to_numeric(train["Close"], errors="coerce").to_numpy(dtype=float)
+            usable = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+            provider.fit(X[usable], y[usable])
+            cached = pd.to_datetime(window["Date"]).to_numpy(dtype="datetime64[ns]"), _predict(provider, window)
+            if cache is not None:
+                cache.put(key, *cached)
+        predictions.append(align_to_dates(*cached, window["Date"]))
+    return predictions
+
+
+def apply_pt_model(config: dict) -> dict:
+    """
+    Replace the market data's Pt with the model given by config "pt_model" (see load_provider;
+    "pt_model_version" / "pt_features" override its version / features) and rebuild the
+    indicators, which may use Pt. The loaded provider is kept in config "pt_provider".
+    """
+    provider = load_provider(config["pt_model"], config.get("pt_model_version"), config.get("pt_features"))
+    cache = PredictionCache(config.get("pt_cache_dir", DEFAULT_CACHE_DIR))
+    if provider_key(provider) is None:
+        print("[INFO] The Pt model has no version; its predictions are not cached.")
+    market_df = predict_frame(config["market_data"], provider, cache)
+    plan = config.get("indicator_plan")
+    config["market_data"] = plan.evaluate(market_df, config.get("param_map", {})) if plan is not None else market_df
+    config["pt_provider"] = provider
+    config["pt_cache"] = cache
+    print(f"[INFO] Pt predicted by {config['pt_model']} ({'cached' if cache.hits else 'computed'})")
+    return config
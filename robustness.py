@@ -0,0 +1,111 @@
+"""
+Monte Carlo / bootstrap robustness of a set of trades.
+
+The trades' PnL sequence is resampled thousands of times, either with replacement
+("bootstrap") or as random reorderings ("shuffle", which keeps the total return and Sharpe
+and only moves the drawdown). All resamples of a chunk live in one (samples x trades)
+array; equity, drawdown and Sharpe are computed along its trade axis with the same
+definitions as `calculate_performance_metrics`, so the identity ordering reproduces the
+backtest's own metrics.
+"""
+
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from trade_log import TradeLog
+
+ROBUSTNESS_METHODS = ("bootstrap", "shuffle")
+ROBUSTNESS_METRICS = ("Return [%]", "Sharpe Ratio", "Max Drawdown [%]", "Win Rate [%]", "Equity Final [$]")
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def resample_indices(rng: np.random.Generator, n_samples: int, n_trades: int, method: str) -> np.ndarray:
+    """(n_samples, n_trades) trade indices: drawn with replacement, or one permutation per row."""
+    if method == "bootstrap":
+        return rng.integers(0, n_trades, size=(n_samples, n_trades))
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(np.arange(n_trades), (n_samples, n_trades)), axis=1)
+    raise ValueError(f"Unknown robustness method {method!r}; expected one of {ROBUSTNESS_METHODS}")
+
+
+def path_metrics(pnl: np.ndarray, initial_cash: float = 10_000) -> Dict[str, np.ndarray]:
+    """
+    Metrics of every row of a (samples x trades) PnL matrix, in calculate_performance_metrics
+    units (unrounded): one value per row for each of ROBUSTNESS_METRICS.
+    """
+    pnl = np.atleast_2d(np.asarray(pnl, dtype=float))
+    n_trades = pnl.shape[1]
+    # Running account balance, accumulated trade by trade from initial_cash
+    equity = np.cumsum(np.concatenate((np.full((len(pnl), 1), float(initial_cash)), pnl), axis=1), axis=1)[:, 1:]
+    drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1.0
+    returns = pnl / initial_cash
+    mean = returns.mean(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = returns.std(axis=1, ddof=1) if n_trades > 1 else np.full(len(pnl), np.nan)
+        sharpe = np.where(std > 0, mean / std * (252 ** 0.5), 0.0)
+    return {
+        "Return [%]": (equity[:, -1] - initial_cash) / initial_cash * 100,
+        "Sharpe Ratio": sharpe,
+        "Max Drawdown [%]": drawdown.min(axis=1) * 100,
+        "Win Rate [%]": np.count_nonzero(pnl > 0, axis=1) / n_trades * 100,
+        "Equity Final [$]": equity[:, -1],
+    }
+
+
+def simulate(pnl, n_samples: int = 5000, method: str = "bootstrap", initial_cash: float = 10_000,
+             chunk_size: Optional[int] = None, max_elements: int = 2_000_000,
+             seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Metric distributions over n_samples resampled trade sequences.
+
+    Resamples are generated and evaluated `chunk_size` rows at a time (by default as many
+    rows as fit in `max_elements` matrix cells), so memory stays bounded for any n_samples.
+    """
+    pnl = np.asarray(pnl, dtype=float)
+    n_samples = int(n_samples)
+    out = {name: np.empty(n_samples) for name in ROBUSTNESS_METRICS}
+    if len(pnl) == 0 or n_samples <= 0:
+        return {name: values[:0] for name, values in out.items()}
+    if chunk_size is None:
+        chunk_size = max(1, int(max_elements) // len(pnl))
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_samples, int(chunk_size)):
+        stop = min(start + int(chunk_size), n_samples)
+        indices = resample_indices(rng, stop - start, len(pnl), method)
+        for name, values in path_metrics(pnl[indices], initial_cash).items():
+            out[name][start:stop] = values
+    return out
+
+
+def summarize(samples: Dict[str, np.ndarray], observed: Optional[Dict[str, float]] = None,
+              percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """One row per metric: observed value, mean, standard deviation and the given percentiles."""
+    rows = []
+    for name, values in samples.items():
+        row = {"Metric": name}
+        if observed is not None:
+            row["Observed"] = observed.get(name, np.nan)
+        if len(values):
+            row["Mean"] = float(np.mean(values))
+            row["Std"] = float(np.std(values))
+            row.update({f"P{p:g}": float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def robustness_report(trades: Union[TradeLog, pd.DataFrame], n_samples: int = 5000,
+                      method: str = "bootstrap", initial_cash: float = 10_000,
+                      chunk_size: Optional[int] = None, seed: Optional[int] = None,
+                      percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """Percentile summary of resampled trades next to the metrics of the actual trade order."""
+    trades = trades if isinstance(trades, TradeLog) else TradeLog.from_pandas(trades)
+    pnl = trades.sorted_by_entry()["PnL"].astype(float) if not trades.empty else np.empty(0)
+    samples = simulate(pnl, n_samples, method, initial_cash, chunk_size, seed=seed)
+    observed = {name: float(values[0]) for name, values in path_metrics(pnl, initial_cash).items()} \
+        if len(pnl) else None
+    summary = summarize(samples, observed, percentiles)
+    summary.insert(1, "Method", method)
+    summary.insert(2, "Samples", len(next(iter(samples.values()))))
+    return summary
@@ -1,14 +1,157 @@
+import ast
+import numpy as np
 import pandas as pd
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple, Union
 from collections import defaultdict
+from diagnostics import DIAGNOSTICS
+from expressions import MaskPlan, compile_mask_plan
+from trade_log import TradeLog, TradeLogBuilder
 
 
-def parse_strategy_logic(df_logic: pd.DataFrame) -> Dict[str, List[str]]:
+LOGIC_COLUMNS = ["Rule Type", "Column A", "Operator", "Column B / Value", "Action at", "Logic Type"]
+COMPARISON_OPERATORS = {"<", ">", "<=", ">=", "==", "!="}
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """One (Rule Type, Action at) group of the Strategy Logic Builder as a compiled expression."""
+    rule_type: str
+    action_at: str
+    expression: str
+    code: object = field(init=False, repr=False, compare=False)
+    mask_plan: Optional[MaskPlan] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        try:
+            code = compile(self.expression, f"<{self.key}>", "eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid strategy rule '{self.key}': {self.expression} ({e.msg})") from None
+        object.__setattr__(self, "code", code)
+        # Comparisons joined by and/or (every rule the logic table produces) get a fused mask plan
+        object.__setattr__(self, "mask_plan", compile_mask_plan(ast.parse(self.expression, mode="eval")))
+
+    def __reduce__(self):
+        # Code objects are not picklable; recompile from the expression in the worker
+        return (CompiledRule, (self.rule_type, self.action_at, self.expression))
+
+    @property
+    def key(self) -> str:
+        return f"{self.rule_type}_{self.action_at}"
+
+    def evaluate(self, safe_row) -> bool:
+        try:
+            return eval(self.code, {"row": safe_row})
+        except Exception as e:
+            DIAGNOSTICS.record("Evaluation error", self.expression, e)
+            return False
+
+    def evaluate_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Rule value for every row of df as a boolean array, equal to `evaluate` row by row.
+        Rules over numeric columns run as one vectorized expression; others fall back to rows.
+        """
+        tree = None
+        if self.mask_plan is not None:
+            referenced = set(self.mask_plan.columns)
+        else:
+            tree = ast.parse(self.expression, mode="eval")
+            referenced = {node.slice.value for node in ast.walk(tree)
+                          if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name)
+                          and node.value.id == "row" and isinstance(node.slice, ast.Constant)}
+        missing = [col for col in referenced if col not in df.columns]
+        if missing:
+            DIAGNOSTICS.record("Evaluation error", self.expression, KeyError(missing[0]))
+            return np.zeros(len(df), dtype=bool)
+        if df.columns.is_unique and all(
+                pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col])
+                for col in referenced):
+            columns = {col: df[col].to_numpy() for col in referenced}
+            if self.mask_plan is not None:
+                with np.errstate(invalid="ignore"):
+                    return self.mask_plan.evaluate(columns, len(df))
+            code = compile(ast.fix_missing_locations(_BitwiseLogic().visit(tree)), f"<{self.key}>", "eval")
+            with np.errstate(invalid="ignore"):
+                result = eval(code, {"row": columns})
+            return np.broadcast_to(np.asarray(result, dtype=bool), (len(df),)).copy()
+        return np.fromiter((self.evaluate(SafeRow(row)) for _, row in df.iterrows()),
+                           dtype=bool, count=len(df))
+
+
+class _BitwiseLogic(ast.NodeTransformer):
+    """Rewrite `and`/`or` as `&`/`|` (left to right, same grouping) for element-wise evaluation."""
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return result
+
+
+@dataclass(frozen=True)
+class CompiledRules:
     """
-    Parse the strategy logic table into a rule map for evaluation.
-    Returns a dict mapping rule keys to lists of condition expressions.
+    Immutable, picklable rule set parsed from the Strategy Logic table.
+
+    Built once per run by `compile_strategy_logic` and shared by every backtest, trial and
+    worker; the logic table does not depend on parameters.
+    """
+    rules: Tuple[CompiledRule, ...]
+
+    def to_rule_map(self) -> Dict[str, List[str]]:
+        rule_map = defaultdict(list)
+        for rule in self.rules:
+            rule_map[rule.key].append(rule.expression)
+        return rule_map
+
+    def matching(self, prefix: str) -> Tuple[CompiledRule, ...]:
+        """Rules whose key starts with prefix, in sheet order."""
+        return tuple(rule for rule in self.rules if rule.key.startswith(prefix))
+
+    def evaluate_frame(self, df: pd.DataFrame) -> Dict[CompiledRule, np.ndarray]:
+        """Boolean mask per rule over every row of df (see CompiledRule.evaluate_frame)."""
+        return {rule: rule.evaluate_frame(df) for rule in self.rules}
+
+    def masks_cover(self, df: pd.DataFrame) -> bool:
+        """
+        True when every rule has a mask plan over numeric columns present in df, so its masks
+        give exactly the row-by-row results (and no rule records an evaluation error).
+        """
+        if not df.columns.is_unique:
+            return False
+        for rule in self.rules:
+            if rule.mask_plan is None:
+                return False
+            for col in rule.mask_plan.columns:
+                if col not in df.columns or not (pd.api.types.is_numeric_dtype(df[col])
+                                                 or pd.api.types.is_bool_dtype(df[col])):
+                    return False
+        return True
+
+    @classmethod
+    def from_rule_map(cls, rule_map: Dict[str, List[str]]) -> "CompiledRules":
+        rules = []
+        for key, conditions in rule_map.items():
+            rule_type, action_at = key.split("_", 1)
+            rules.append(CompiledRule(rule_type, action_at, " ".join(conditions)))
+        return cls(tuple(rules))
+
+
+def compile_strategy_logic(df_logic: pd.DataFrame) -> CompiledRules:
+    """
+    Parse and validate the strategy logic table once.
+
+    Raises:
+        ValueError: If a required column is missing, or a row has an unknown operator,
+            an unknown logic type or produces an invalid expression.
     """
-    rule_map = defaultdict(list)
+    missing = [c for c in LOGIC_COLUMNS if c not in df_logic.columns]
+    if missing:
+        raise ValueError(f"Strategy logic table is missing columns: {missing}")
+
+    rules = []
     grouped = df_logic.groupby(["Rule Type", "Action at"], sort=False)
 
     for (rule_type, action_at), group_df in grouped:
@@ -20,6 +163,9 @@ def parse_strategy_logic(df_logic: pd.DataFrame) -> Dict[str, List[str]]:
             col_b = str(row["Column B / Value"]).strip()
             logic = str(row["Logic Type"]).strip().upper() if pd.notna(row["Logic Type"]) else ""
 
+            if op not in COMPARISON_OPERATORS:
+                raise ValueError(f"Unknown operator '{op}' in strategy logic row {idx}")
+
             # Determine if col_b is a value or a column
             if col_b.replace(".", "", 1).isdigit():
                 cond = f"(row['{col_a}'] {op} {col_b})"
@@ -32,16 +178,38 @@ def parse_strategy_logic(df_logic: pd.DataFrame) -> Dict[str, List[str]]:
             if logic in {"AND", "OR"}:
                 expr_parts.append(logic.lower())
             elif logic not in {"", "END"}:
-                print(f"⚠️ Unknown logic type: '{logic}' in row {idx}")
+                raise ValueError(f"Unknown logic type: '{logic}' in strategy logic row {idx}")
 
         # Remove trailing logic operator if present
         if expr_parts and expr_parts[-1] in {"and", "or"}:
             expr_parts = expr_parts[:-1]
 
-        key = f"{rule_type.strip()}_{action_at.strip()}"
-        rule_map[key].append(" ".join(expr_parts))
+        rules.append(CompiledRule(str(rule_type).strip(), str(action_at).strip(), " ".join(expr_parts)))
+
+    return CompiledRules(tuple(rules))
+
+
+def parse_strategy_logic(df_logic: pd.DataFrame) -> Dict[str, List[str]]:
+    """
+    Parse the strategy logic table into a rule map for evaluation.
+    Returns a dict mapping rule keys to lists of condition expressions.
+    """
+    return compile_strategy_logic(df_logic).to_rule_map()
+
 
-    return rule_map
+class SafeRow(dict):
+    """Row mapping that unwraps length-1 Series values and rejects ambiguous ones."""
+
+    def __getitem__(self, key):
+        val = super().__getitem__(key)
+        # Ensure all row[...] are scalars, not Series
+        # If any value is a Series, use .item() if length 1, else fail the rule (counted in DIAGNOSTICS)
+        if isinstance(val, pd.Series):
+            if len(val) == 1:
+                return val.item()
+            else:
+                raise ValueError(f"Ambiguous value for '{key}' in row: Series of length {len(val)}.")
+        return val
 
 
 def evaluate_conditions(row: pd.Series, conditions: List[str]) -> bool:
@@ -50,194 +218,166 @@ def evaluate_conditions(row: pd.Series, conditions: List[str]) -> bool:
     """
     try:
         expr = " ".join(conditions)
-        # Ensure all row[...] are scalars, not Series
-        # If any value is a Series, use .item() if length 1, else warn and skip
-        class SafeRow(dict):
-            def __getitem__(self, key):
-                val = super().__getitem__(key)
-                if isinstance(val, pd.Series):
-                    if len(val) == 1:
-                        return val.item()
-                    else:
-                        print(f"[Strategy] Ambiguous value for '{key}' in row: Series of length {len(val)}. Skipping.")
-                        raise ValueError(f"Ambiguous value for '{key}' in row.")
-                return val
-        safe_row = SafeRow(row)
-        return eval(expr, {"row": safe_row})
+        return eval(expr, {"row": SafeRow(row)})
     except Exception as e:
-        print(f"❌ Evaluation error: {e}, expr: {expr}")
+        DIAGNOSTICS.record("Evaluation error", expr, e)
         return False
 
 
-def strategy_from_logic(df: pd.DataFrame, rules: Dict[str, List[str]]) -> pd.DataFrame:
+def _first_exit(safe_row: SafeRow, row: pd.Series, rules: CompiledRules, action: str):
     """
-    Apply strategy logic to a DataFrame and return a DataFrame of trades with PnL and triggers.
+    Check stop loss, then take profit, then exit rules for an open position.
+    Returns (exit_price, stop, take_profit); exit_price is None when nothing triggers.
     """
-    results = []
-    position = None  # None or dict with entry info
-    i = 0
-    while i < len(df):
-        row = df.iloc[i]
+    side = "long" if action == "Buy" else "short"
+    for prefix, stop, take_profit in (
+        (f"StopLoss-{side}", True, False),
+        (f"TakeProfit-{side}", False, True),
+        (f"Exit-{side}", False, False),
+    ):
+        for rule in rules.matching(prefix):
+            if rule.evaluate(safe_row):
+                return row.get(rule.action_at, row["Close"]), stop, take_profit
+    return None, False, False
+
+
+class PositionMachine:
+    """
+    Single-position state machine behind `strategy_from_logic`, fed one row at a time.
+
+    The batch backtest and the streaming engine both step it, so live signals and
+    backtested trades follow exactly the same entry and exit semantics.
+    """
+
+    def __init__(self, rules: CompiledRules):
+        self.rules = rules
+        self.entry_rules = rules.matching("Enter-")
+        self.position = None  # None or dict with entry info
+
+    def step(self, row, index: int):
+        """
+        Process one row (a Series or a mapping with at least Date, Open and Close).
+        Returns the closed trade as a (EntryDate, ExitDate, Action, Entry, Exit,
+        Stop Triggered, Take Profit Triggered, PnL) tuple, or None.
+        """
+        safe_row = SafeRow(row)
         date = row["Date"]
 
         # If no open position, check entry
-        if position is None:
-            action = None
-            entry_field = None
-            entry_price = None
-            entry_triggered = False
-            for rule_key in rules:
-                if rule_key.startswith("Enter-"):
-                    rule_type, entry_field_candidate = rule_key.split("_")
-                    try:
-                        triggered = evaluate_conditions(row, rules[rule_key])
-                    except Exception:
-                        continue
-                    if triggered:
-                        if "Buy" in rule_type:
-                            action = "Buy"
-                        elif "Sell" in rule_type:
-                            action = "Sell"
-                        entry_field = entry_field_candidate
-                        entry_price = row.get(entry_field, row["Open"])
-                        position = {
-                            "Action": action,
-                            "Entry": entry_price,
-                            "EntryDate": date,
-                            "EntryIdx": i,
-                            "EntryField": entry_field,
-                            "Stop": False,
-                            "TakeProfit": False
-                        }
-                        entry_triggered = True
-                        break
-            # After entry, immediately check exit/stop/take profit in the same row
-            if entry_triggered:
-                exit_price = None
-                stop = False
-                take_profit = False
-                # Step 1: Stop loss
-                stop_prefix = "StopLoss-long" if action == "Buy" else "StopLoss-short"
-                for rule_key in rules:
-                    if rule_key.startswith(stop_prefix):
-                        try:
-                            stop_triggered = evaluate_conditions(row, rules[rule_key])
-                            if stop_triggered:
-                                _, action_at = rule_key.split("_", 1)
-                                exit_price = row.get(action_at, row["Close"])
-                                stop = True
-                                break
-                        except Exception:
-                            pass
-                # Step 2: Take profit
-                if not stop:
-                    tp_prefix = "TakeProfit-long" if action == "Buy" else "TakeProfit-short"
-                    for rule_key in rules:
-                        if rule_key.startswith(tp_prefix):
-                            try:
-                                tp_triggered = evaluate_conditions(row, rules[rule_key])
-                                if tp_triggered:
-                                    _, action_at = rule_key.split("_", 1)
-                                    exit_price = row.get(action_at, row["Close"])
-                                    take_profit = True
-                                    break
-                            except Exception:
-                                pass
-                # Step 3: Exit
-                if not stop and not take_profit:
-                    exit_prefix = "Exit-long" if action == "Buy" else "Exit-short"
-                    for rule_key in rules:
-                        if rule_key.startswith(exit_prefix):
-                            try:
-                                exit_triggered = evaluate_conditions(row, rules[rule_key])
-                                if exit_triggered:
-                                    _, action_at = rule_key.split("_", 1)
-                                    exit_price = row.get(action_at, row["Close"])
-                                    break
-                            except Exception:
-                                pass
-                if exit_price is not None:
-                    pnl = (exit_price - entry_price) if action == "Buy" else (entry_price - exit_price)
-                    results.append({
-                        "EntryDate": date,
-                        "ExitDate": date,
+        if self.position is None:
+            for rule in self.entry_rules:
+                if rule.evaluate(safe_row):
+                    action = _entry_action(rule)
+                    self.position = {
                         "Action": action,
-                        "Entry": entry_price,
-                        "Exit": exit_price,
-                        "Stop Triggered": stop,
-                        "Take Profit Triggered": take_profit,
-                        "PnL": pnl
-                    })
-                    position = None
-                    i += 1
-                    continue
-            i += 1
-            continue
-
-        # If position is open, check exit/stop/take profit in current row
-        exit_price = None
-        stop = False
-        take_profit = False
+                        "Entry": row.get(rule.action_at, row["Open"]),
+                        "EntryDate": date,
+                        "EntryIdx": index,
+                        "EntryField": rule.action_at,
+                        "Stop": False,
+                        "TakeProfit": False
+                    }
+                    break
+            # After entry, immediately check exit/stop/take profit in the same row
+            if self.position is None:
+                return None
+
+        # Position is open, check exit/stop/take profit in current row
+        position = self.position
         action = position["Action"]
         entry_price = position["Entry"]
-        entry_date = position["EntryDate"]
-
-        # Step 1: Stop loss
-        stop_prefix = "StopLoss-long" if action == "Buy" else "StopLoss-short"
-        for rule_key in rules:
-            if rule_key.startswith(stop_prefix):
-                try:
-                    stop_triggered = evaluate_conditions(row, rules[rule_key])
-                    if stop_triggered:
-                        _, action_at = rule_key.split("_", 1)
-                        exit_price = row.get(action_at, row["Close"])
-                        stop = True
-                        break
-                except Exception:
-                    pass
-
-        # Step 2: Take profit
-        if not stop:
-            tp_prefix = "TakeProfit-long" if action == "Buy" else "TakeProfit-short"
-            for rule_key in rules:
-                if rule_key.startswith(tp_prefix):
-                    try:
-                        tp_triggered = evaluate_conditions(row, rules[rule_key])
-                        if tp_triggered:
-                            _, action_at = rule_key.split("_", 1)
-                            exit_price = row.get(action_at, row["Close"])
-                            take_profit = True
-                            break
-                    except Exception:
-                        pass
-
-        # Step 3: Exit
-        if not stop and not take_profit:
-            exit_prefix = "Exit-long" if action == "Buy" else "Exit-short"
-            for rule_key in rules:
-                if rule_key.startswith(exit_prefix):
-                    try:
-                        exit_triggered = evaluate_conditions(row, rules[rule_key])
-                        if exit_triggered:
-                            _, action_at = rule_key.split("_", 1)
-                            exit_price = row.get(action_at, row["Close"])
-                            break
-                    except Exception:
-                        pass
+        exit_price, stop, take_profit = _first_exit(safe_row, row, self.rules, action)
 
         # Record trade only if exit_price is not None
-        if exit_price is not None:
-            pnl = (exit_price - entry_price) if action == "Buy" else (entry_price - exit_price)
-            results.append({
-                "EntryDate": entry_date,
-                "ExitDate": date,
-                "Action": action,
-                "Entry": entry_price,
-                "Exit": exit_price,
-                "Stop Triggered": stop,
-                "Take Profit Triggered": take_profit,
-                "PnL": pnl
-            })
-            position = None  # Reset position
-        i += 1
-    return pd.DataFrame(results)
\ No newline at end of file
+        if exit_price is None:
+            return None
+        pnl = (exit_price - entry_price) if action == "Buy" else (entry_price - exit_price)
+        self.position = None  # Reset position
+        return position["EntryDate"], date, action, entry_price, exit_price, stop, take_profit, pnl
+
+
+def strategy_from_logic(df: pd.DataFrame, rules: Union[CompiledRules, Dict[str, List[str]]]) -> TradeLog:
+    """
+    Apply strategy logic to a DataFrame and return a TradeLog of trades with PnL and triggers
+    (call `.to_pandas()` for a DataFrame).
+
+    `rules` is normally a CompiledRules from `compile_strategy_logic`; a rule map from
+    `parse_strategy_logic` is compiled on the fly. When every rule has a mask plan the rules
+    are evaluated once per column (`strategy_from_masks`); otherwise row by row.
+    """
+    if not isinstance(rules, CompiledRules):
+        rules = CompiledRules.from_rule_map(rules)
+    if rules.masks_cover(df):
+        return strategy_from_masks(df, rules, rules.evaluate_frame(df))
+    machine = PositionMachine(rules)
+    results = TradeLogBuilder(len(df))
+    for i in range(len(df)):
+        trade = machine.step(df.iloc[i], i)
+        if trade is not None:
+            results.append(*trade)
+    return results.build()
+
+
+def _entry_action(rule: CompiledRule):
+    if "Buy" in rule.rule_type:
+        return "Buy"
+    if "Sell" in rule.rule_type:
+        return "Sell"
+    return None
+
+
+def strategy_from_masks(df: pd.DataFrame, rules: CompiledRules,
+                        masks: Dict[CompiledRule, np.ndarray]) -> TradeLog:
+    """
+    Same trades as `strategy_from_logic`, driven by precomputed rule masks (from
+    `rules.evaluate_frame(df)`). Instead of stepping every bar, it jumps straight to the
+    next bar where an entry rule fires and then to the next bar where an exit rule fires.
+    """
+    def any_hit(group):
+        if not group:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(np.logical_or.reduce([masks[rule] for rule in group]))
+
+    prices = {}
+
+    def value(column, default, i):
+        column = column if column in df.columns else default
+        if column not in prices:
+            prices[column] = df[column].to_numpy()
+        return prices[column][i]
+
+    entry_rules = rules.matching("Enter-")
+    entry_bars = any_hit(entry_rules)
+    exits = {}
+    for side in ("long", "short"):
+        # Priority order of PositionMachine: stop loss, then take profit, then exit rules
+        ordered = [(rule, stop, take_profit) for prefix, stop, take_profit in (
+            (f"StopLoss-{side}", True, False),
+            (f"TakeProfit-{side}", False, True),
+            (f"Exit-{side}", False, False),
+        ) for rule in rules.matching(prefix)]
+        exits[side] = (ordered, any_hit([rule for rule, _, _ in ordered]))
+
+    dates = df["Date"]
+    results = TradeLogBuilder(len(entry_bars))
+    i = 0
+    while True:
+        k = np.searchsorted(entry_bars, i)
+        if k == len(entry_bars):
+            break
+        i = int(entry_bars[k])
+        rule = next(rule for rule in entry_rules if masks[rule][i])
+        action = _entry_action(rule)
+        entry_price = value(rule.action_at, "Open", i)
+        # The entry bar itself is checked for an exit, as in PositionMachine
+        ordered, exit_bars = exits["long" if action == "Buy" else "short"]
+        k = np.searchsorted(exit_bars, i)
+        if k == len(exit_bars):
+            break  # position still open at the end of the data
+        j = int(exit_bars[k])
+        rule, stop, take_profit = next(item for item in ordered if masks[item[0]][j])
+        exit_price = value(rule.action_at, "Close", j)
+        pnl = (exit_price - entry_price) if action == "Buy" else (entry_price - exit_price)
+        results.append(dates.iat[i], dates.iat[j], action, entry_price, exit_price, stop, take_profit, pnl)
+        i = j + 1
+    return results.build()
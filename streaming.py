@@ -0,0 +1,68 @@
+"""
+Streaming (bar-by-bar) signal engine for paper and live trading.
+
+`StreamingEngine` keeps the indicator state of an IndicatorPlan (see IndicatorStream) and
+the open position of the strategy (see PositionMachine), so each new bar costs O(1) per
+indicator instead of rebuilding every indicator over the full history. Replaying a
+history bar by bar produces the same indicators and trades as `build_indicators` followed
+by `strategy_from_logic`.
+
+Example:
+    engine = StreamingEngine(plan, rules, df.columns, best_params)
+    for bar in feed:  # dicts with at least Date, Open, High, Low, Close
+        event = engine.update(bar)
+        if event.entry:
+            print("entered", event.position)
+        if event.trade is not None:
+            print("closed", event.trade)
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from indicator_builder import IndicatorPlan
+from strategy import CompiledRules, PositionMachine
+from trade_log import TRADE_COLUMNS, TradeLog, TradeLogBuilder
+
+
+@dataclass(frozen=True)
+class BarEvent:
+    """Result of one bar: the row with its indicators, a new entry flag and a closed trade."""
+    index: int
+    row: dict
+    entry: bool
+    position: Optional[dict]
+    trade: Optional[dict]
+
+
+class StreamingEngine:
+    """Incremental indicators plus strategy state for one parameter set."""
+
+    def __init__(self, plan: IndicatorPlan, rules: CompiledRules, columns, param_map: dict):
+        self.indicators = plan.stream(tuple(columns), param_map)
+        self.machine = PositionMachine(rules)
+        self.trades = TradeLogBuilder()
+        self.n_bars = 0
+
+    @property
+    def position(self) -> Optional[dict]:
+        """The open position (entry info), or None when flat."""
+        return self.machine.position
+
+    def update(self, bar: dict) -> BarEvent:
+        """Consume one bar (column -> value, in the plan's column layout)."""
+        index = self.n_bars
+        row = self.indicators.update(bar)
+        was_flat = self.machine.position is None
+        trade = self.machine.step(row, index)
+        self.n_bars += 1
+        # A position opened on this bar, even if it also closed on it
+        entry = was_flat and (self.machine.position is not None or trade is not None)
+        if trade is not None:
+            self.trades.append(*trade)
+            trade = dict(zip(TRADE_COLUMNS, trade))
+        return BarEvent(index=index, row=row, entry=entry, position=self.machine.position, trade=trade)
+
+    def trade_log(self) -> TradeLog:
+        """Every trade closed so far."""
+        return self.trades.build()
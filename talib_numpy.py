@@ -0,0 +1,803 @@
+"""
+Pure-NumPy implementations of the TA-Lib functions used by the Indicator Builder.
+
+Every function takes the same positional inputs and parameters as its TA-Lib namesake,
+returns float64 arrays of the input length and follows TA-Lib's lookback, seeding and
+leading-NaN conventions, so results agree with TA-Lib to floating-point tolerance.
+Rolling windows are evaluated on sliding-window views; recursive smoothers (EMA, Wilder
+smoothing in RSI/ATR/ADX) run through a blocked O(n) linear-recurrence kernel.
+
+NaNs after the leading ones are the exception. The recursive functions, RSI, the DI family,
+MOM, ROC and the arithmetic ones handle them as TA-Lib does. The rolling-window functions
+(SMA, WMA, SUM, VAR, STDDEV, BBANDS, LINEARREG*, TSF) give NaN only while the NaN is inside
+the window, whereas TA-Lib's running sums stay NaN (or drift) for the rest of the series;
+MAX/MIN give NaN for windows holding the NaN, which TA-Lib ignores; TRANGE is NaN on the bar
+after the NaN too.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Largest growth factor allowed inside one recurrence block (keeps relative error ~1e-10)
+_MAX_BLOCK_GROWTH = np.log(1e6)
+
+
+def _as_array(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=float)
+
+
+def _period(value, minimum: int) -> int:
+    period = int(value)
+    if period < minimum:
+        raise ValueError(f"timeperiod must be >= {minimum}, got {value}")
+    return period
+
+
+def _begin_index(*arrays) -> int:
+    """First index where every input is non-NaN (TA-Lib skips leading NaNs)."""
+    valid = np.ones(len(arrays[0]), dtype=bool)
+    for arr in arrays:
+        valid &= ~np.isnan(arr)
+    idx = np.flatnonzero(valid)
+    return int(idx[0]) if len(idx) else len(valid)
+
+
+def _apply(kernel, *inputs, n_outputs: int = 1):
+    """Run kernel on the tail after leading NaNs and pad its outputs back to full length."""
+    arrays = [_as_array(x) for x in inputs]
+    n = len(arrays[0])
+    begin = _begin_index(*arrays)
+    outputs = [np.full(n, np.nan) for _ in range(n_outputs)]
+    if begin < n:
+        results = kernel(*(arr[begin:] for arr in arrays))
+        if n_outputs == 1:
+            results = (results,)
+        for out, res in zip(outputs, results):
+            out[begin:] = res
+    return outputs[0] if n_outputs == 1 else tuple(outputs)
+
+
+def _padded(values: np.ndarray, lookback: int, n: int) -> np.ndarray:
+    """Place `values` (valid from `lookback` on) into a NaN array of length n."""
+    out = np.full(n, np.nan)
+    if lookback < n:
+        out[lookback:] = values[: n - lookback]
+    return out
+
+
+def linear_recurrence(x: np.ndarray, a: float, b: float, y0: float) -> np.ndarray:
+    """
+    Solve y[t] = a * y[t-1] + b * x[t] with y[-1] = y0 in O(n).
+
+    The closed form is evaluated block-wise with cumulative sums; blocks are sized so
+    that a**-block stays bounded, which keeps the result numerically stable.
+    """
+    x = _as_array(x)
+    n = len(x)
+    y = np.empty(n)
+    if n == 0:
+        return y
+    if a == 0:
+        return b * x
+    block = n if a == 1 else max(1, min(n, int(_MAX_BLOCK_GROWTH / -np.log(a))))
+    steps = np.arange(block)
+    decay = a ** (steps + 1)   # a^(j+1)
+    growth = a ** -steps       # a^-j
+    prev = y0
+    for start in range(0, n, block):
+        seg = x[start:start + block]
+        m = len(seg)
+        acc = np.cumsum(seg * growth[:m]) * (b * decay[:m] / a)
+        y[start:start + m] = decay[:m] * prev + acc
+        prev = y[start + m - 1]
+    return y
+
+
+def _rolling(x: np.ndarray, period: int) -> np.ndarray:
+    """(n - period + 1, period) view of all complete windows."""
+    return sliding_window_view(x, period)
+
+
+def _ema_kernel(x: np.ndarray, period: int, k: float) -> np.ndarray:
+    """TA-Lib EMA: seeded with the SMA of the first `period` values."""
+    n = len(x)
+    if n < period:
+        return np.full(n, np.nan)
+    seed = x[:period].mean()
+    tail = linear_recurrence(x[period:], 1.0 - k, k, seed)
+    return _padded(np.concatenate(([seed], tail)), period - 1, n)
+
+
+def _wilder(x: np.ndarray, period: int, seed: float) -> np.ndarray:
+    """Wilder smoothing y = (y_prev * (period - 1) + x) / period, starting from seed."""
+    return linear_recurrence(x, (period - 1) / period, 1.0 / period, seed)
+
+
+def _true_range(high, low, close) -> np.ndarray:
+    """True range from index 1 on (index 0 has no previous close)."""
+    prev_close = close[:-1]
+    return np.maximum.reduce([
+        high[1:] - low[1:],
+        np.abs(high[1:] - prev_close),
+        np.abs(low[1:] - prev_close),
+    ])
+
+
+def _directional_movement(high, low):
+    diff_p = high[1:] - high[:-1]
+    diff_m = low[:-1] - low[1:]
+    plus_dm = np.where((diff_p > 0) & (diff_p > diff_m), diff_p, 0.0)
+    minus_dm = np.where((diff_m > 0) & (diff_p < diff_m), diff_m, 0.0)
+    return plus_dm, minus_dm
+
+
+def _smoothed_sums(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder running sums used by the DI family: the first period-1 values are summed,
+    then S = S - S / period + value for every later bar (output aligned to values[period-1:]).
+    """
+    seed = values[:period - 1].sum()
+    return linear_recurrence(values[period - 1:], (period - 1) / period, 1.0, seed)
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(np.abs(den) > 1e-14, num / den, 0.0)
+
+
+def _di_kernels(high, low, close, period):
+    """Smoothed +DM, -DM and TR from bar `period` on."""
+    plus_dm, minus_dm = _directional_movement(high, low)
+    tr = _true_range(high, low, close)
+    return (_smoothed_sums(plus_dm, period),
+            _smoothed_sums(minus_dm, period),
+            _smoothed_sums(tr, period))
+
+
+# --- Overlap studies -----------------------------------------------------------------
+
+def SMA(real, timeperiod=30):
+    period = _period(timeperiod, 1)
+
+    def kernel(x):
+        if len(x) < period:
+            return np.full(len(x), np.nan)
+        return _padded(_rolling(x, period).mean(axis=1), period - 1, len(x))
+    return _apply(kernel, real)
+
+
+def EMA(real, timeperiod=30):
+    period = _period(timeperiod, 1)
+    return _apply(lambda x: _ema_kernel(x, period, 2.0 / (period + 1)), real)
+
+
+def WMA(real, timeperiod=30):
+    period = _period(timeperiod, 1)
+    weights = np.arange(1, period + 1, dtype=float)
+
+    def kernel(x):
+        if len(x) < period:
+            return np.full(len(x), np.nan)
+        return _padded(_rolling(x, period) @ weights / weights.sum(), period - 1, len(x))
+    return _apply(kernel, real)
+
+
+def _moving_average(x, period, matype):
+    if int(matype) == 0:
+        return SMA(x, period)
+    if int(matype) == 1:
+        return EMA(x, period)
+    if int(matype) == 2:
+        return WMA(x, period)
+    raise ValueError(f"matype {matype} is not supported by the NumPy backend")
+
+
+def BBANDS(real, timeperiod=5, nbdevup=2.0, nbdevdn=2.0, matype=0):
+    period = _period(timeperiod, 2)
+    middle = _moving_average(real, period, matype)
+    std = STDDEV(real, period, 1.0)
+    return middle + float(nbdevup) * std, middle, middle - float(nbdevdn) * std
+
+
+# --- Statistics ----------------------------------------------------------------------
+
+def VAR(real, timeperiod=5, nbdev=1.0):
+    period = _period(timeperiod, 1)
+
+    def kernel(x):
+        if len(x) < period:
+            return np.full(len(x), np.nan)
+        windows = _rolling(x, period)
+        var = (windows ** 2).mean(axis=1) - windows.mean(axis=1) ** 2
+        return _padded(var, period - 1, len(x))
+    return _apply(kernel, real)
+
+
+def STDDEV(real, timeperiod=5, nbdev=1.0):
+    var = VAR(real, _period(timeperiod, 2))
+    # TA-Lib clamps tiny/negative variances (rounding noise) to zero
+    return np.sqrt(np.where(var < 1e-14, 0.0, var)) * float(nbdev)
+
+
+def _linear_regression(real, timeperiod):
+    """Slope and intercept (value at the window start) of a least-squares line per window."""
+    period = _period(timeperiod, 2)
+    t = np.arange(period, dtype=float)
+    t_mean = t.mean()
+    t_centered = t - t_mean
+    denom = (t_centered ** 2).sum()
+
+    def kernel(x):
+        if len(x) < period:
+            nan = np.full(len(x), np.nan)
+            return nan, nan
+        windows = _rolling(x, period)
+        slope = windows @ t_centered / denom
+        intercept = windows.mean(axis=1) - slope * t_mean
+        return _padded(slope, period - 1, len(x)), _padded(intercept, period - 1, len(x))
+    return _apply(kernel, real, n_outputs=2), period
+
+
+def LINEARREG(real, timeperiod=14):
+    (slope, intercept), period = _linear_regression(real, timeperiod)
+    return intercept + slope * (period - 1)
+
+
+def LINEARREG_SLOPE(real, timeperiod=14):
+    (slope, _), _ = _linear_regression(real, timeperiod)
+    return slope
+
+
+def LINEARREG_INTERCEPT(real, timeperiod=14):
+    (_, intercept), _ = _linear_regression(real, timeperiod)
+    return intercept
+
+
+def LINEARREG_ANGLE(real, timeperiod=14):
+    (slope, _), _ = _linear_regression(real, timeperiod)
+    return np.degrees(np.arctan(slope))
+
+
+def TSF(real, timeperiod=14):
+    (slope, intercept), period = _linear_regression(real, timeperiod)
+    return intercept + slope * period
+
+
+# --- Math operators ------------------------------------------------------------------
+
+def _window_reduce(reducer, default_period, minimum=2):
+    def func(real, timeperiod=default_period):
+        period = _period(timeperiod, minimum)
+
+        def kernel(x):
+            if len(x) < period:
+                return np.full(len(x), np.nan)
+            return _padded(reducer(_rolling(x, period), axis=1), period - 1, len(x))
+        return _apply(kernel, real)
+    return func
+
+
+MAX = _window_reduce(np.max, 30)
+MIN = _window_reduce(np.min, 30)
+SUM = _window_reduce(np.sum, 30)
+
+
+def ADD(real0, real1):
+    return _as_array(real0) + _as_array(real1)
+
+
+def SUB(real0, real1):
+    return _as_array(real0) - _as_array(real1)
+
+
+def MULT(real0, real1):
+    return _as_array(real0) * _as_array(real1)
+
+
+def DIV(real0, real1):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _as_array(real0) / _as_array(real1)
+
+
+# --- Momentum ------------------------------------------------------------------------
+
+def MOM(real, timeperiod=10):
+    period = _period(timeperiod, 1)
+    return _apply(lambda x: _padded(x[period:] - x[:-period], period, len(x)), real)
+
+
+def ROC(real, timeperiod=10):
+    period = _period(timeperiod, 1)
+
+    def kernel(x):
+        prev = x[:-period]
+        roc = np.where(prev != 0, (x[period:] / np.where(prev != 0, prev, 1.0) - 1.0) * 100.0, 0.0)
+        return _padded(roc, period, len(x))
+    return _apply(kernel, real)
+
+
+def RSI(real, timeperiod=14):
+    period = _period(timeperiod, 2)
+
+    def kernel(x):
+        n = len(x)
+        if n <= period:
+            return np.full(n, np.nan)
+        diff = np.diff(x)
+        gains = np.maximum(diff, 0.0)
+        losses = np.maximum(-diff, 0.0)
+        avg_gain = _wilder(gains[period:], period, gains[:period].mean())
+        avg_loss = _wilder(losses[period:], period, losses[:period].mean())
+        avg_gain = np.concatenate(([gains[:period].mean()], avg_gain))
+        avg_loss = np.concatenate(([losses[:period].mean()], avg_loss))
+        rsi = _ratio(100.0 * avg_gain, avg_gain + avg_loss)
+        return _padded(rsi, period, n)
+    return _apply(kernel, real)
+
+
+def MACD(real, fastperiod=12, slowperiod=26, signalperiod=9):
+    fast = _period(fastperiod, 2)
+    slow = _period(slowperiod, 2)
+    signal = _period(signalperiod, 1)
+    if slow < fast:
+        fast, slow = slow, fast
+
+    def kernel(x):
+        n = len(x)
+        lookback = slow - 1 + signal - 1
+        if n <= lookback:
+            nan = np.full(n, np.nan)
+            return nan, nan, nan
+        # TA-Lib seeds the fast EMA on the window ending where the slow EMA starts
+        fast_ema = _padded(_ema_kernel(x[slow - fast:], fast, 2.0 / (fast + 1))[fast - 1:], slow - 1, n)
+        slow_ema = _ema_kernel(x, slow, 2.0 / (slow + 1))
+        macd = fast_ema - slow_ema
+        if signal == 1:
+            signal_line = macd[slow - 1:].copy()
+        else:
+            signal_line = _ema_kernel(macd[slow - 1:], signal, 2.0 / (signal + 1))
+        signal_line = _padded(signal_line, slow - 1, n)
+        macd[:lookback] = np.nan
+        signal_line[:lookback] = np.nan
+        return macd, signal_line, macd - signal_line
+    return _apply(kernel, real, n_outputs=3)
+
+
+# --- Volatility ----------------------------------------------------------------------
+
+def TRANGE(high, low, close):
+    return _apply(lambda h, l, c: _padded(_true_range(h, l, c), 1, len(h)), high, low, close)
+
+
+def ATR(high, low, close, timeperiod=14):
+    period = _period(timeperiod, 1)
+
+    def kernel(h, l, c):
+        n = len(h)
+        if n <= period:
+            return np.full(n, np.nan)
+        tr = _true_range(h, l, c)
+        if period == 1:
+            return _padded(tr, 1, n)
+        seed = tr[:period].mean()
+        atr = np.concatenate(([seed], _wilder(tr[period:], period, seed)))
+        return _padded(atr, period, n)
+    return _apply(kernel, high, low, close)
+
+
+def NATR(high, low, close, timeperiod=14):
+    atr = ATR(high, low, close, timeperiod)
+    if _period(timeperiod, 1) == 1:
+        # TA-Lib returns the raw true range for period 1, not normalized by close
+        return atr
+    close = _as_array(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(close != 0, 100.0 * atr / close, 0.0)
+
+
+# --- Directional movement ------------------------------------------------------------
+
+def _di_one(high, low, close, plus: bool):
+    """TA-Lib's period-1 DI: the bar's directional movement over its true range, as a fraction."""
+    def kernel(h, l, c):
+        plus_dm, minus_dm = _directional_movement(h, l)
+        return _padded(_ratio(plus_dm if plus else minus_dm, _true_range(h, l, c)), 1, len(h))
+    return _apply(kernel, high, low, close)
+
+
+def PLUS_DI(high, low, close, timeperiod=14):
+    period = _period(timeperiod, 1)
+    if period == 1:
+        return _di_one(high, low, close, plus=True)
+
+    def kernel(h, l, c):
+        n = len(h)
+        if n <= period:
+            return np.full(n, np.nan)
+        plus, _, tr = _di_kernels(h, l, c, period)
+        return _padded(_ratio(100.0 * plus, tr), period, n)
+    return _apply(kernel, high, low, close)
+
+
+def MINUS_DI(high, low, close, timeperiod=14):
+    period = _period(timeperiod, 1)
+    if period == 1:
+        return _di_one(high, low, close, plus=False)
+
+    def kernel(h, l, c):
+        n = len(h)
+        if n <= period:
+            return np.full(n, np.nan)
+        _, minus, tr = _di_kernels(h, l, c, period)
+        return _padded(_ratio(100.0 * minus, tr), period, n)
+    return _apply(kernel, high, low, close)
+
+
+def _dx(plus, minus, tr):
+    """DX per bar and a mask of bars where TA-Lib actually produces a new value."""
+    plus_di = _ratio(100.0 * plus, tr)
+    minus_di = _ratio(100.0 * minus, tr)
+    total = plus_di + minus_di
+    valid = (np.abs(tr) > 1e-14) & (np.abs(total) > 1e-14)
+    return _ratio(100.0 * np.abs(minus_di - plus_di), total), valid
+
+
+def DX(high, low, close, timeperiod=14):
+    period = _period(timeperiod, 2)
+
+    def kernel(h, l, c):
+        n = len(h)
+        if n <= period:
+            return np.full(n, np.nan)
+        dx, valid = _dx(*_di_kernels(h, l, c, period))
+        if not valid.all():
+            # TA-Lib repeats the previous DX when the ratio is undefined
+            idx = np.where(valid, np.arange(len(dx)), 0)
+            np.maximum.accumulate(idx, out=idx)
+            dx = np.where(valid[idx], dx[idx], 0.0)
+        return _padded(dx, period, n)
+    return _apply(kernel, high, low, close)
+
+
+def ADX(high, low, close, timeperiod=14):
+    period = _period(timeperiod, 2)
+
+    def kernel(h, l, c):
+        n = len(h)
+        lookback = 2 * period - 1
+        if n <= lookback:
+            return np.full(n, np.nan)
+        dx, valid = _dx(*_di_kernels(h, l, c, period))
+        dx = np.where(valid, dx, 0.0)
+        seed = dx[:period].sum() / period
+        rest = dx[period:]
+        if valid[period:].all():
+            adx = _wilder(rest, period, seed)
+        else:
+            # Bars with an undefined DX leave ADX unchanged, which breaks the linear form
+            adx = np.empty(len(rest))
+            prev = seed
+            for i, (value, ok) in enumerate(zip(rest, valid[period:])):
+                if ok:
+                    prev = (prev * (period - 1) + value) / period
+                adx[i] = prev
+        return _padded(np.concatenate(([seed], adx)), lookback, n)
+    return _apply(kernel, high, low, close)
+
+
+FUNCTIONS = {
+    "SMA": SMA,
+    "EMA": EMA,
+    "WMA": WMA,
+    "BBANDS": BBANDS,
+    "VAR": VAR,
+    "STDDEV": STDDEV,
+    "LINEARREG": LINEARREG,
+    "LINEARREG_SLOPE": LINEARREG_SLOPE,
+    "LINEARREG_INTERCEPT": LINEARREG_INTERCEPT,
+    "LINEARREG_ANGLE": LINEARREG_ANGLE,
+    "TSF": TSF,
+    "MAX": MAX,
+    "MIN": MIN,
+    "SUM": SUM,
+    "ADD": ADD,
+    "SUB": SUB,
+    "MULT": MULT,
+    "DIV": DIV,
+    "MOM": MOM,
+    "ROC": ROC,
+    "RSI": RSI,
+    "MACD": MACD,
+    "TRANGE": TRANGE,
+    "ATR": ATR,
+    "NATR": NATR,
+    "PLUS_DI": PLUS_DI,
+    "MINUS_DI": MINUS_DI,
+    "DX": DX,
+    "ADX": ADX,
+}
+
+
+# --- Parameter sweeps ----------------------------------------------------------------
+#
+# A sweep evaluates one function for many values of one parameter in a single pass and
+# returns one (len(values), n) matrix per output, row i holding the result for values[i].
+
+def matrix_recurrence(x: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise y[r, t] = a[r] * y[r, t-1] + b[r] * x[r, t] with y[r, -1] = 0, blocked like linear_recurrence."""
+    x = np.asarray(x, dtype=float)
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    n_rows, n = x.shape
+    y = np.empty((n_rows, n))
+    direct = a == 0
+    y[direct] = b[direct, None] * x[direct]
+    rows = np.flatnonzero(~direct)
+    if n == 0 or len(rows) == 0:
+        return y
+    a_r, b_r = a[rows, None], b[rows, None]
+    shrink = -np.log(a_r.min()) if a_r.min() < 1 else 0.0
+    block = n if shrink == 0 else max(1, min(n, int(_MAX_BLOCK_GROWTH / shrink)))
+    steps = np.arange(block)
+    decay = a_r ** (steps + 1)
+    growth = a_r ** -steps
+    prev = np.zeros((len(rows), 1))
+    for start in range(0, n, block):
+        seg = x[rows, start:start + block]
+        m = seg.shape[1]
+        acc = np.cumsum(seg * growth[:, :m], axis=1) * (b_r * decay[:, :m] / a_r)
+        out = decay[:, :m] * prev + acc
+        y[rows, start:start + m] = out
+        prev = out[:, -1:]
+    return y
+
+
+def _seeded_recurrence(x: np.ndarray, starts: np.ndarray, seeds: np.ndarray,
+                       a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Row r: y = seeds[r] at starts[r], then y[t] = a[r] * y[t-1] + b[r] * x[t]; NaN before starts[r].
+    The seed is injected as an impulse x = seed / b so every row shares one recurrence.
+    """
+    n = len(x)
+    cols = np.arange(n)
+    impulses = np.where(cols[None, :] > starts[:, None], x[None, :], 0.0)
+    impulses[np.arange(len(starts)), starts] = seeds / b
+    y = matrix_recurrence(impulses, a, b)
+    y[cols[None, :] < starts[:, None]] = np.nan
+    return y
+
+
+def _sweep_apply(kernel, inputs, n_outputs=1):
+    """Matrix counterpart of _apply: kernel works on the tail after leading NaNs."""
+    arrays = [_as_array(x) for x in inputs]
+    n = len(arrays[0])
+    begin = _begin_index(*arrays)
+    results = kernel(*(arr[begin:] for arr in arrays))
+    if n_outputs == 1:
+        results = (results,)
+    outputs = []
+    for res in results:
+        out = np.full((res.shape[0], n), np.nan)
+        out[:, begin:] = res
+        outputs.append(out)
+    return tuple(outputs)
+
+
+def _periods(values, minimum: int) -> np.ndarray:
+    return np.asarray([_period(v, minimum) for v in values], dtype=int)
+
+
+def _window_moments(x: np.ndarray, periods: np.ndarray):
+    """
+    Rolling sums of x - ref and (x - ref)**2 for every period, plus ref per bar.
+
+    Cumulative sums restart on overlapping blocks of 2*B bars (B >= longest period), each
+    centred on its first value, so the differences stay as precise as a direct window sum
+    however long the series is. Entries before each period's lookback are NaN.
+    """
+    n = len(x)
+    block = max(int(periods.max(initial=1)), 64)
+    n_blocks = -(-n // block)
+    padded = np.concatenate((np.zeros(block), x, np.zeros(n_blocks * block - n)))
+    refs = x[np.minimum(np.arange(n_blocks) * block, n - 1)]
+    segments = sliding_window_view(padded, 2 * block)[::block][:n_blocks] - refs[:, None]
+    zeros = np.zeros((n_blocks, 1))
+    cs1 = np.concatenate((zeros, np.cumsum(segments, axis=1)), axis=1)
+    cs2 = np.concatenate((zeros, np.cumsum(segments ** 2, axis=1)), axis=1)
+    cols = np.arange(n)
+    blk = cols // block
+    end = block + cols % block + 1
+    begin = end[None, :] - periods[:, None]
+    sums = cs1[blk, end][None, :] - cs1[blk[None, :], begin]
+    squares = cs2[blk, end][None, :] - cs2[blk[None, :], begin]
+    early = cols[None, :] < periods[:, None] - 1
+    sums[early] = np.nan
+    squares[early] = np.nan
+    return sums, squares, refs[blk]
+
+
+def _sweep_sum(x, periods):
+    sums, _, ref = _window_moments(x, periods)
+    return sums + periods[:, None] * ref[None, :]
+
+
+def _sweep_sma(x, periods):
+    sums, _, ref = _window_moments(x, periods)
+    return sums / periods[:, None] + ref[None, :]
+
+
+def _sweep_var(x, periods):
+    sums, squares, _ = _window_moments(x, periods)
+    return squares / periods[:, None] - (sums / periods[:, None]) ** 2
+
+
+def _sweep_std(x, periods):
+    var = _sweep_var(x, periods)
+    return np.sqrt(np.where(var < 1e-14, 0.0, var))
+
+
+def _sweep_ema(x, periods):
+    n = len(x)
+    ok = periods <= n
+    out = np.full((len(periods), n), np.nan)
+    if ok.any():
+        p = periods[ok]
+        k = 2.0 / (p + 1)
+        seeds = (np.concatenate(([0.0], np.cumsum(x)))[p]) / p
+        out[ok] = _seeded_recurrence(x, p - 1, seeds, 1.0 - k, k)
+    return out
+
+
+def _sweep_wilder(values, periods, offset, n):
+    """Wilder averages of `values` (aligned to bar `offset`) seeded with the mean of the first `period`."""
+    out = np.full((len(periods), n), np.nan)
+    ok = periods <= len(values)
+    if ok.any():
+        p = periods[ok]
+        seeds = np.concatenate(([0.0], np.cumsum(values)))[p] / p
+        out[ok, offset:] = _seeded_recurrence(values, p - 1, seeds, (p - 1) / p, 1.0 / p)
+    return out
+
+
+def _sweep_window_extreme(x, periods, reducer):
+    """Rolling max/min for every period from one sparse table of power-of-two windows."""
+    n = len(x)
+    out = np.full((len(periods), n), np.nan)
+    levels = [x]
+    while (1 << len(levels)) <= periods.max(initial=1):
+        prev, width = levels[-1], 1 << (len(levels) - 1)
+        levels.append(reducer(prev[:-width], prev[width:]) if len(prev) > width else prev[:0])
+    cols = np.arange(n)
+    for r, p in enumerate(periods):
+        if p > n:
+            continue
+        k = int(np.log2(p))
+        table = levels[k]
+        t = cols[p - 1:]
+        out[r, p - 1:] = reducer(table[t - p + 1], table[t - (1 << k) + 1])
+    return out
+
+
+def _sweep_shift(x, periods, op):
+    n = len(x)
+    out = np.full((len(periods), n), np.nan)
+    for r, p in enumerate(periods):
+        if p < n:
+            out[r, p:] = op(x[p:], x[:-p])
+    return out
+
+
+def _roc(cur, prev):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(prev != 0, (cur / np.where(prev != 0, prev, 1.0) - 1.0) * 100.0, 0.0)
+
+
+def _sweep_rsi(x, periods):
+    n = len(x)
+    diff = np.diff(x)
+    avg_gain = _sweep_wilder(np.maximum(diff, 0.0), periods, 1, n)
+    avg_loss = _sweep_wilder(np.maximum(-diff, 0.0), periods, 1, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = avg_gain + avg_loss
+        rsi = np.where(np.abs(total) > 1e-14, 100.0 * avg_gain / total, 0.0)
+    return np.where(np.isnan(avg_gain), np.nan, rsi)
+
+
+def _sweep_atr(h, l, c, periods):
+    n = len(h)
+    tr = _true_range(h, l, c)
+    return _sweep_wilder(tr, periods, 1, n)
+
+
+def _bbands_devs(real, params, values, positions):
+    """BBANDS sweep over nbdevup and/or nbdevdn: the bands are linear in the deviations."""
+    middle = _moving_average(real, _period(params[0], 2), params[3])
+    std = STDDEV(real, params[0], 1.0)
+    devs = np.asarray([float(v) for v in values])
+    up = float(params[1]) * np.ones_like(devs) if 1 not in positions else devs
+    dn = float(params[2]) * np.ones_like(devs) if 2 not in positions else devs
+    return (middle[None, :] + up[:, None] * std[None, :],
+            np.repeat(middle[None, :], len(devs), axis=0),
+            middle[None, :] - dn[:, None] * std[None, :])
+
+
+def _bbands_periods(real, params, values):
+    if int(params[3]) != 0:
+        raise ValueError("BBANDS period sweeps support matype 0 only")
+    periods = _periods(values, 2)
+    middle, std = _sweep_apply(lambda x: (_sweep_sma(x, periods), _sweep_std(x, periods)), [real], 2)
+    return middle + float(params[1]) * std, middle, middle - float(params[2]) * std
+
+
+def _with_defaults(params, defaults):
+    return list(params) + list(defaults[len(params):])
+
+
+def _single_period(sweep_kernel, minimum, n_inputs=1):
+    def kernel(inputs, params, values):
+        periods = _periods(values, minimum)
+        return _sweep_apply(lambda *arrays: sweep_kernel(*arrays, periods), inputs[:n_inputs])
+    return kernel
+
+
+def _stddev_kernel(inputs, params, values, positions):
+    params = _with_defaults(params, (5, 1.0))
+    if positions == (1,):
+        base = STDDEV(inputs[0], params[0], 1.0)
+        return (np.asarray([float(v) for v in values])[:, None] * base[None, :],)
+    periods = _periods(values, 2)
+    (std,) = _sweep_apply(lambda x: _sweep_std(x, periods), inputs[:1])
+    return (std * float(params[1]),)
+
+
+def _bbands_kernel(inputs, params, values, positions):
+    params = _with_defaults(params, (5, 2.0, 2.0, 0))
+    if positions == (0,):
+        return _bbands_periods(inputs[0], params, values)
+    if set(positions) <= {1, 2}:
+        return _bbands_devs(inputs[0], params, values, positions)
+    raise ValueError("unsupported BBANDS sweep")
+
+
+_PERIOD_SWEEPS = {
+    "SMA": _single_period(_sweep_sma, 1),
+    "SUM": _single_period(_sweep_sum, 2),
+    "VAR": _single_period(_sweep_var, 1),
+    "EMA": _single_period(_sweep_ema, 1),
+    "RSI": _single_period(_sweep_rsi, 2),
+    "ATR": _single_period(_sweep_atr, 1, n_inputs=3),
+    "MAX": _single_period(lambda x, p: _sweep_window_extreme(x, p, np.maximum), 2),
+    "MIN": _single_period(lambda x, p: _sweep_window_extreme(x, p, np.minimum), 2),
+    "MOM": _single_period(lambda x, p: _sweep_shift(x, p, np.subtract), 1),
+    "ROC": _single_period(lambda x, p: _sweep_shift(x, p, _roc), 1),
+}
+
+
+def sweep(name: str, inputs, params, positions, values):
+    """
+    Evaluate TA-Lib function `name` once for all `values` of one parameter.
+
+    Args:
+        name: TA-Lib function name.
+        inputs: Input arrays in TA-Lib order.
+        params: Positional parameters; the entries at `positions` are replaced by each value.
+        positions: Parameter positions that take the swept value (e.g. (1, 2) for both
+            BBANDS deviations).
+        values: Candidate values of the swept parameter.
+
+    Returns:
+        Tuple of (len(values), n) matrices, one per function output, or None when no
+        vectorized sweep exists for this function/parameter (callers then fall back to
+        evaluating the function per value).
+    """
+    positions = tuple(sorted(positions))
+    try:
+        if name == "STDDEV" and positions in ((0,), (1,)):
+            return _stddev_kernel(inputs, params, values, positions)
+        if name == "BBANDS":
+            return _bbands_kernel(inputs, params, values, positions)
+        if name in _PERIOD_SWEEPS and positions == (0,):
+            return _PERIOD_SWEEPS[name](inputs, params, values)
+    except ValueError:
+        return None
+    return None
@@ -0,0 +1,390 @@
+"""
+Incremental (bar-by-bar) versions of TA-Lib functions for the streaming engine.
+
+Each kernel is fed one bar at a time and returns the value TA-Lib would produce for that
+bar when run over the whole history, at O(1) cost per bar: running sums for SMA/SUM/VAR/
+STDDEV/BBANDS/WMA, the EMA and Wilder recursions for EMA/RSI/ATR, and monotonic deques for
+MAX/MIN. Kernels follow TA-Lib's seeding, lookback and zero thresholds, so replayed history
+agrees with TA-Lib's batch output to floating-point tolerance (exactly for SMA, SUM, EMA,
+MAX, MIN, MOM, ROC, TRANGE and the math operators).
+
+Like the TA-Lib Python wrapper, a kernel ignores bars until every input is non-NaN; those
+bars return NaN.
+"""
+
+import math
+from collections import deque
+
+_NAN = float("nan")
+# TA-Lib's TA_IS_ZERO / TA_IS_ZERO_OR_NEG thresholds
+_EPSILON = 0.00000001
+
+
+def _period(value, minimum: int) -> int:
+    period = int(value)
+    if period < minimum:
+        raise ValueError(f"timeperiod must be >= {minimum}, got {value}")
+    return period
+
+
+class _Kernel:
+    """Base class: gates on the first all-non-NaN bar, then delegates to `_step`."""
+
+    n_outputs = 1
+
+    def __init__(self):
+        self._started = False
+
+    def update(self, *inputs):
+        if not self._started:
+            if any(math.isnan(x) for x in inputs):
+                return _NAN if self.n_outputs == 1 else (_NAN,) * self.n_outputs
+            self._started = True
+        return self._step(*inputs)
+
+    def _step(self, *inputs):
+        raise NotImplementedError
+
+
+class SUM(_Kernel):
+    """Running total over the last `timeperiod` values."""
+
+    minimum_period = 1
+
+    def __init__(self, timeperiod=30):
+        super().__init__()
+        self.period = _period(timeperiod, self.minimum_period)
+        self.window = deque()
+        self.total = 0.0
+
+    def _total(self, x):
+        self.window.append(x)
+        self.total += x
+        if len(self.window) < self.period:
+            return _NAN
+        value = self.total
+        self.total -= self.window.popleft()
+        return value
+
+    def _step(self, x):
+        return self._total(x)
+
+
+class SMA(SUM):
+    def _step(self, x):
+        return self._total(x) / self.period
+
+
+class EMA(_Kernel):
+    def __init__(self, timeperiod=30):
+        super().__init__()
+        self.period = _period(timeperiod, 1)
+        self.k = 2.0 / (self.period + 1)
+        self.count = 0
+        self.prev = 0.0
+
+    def _step(self, x):
+        self.count += 1
+        if self.count <= self.period:
+            # Seeded with the simple average of the first `period` values
+            self.prev += x
+            if self.count < self.period:
+                return _NAN
+            self.prev = self.prev / self.period
+            return self.prev
+        self.prev = ((x - self.prev) * self.k) + self.prev
+        return self.prev
+
+
+class WMA(_Kernel):
+    def __init__(self, timeperiod=30):
+        super().__init__()
+        self.period = _period(timeperiod, 1)
+        self.divider = (self.period * (self.period + 1)) >> 1
+        self.window = deque()
+        self.period_sum = 0.0
+        self.period_sub = 0.0
+        self.trailing = 0.0
+
+    def _step(self, x):
+        if self.period == 1:
+            return x
+        n = len(self.window)
+        if n < self.period - 1:
+            self.window.append(x)
+            self.period_sub += x
+            self.period_sum += x * (n + 1)
+            return _NAN
+        self.period_sub += x
+        self.period_sub -= self.trailing
+        self.period_sum += x * self.period
+        self.trailing = self.window.popleft()
+        self.window.append(x)
+        value = self.period_sum / self.divider
+        self.period_sum -= self.period_sub
+        return value
+
+
+class _Extreme(_Kernel):
+    """Rolling MAX/MIN over a monotonic deque of (index, value)."""
+
+    def __init__(self, timeperiod=30):
+        super().__init__()
+        self.period = _period(timeperiod, 2)
+        self.candidates = deque()
+        self.index = -1
+
+    def _dominates(self, new, old) -> bool:
+        raise NotImplementedError
+
+    def _step(self, x):
+        self.index += 1
+        while self.candidates and self._dominates(x, self.candidates[-1][1]):
+            self.candidates.pop()
+        self.candidates.append((self.index, x))
+        if self.candidates[0][0] <= self.index - self.period:
+            self.candidates.popleft()
+        return self.candidates[0][1] if self.index >= self.period - 1 else _NAN
+
+
+class MAX(_Extreme):
+    def _dominates(self, new, old):
+        return new >= old
+
+
+class MIN(_Extreme):
+    def _dominates(self, new, old):
+        return new <= old
+
+
+class _Lagged(_Kernel):
+    def __init__(self, timeperiod=10):
+        super().__init__()
+        self.period = _period(timeperiod, 1)
+        self.window = deque(maxlen=self.period + 1)
+
+    def _step(self, x):
+        self.window.append(x)
+        if len(self.window) <= self.period:
+            return _NAN
+        return self._combine(x, self.window[0])
+
+
+class MOM(_Lagged):
+    def _combine(self, x, prev):
+        return x - prev
+
+
+class ROC(_Lagged):
+    def _combine(self, x, prev):
+        return ((x / prev) - 1.0) * 100.0 if prev != 0.0 else 0.0
+
+
+class VAR(_Kernel):
+    def __init__(self, timeperiod=5, nbdev=1.0):
+        super().__init__()
+        self.period = _period(timeperiod, 1)
+        self.window = deque()
+        self.total1 = 0.0
+        self.total2 = 0.0
+
+    def _step(self, x):
+        self.window.append(x)
+        self.total1 += x
+        self.total2 += x * x
+        if len(self.window) < self.period:
+            return _NAN
+        mean1 = self.total1 / self.period
+        mean2 = self.total2 / self.period
+        trailing = self.window.popleft()
+        self.total1 -= trailing
+        self.total2 -= trailing * trailing
+        return mean2 - mean1 * mean1
+
+
+class STDDEV(VAR):
+    def __init__(self, timeperiod=5, nbdev=1.0):
+        super().__init__(_period(timeperiod, 2))
+        self.nbdev = float(nbdev)
+
+    def _step(self, x):
+        variance = super()._step(x)
+        if math.isnan(variance):
+            return variance
+        if variance < _EPSILON:
+            return 0.0
+        return math.sqrt(variance) * self.nbdev if self.nbdev != 1.0 else math.sqrt(variance)
+
+
+class BBANDS(_Kernel):
+    """Bollinger Bands over a simple moving average (matype 0)."""
+
+    n_outputs = 3
+
+    def __init__(self, timeperiod=5, nbdevup=2.0, nbdevdn=2.0, matype=0):
+        super().__init__()
+        if int(matype) != 0:
+            raise NotImplementedError("only matype 0 (SMA) is incremental")
+        self.period = _period(timeperiod, 2)
+        self.up = float(nbdevup)
+        self.down = float(nbdevdn)
+        self.middle = SMA(self.period)
+        self.window = deque()
+        self.total2 = 0.0
+
+    def _step(self, x):
+        middle = self.middle._step(x)
+        self.window.append(x)
+        self.total2 += x * x
+        if len(self.window) < self.period:
+            return _NAN, _NAN, _NAN
+        mean2 = self.total2 / self.period
+        trailing = self.window.popleft()
+        self.total2 -= trailing * trailing
+        mean2 -= middle * middle
+        std = math.sqrt(mean2) if not mean2 < _EPSILON else 0.0
+        if self.up == self.down:
+            if self.up == 1.0:
+                return middle + std, middle, middle - std
+            dev = std * self.up
+            return middle + dev, middle, middle - dev
+        if self.up == 1.0:
+            return middle + std, middle, middle - std * self.down
+        if self.down == 1.0:
+            return middle + std * self.up, middle, middle - std
+        return middle + std * self.up, middle, middle - std * self.down
+
+
+class RSI(_Kernel):
+    def __init__(self, timeperiod=14):
+        super().__init__()
+        self.period = _period(timeperiod, 2)
+        self.count = 0
+        self.prev_value = 0.0
+        self.prev_gain = 0.0
+        self.prev_loss = 0.0
+
+    def _ratio(self):
+        total = self.prev_gain + self.prev_loss
+        return 100.0 * (self.prev_gain / total) if not (-_EPSILON < total < _EPSILON) else 0.0
+
+    def _step(self, x):
+        count = self.count
+        self.count += 1
+        if count == 0:
+            self.prev_value = x
+            return _NAN
+        diff = x - self.prev_value
+        self.prev_value = x
+        if count <= self.period:
+            if diff < 0:
+                self.prev_loss -= diff
+            else:
+                self.prev_gain += diff
+            if count < self.period:
+                return _NAN
+            self.prev_loss /= self.period
+            self.prev_gain /= self.period
+            return self._ratio()
+        self.prev_loss *= self.period - 1
+        self.prev_gain *= self.period - 1
+        if diff < 0:
+            self.prev_loss -= diff
+        else:
+            self.prev_gain += diff
+        self.prev_loss /= self.period
+        self.prev_gain /= self.period
+        return self._ratio()
+
+
+class TRANGE(_Kernel):
+    def __init__(self):
+        super().__init__()
+        self.prev_close = None
+
+    def _step(self, high, low, close):
+        prev_close, self.prev_close = self.prev_close, close
+        if prev_close is None:
+            return _NAN
+        greatest = high - low
+        val2 = abs(prev_close - high)
+        if val2 > greatest:
+            greatest = val2
+        val3 = abs(prev_close - low)
+        if val3 > greatest:
+            greatest = val3
+        return greatest
+
+
+class ATR(_Kernel):
+    def __init__(self, timeperiod=14):
+        super().__init__()
+        self.period = _period(timeperiod, 1)
+        self.true_range = TRANGE()
+        self.count = 0
+        self.prev = 0.0
+
+    def _step(self, high, low, close):
+        tr = self.true_range._step(high, low, close)
+        if self.period == 1 or math.isnan(tr) and self.count == 0:
+            return tr  # period 1 is the true range itself; the first bar has none
+        self.count += 1
+        if self.count <= self.period:
+            # Seeded with the simple average of the first `period` true ranges
+            self.prev += tr
+            if self.count < self.period:
+                return _NAN
+            self.prev = self.prev / self.period
+            return self.prev
+        self.prev *= self.period - 1
+        self.prev += tr
+        self.prev /= self.period
+        return self.prev
+
+
+class _Pointwise(_Kernel):
+    def update(self, a, b):
+        return self._step(a, b)
+
+
+class ADD(_Pointwise):
+    def _step(self, a, b):
+        return a + b
+
+
+class SUB(_Pointwise):
+    def _step(self, a, b):
+        return a - b
+
+
+class MULT(_Pointwise):
+    def _step(self, a, b):
+        return a * b
+
+
+class DIV(_Pointwise):
+    def _step(self, a, b):
+        if b == 0.0:
+            # IEEE division as in TA-Lib's C code: +-inf, or NaN for 0/0 and NaN/0
+            if a == 0.0 or math.isnan(a):
+                return _NAN
+            return math.copysign(math.inf, a) * math.copysign(1.0, b)
+        return a / b
+
+
+KERNELS = {
+    "SMA": SMA, "EMA": EMA, "WMA": WMA, "SUM": SUM, "MAX": MAX, "MIN": MIN, "MOM": MOM, "ROC": ROC,
+    "VAR": VAR, "STDDEV": STDDEV, "BBANDS": BBANDS, "RSI": RSI, "TRANGE": TRANGE, "ATR": ATR,
+    "ADD": ADD, "SUB": SUB, "MULT": MULT, "DIV": DIV,
+}
+
+
+def make_kernel(name: str, params):
+    """Incremental kernel for TA-Lib function `name` with positional params, or None if unsupported."""
+    factory = KERNELS.get(name)
+    if factory is None:
+        return None
+    try:
+        return factory(*params)
+    except (NotImplementedError, TypeError, ValueError):
+        return None
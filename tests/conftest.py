@@ -0,0 +1,23 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def workbook(relative_path: str) -> str:
+    """Absolute path of a sample workbook under excel/."""
+    return os.path.join(ROOT, "excel", relative_path)
+
+
+@pytest.fixture
+def workbook_copy(tmp_path):
+    """Copy a sample workbook into tmp_path, so runs that write results leave excel/ untouched."""
+    def copy(relative_path: str) -> str:
+        target = tmp_path / os.path.basename(relative_path)
+        shutil.copy(workbook(relative_path), target)
+        return str(target)
+    return copy
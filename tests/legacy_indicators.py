@@ -0,0 +1,131 @@
+"""
+The two indicator build paths as they were before the compiled IndicatorPlan, kept as the
+reference the parity tests compare against: the load-time build of excel_io.read_dashboard_inputs
+and the optimizer's build_indicators. Both need TA-Lib.
+"""
+
+import talib
+
+
+def _operand(df, param_map, val_or_param):
+    val = param_map.get(str(val_or_param), val_or_param)
+    if str(val) in df.columns:
+        return df[str(val)]
+    try:
+        return float(val)
+    except Exception:
+        return None
+
+
+def _step(left, op, operand):
+    if op == "+":
+        return left + operand
+    if op == "-":
+        return left - operand
+    if op == "*":
+        return left * operand
+    if op == "/":
+        return left / operand
+    if op == "**":
+        return left ** operand
+    return None
+
+
+def _talib_rows(df, param_map, talib_df, cast):
+    for _, row in talib_df.iterrows():
+        name = row.get("TA-Lib Name")
+        func = row.get("TA-Lib Function")
+        in_col = row.get("In order Indicators")
+        param_str = row.get("In order Param")
+        if not (name and func):
+            continue
+        input_cols = [c.strip() for c in str(in_col).split(",") if c.strip()] if in_col else []
+        if not (input_cols and all(c in df.columns for c in input_cols)):
+            continue
+        param_keys = [p.strip() for p in str(param_str).split(",") if p.strip()] if param_str else []
+        param_vals = [cast(param_map.get(k, k)) for k in param_keys]
+        try:
+            out = getattr(talib, func)(*[df[c] for c in input_cols], *param_vals)
+        except Exception:
+            continue
+        out_names = [n.strip() for n in name.split(",")]
+        if isinstance(out, (tuple, list)) and len(out_names) == len(out):
+            for n, o in zip(out_names, out):
+                df[n] = o
+        elif hasattr(out, "__len__") and len(out) == len(df):
+            df[name] = out
+
+
+def _load_cast(value):
+    # Load time truncated every numeric parameter to int
+    try:
+        return int(float(value))
+    except Exception:
+        try:
+            return float(value)
+        except Exception:
+            return value
+
+
+def _trial_cast(value):
+    # The optimizer passed every numeric parameter as float
+    try:
+        return float(value)
+    except Exception:
+        return value
+
+
+def load_time_indicators(market_df, param_map, builder_df, talib_df):
+    """Indicators as read_dashboard_inputs built them: a step combines by its own Combination."""
+    market_df = market_df.copy()
+    for name, group in builder_df.groupby("Indicator Name", sort=False):
+        result = None
+        for _, row in group.iterrows():
+            ind_a, op, val_or_param = row.get("Indicator A"), row.get("Operator"), row.get("Value / Param")
+            comb = str(row.get("Combination", "END")).strip().upper()
+            if not (name and ind_a and op and val_or_param) or str(ind_a) not in market_df.columns:
+                continue
+            operand = _operand(market_df, param_map, val_or_param)
+            if operand is None:
+                continue
+            step = _step(market_df[str(ind_a)], op, operand)
+            if step is None:
+                continue
+            if result is None:
+                result = step
+            elif comb in ("+", "-", "*", "/"):
+                result = _step(result, comb, step)
+        if result is not None:
+            market_df[name] = result
+    _talib_rows(market_df, param_map, talib_df, _load_cast)
+    return market_df
+
+
+def trial_indicators(df, param_map, builder_df, talib_df):
+    """Indicators as the optimizer's build_indicators built them: a step combines by the previous one's."""
+    df = df.copy()
+    for name, group in builder_df.groupby("Indicator Name", sort=False):
+        result = None
+        prev_comb = None
+        for _, row in group.iterrows():
+            ind_a, op, val_or_param = row.get("Indicator A"), row.get("Operator"), row.get("Value / Param")
+            comb = str(row.get("Combination", "END")).strip().upper()
+            if not (ind_a and op and val_or_param) or str(ind_a) not in df.columns:
+                continue
+            operand = _operand(df, param_map, val_or_param)
+            if operand is None:
+                continue
+            step = _step(df[str(ind_a)], op, operand)
+            if step is None:
+                continue
+            if result is None or prev_comb is None or prev_comb == "END":
+                result = step
+            elif prev_comb in ("+", "-", "*", "/", "**"):
+                result = _step(result, prev_comb, step)
+            else:
+                raise ValueError(f"Unknown combination operator: {prev_comb}")
+            prev_comb = comb
+        if result is not None:
+            df[name] = result
+    _talib_rows(df, param_map, talib_df, _trial_cast)
+    return df
@@ -0,0 +1,151 @@
+import functools
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT, workbook
+
+talib = pytest.importorskip("talib")
+
+import legacy_indicators  # noqa: E402
+from excel_io import read_dashboard_inputs, read_market_data  # noqa: E402
+from indicator_builder import build_indicators, compile_indicator_plan  # noqa: E402
+
+WORKBOOKS = sorted(os.path.relpath(p, os.path.join(ROOT, "excel"))
+                   for p in glob.glob(os.path.join(ROOT, "excel", "**", "*.xlsx"), recursive=True)
+                   if not os.path.basename(p).startswith("~$"))
+
+BANDS = {"ShortEnter", "LongEnter", "ShortExit", "LongExit"}
+KELTNER = {"ATRGap", "UpperKeltner", "LowerKeltner"}
+# Columns the load-time build got wrong, which the compiled plan fixes:
+# - BANDS: BBANDS deviations such as 2.5 were truncated to int;
+# - KELTNER: ADD/SUB rows with a blank "In order Param" passed NaN as a parameter and were dropped;
+# - Final_Price: the last term of a chain was dropped (a step combined by its own Combination).
+LOAD_DIFFERENCES = {
+    "Mean Reversion/Close_Reversion_strat_20240703-20250805.xlsx": BANDS,
+    "Mean Reversion/Linear_Reversion_strat_20240703-20250724.xlsx": BANDS,
+    "Mean Reversion/TTM_Squeeze_Reversion_strat_20240703-20250805.xlsx": KELTNER,
+    "Momentum/Combined_Momentum_strat_20240703-20250805.xlsx": BANDS,
+    "Momentum/Noise_Area_Breakout_strat_20240703-20250805.xlsx": BANDS,
+    "ML/simple_strat_20240808-20250724.xlsx": {"Final_Price"},
+    "ML/simple_strat(smooth)_20240808-20250724.xlsx": {"Final_Price"},
+}
+# The optimizer's build only had the blank-parameter bug
+TRIAL_DIFFERENCES = {"Mean Reversion/TTM_Squeeze_Reversion_strat_20240703-20250805.xlsx": KELTNER}
+
+
+@functools.lru_cache(maxsize=None)
+def _inputs(relative_path):
+    return read_market_data(workbook(relative_path)), read_dashboard_inputs(workbook(relative_path))
+
+
+def _differing_columns(new: pd.DataFrame, old: pd.DataFrame) -> set:
+    differing = set(new.columns) ^ set(old.columns)
+    for column in set(new.columns) & set(old.columns) - {"Date"}:
+        a = pd.to_numeric(new[column], errors="coerce").to_numpy(dtype=float)
+        b = pd.to_numeric(old[column], errors="coerce").to_numpy(dtype=float)
+        if not np.allclose(a, b, rtol=1e-12, atol=1e-9, equal_nan=True):
+            differing.add(column)
+    return differing
+
+
+def _trial_params(config, rng):
+    """Initial parameters with the ranged ones drawn from their grids, typed as the optimizer types them."""
+    params = dict(config["param_map"])
+    for name, (low, high, step) in config["param_ranges"].items():
+        value = low + step * rng.integers(0, int(round((high - low) / step)) + 1)
+        params[name] = int(value) if float(step).is_integer() else float(value)
+    return params
+
+
+@pytest.mark.parametrize("relative_path", WORKBOOKS)
+def test_load_time_build_matches_legacy(relative_path):
+    market_df, config = _inputs(relative_path)
+    legacy = legacy_indicators.load_time_indicators(market_df, config["param_map"], config["indicator_builder"],
+                                                    config["talib_builder"])
+    assert _differing_columns(config["market_data"], legacy) == LOAD_DIFFERENCES.get(relative_path, set())
+
+
+@pytest.mark.parametrize("relative_path", WORKBOOKS)
+def test_optimizer_build_matches_legacy(relative_path):
+    # Raw bars, so columns the load-time build added do not hide the rows under test
+    market_df, config = _inputs(relative_path)
+    plan = config["indicator_plan"]
+    rng = np.random.default_rng(0)
+    for params in [config["param_map"]] + [_trial_params(config, rng) for _ in range(3)]:
+        for window in (market_df, market_df.iloc[10:80]):
+            new = build_indicators(window, params, plan=plan)
+            old = legacy_indicators.trial_indicators(window, params, config["indicator_builder"],
+                                                     config["talib_builder"])
+            assert _differing_columns(new, old) == TRIAL_DIFFERENCES.get(relative_path, set()), params
+
+
+def _builder(rows):
+    return pd.DataFrame(rows, columns=["Indicator Name", "Indicator A", "Operator", "Value / Param", "Combination"])
+
+
+def _talib(rows):
+    return pd.DataFrame(rows, columns=["TA-Lib Name", "TA-Lib Function", "In order Indicators", "In order Param"])
+
+
+def _bars(n=40):
+    close = 100 + np.random.default_rng(1).normal(size=n).cumsum()
+    return pd.DataFrame({"Close": close, "High": close + 1, "Low": close - 1})
+
+
+def _build_both_ways(builder_df, talib_df, params):
+    df = _bars()
+    plan = compile_indicator_plan(builder_df, talib_df)
+    return (df, plan.evaluate(df, params), build_indicators(df, params, plan=plan),
+            legacy_indicators.load_time_indicators(df, params, builder_df, talib_df),
+            legacy_indicators.trial_indicators(df, params, builder_df, talib_df))
+
+
+def test_chain_combines_by_previous_step():
+    # X = (Close * K) + (Close * 3), then * (High - Low); the load-time build dropped the last term
+    builder_df = _builder([("X", "Close", "*", "K", "+"), ("X", "Close", "*", 3, "*"),
+                           ("X", "High", "-", "Low", "END")])
+    df, load, trial, legacy_load, legacy_trial = _build_both_ways(builder_df, _talib([]), {"K": 2})
+    expected = (df["Close"] * 2 + df["Close"] * 3) * (df["High"] - df["Low"])
+    np.testing.assert_allclose(load["X"], expected)
+    np.testing.assert_allclose(trial["X"], expected)
+    np.testing.assert_allclose(legacy_trial["X"], expected)
+    np.testing.assert_allclose(legacy_load["X"], df["Close"] * 2 * (df["Close"] * 3))
+
+
+def test_end_restarts_the_chain():
+    builder_df = _builder([("X", "Close", "+", 1, "END"), ("X", "High", "*", 2, "END")])
+    df, load, trial, _, legacy_trial = _build_both_ways(builder_df, _talib([]), {})
+    for frame in (load, trial, legacy_trial):
+        np.testing.assert_allclose(frame["X"], df["High"] * 2)
+
+
+def test_blank_talib_parameters_are_omitted():
+    talib_df = _talib([("S", "ADD", "High, Low", np.nan), ("D", "SUB", "High, Low", "")])
+    df, load, trial, legacy_load, legacy_trial = _build_both_ways(_builder([]), talib_df, {})
+    for frame in (load, trial):
+        np.testing.assert_allclose(frame["S"], df["High"] + df["Low"])
+        np.testing.assert_allclose(frame["D"], df["High"] - df["Low"])
+    # A blank cell used to become a NaN argument, and ADD failed silently
+    assert "S" not in legacy_load and "S" not in legacy_trial
+
+
+def test_nan_parameter_values_propagate():
+    builder_df = _builder([("X", "Close", "+", "P", "END")])
+    _, load, trial, legacy_load, legacy_trial = _build_both_ways(builder_df, _talib([]), {"P": np.nan})
+    for frame in (load, trial, legacy_load, legacy_trial):
+        assert frame["X"].isna().all()
+
+
+def test_integral_parameters_are_int_and_others_float():
+    talib_df = _talib([("U, M, L", "BBANDS", "Close", "Per, Dev, Dev"), ("E", "EMA", "Close", "Per")])
+    df, load, trial, legacy_load, legacy_trial = _build_both_ways(_builder([]), talib_df, {"Per": 5.0, "Dev": 2.5})
+    upper, _, _ = talib.BBANDS(df["Close"].to_numpy(), 5, 2.5, 2.5)
+    for frame in (load, trial, legacy_trial):
+        np.testing.assert_allclose(frame["U"], upper, equal_nan=True)
+        np.testing.assert_allclose(frame["E"], talib.EMA(df["Close"].to_numpy(), 5), equal_nan=True)
+    # The load-time build truncated the 2.5 deviations to 2
+    np.testing.assert_allclose(legacy_load["U"], talib.BBANDS(df["Close"].to_numpy(), 5, 2, 2)[0], equal_nan=True)
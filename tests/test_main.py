@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+import main
+
+IBS = "Mean Reversion/IBS_Reversion_strat_20240703-20250805.xlsx"
+
+
+def test_backtest_writes_robustness_sheet(workbook_copy, tmp_path, monkeypatch):
+    path = workbook_copy(IBS)
+    monkeypatch.chdir(tmp_path)
+    main.main(excel_path=path, robustness_samples=200, robustness_method="shuffle", seed=1)
+    assert "Robustness" in load_workbook(path).sheetnames
+    summary = pd.read_excel(path, sheet_name="Robustness")
+    assert set(summary["Method"]) == {"shuffle"}
+    assert set(summary["Samples"]) == {200}
+
+
+def test_backtest_writes_interactive_chart(workbook_copy, tmp_path, monkeypatch):
+    pytest.importorskip("plotly")
+    path = workbook_copy(IBS)
+    monkeypatch.chdir(tmp_path)
+    main.main(excel_path=path, interactive_chart=True)
+    assert (tmp_path / "images" / "trading_visualization.html").stat().st_size > 0
+
+
+class _Stop(Exception):
+    pass
+
+
+def _optimizer_config(workbook_copy, tmp_path, monkeypatch, **options):
+    """The config main() builds for these keyword options."""
+    seen = {}
+
+    def capture(config, optimize=False):
+        seen.update(config)
+        raise _Stop
+
+    # Stop at the preflight check, once main() has filled in the config
+    monkeypatch.setattr(main, "preflight", capture)
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(_Stop):
+        main.main(optimize=True, excel_path=workbook_copy(IBS), **options)
+    return seen
+
+
+@pytest.mark.parametrize("options, expected", [
+    ({}, {"sweep_indicators": False}),
+    ({"sweep_indicators": True}, {"sweep_indicators": True}),
+    ({}, {"warm_start": "none", "early_stop_patience": None}),
+    ({"warm_start": "top_k", "warm_start_k": 3, "min_evals": 10, "early_stop_patience": 20},
+     {"warm_start": "top_k", "warm_start_k": 3, "min_evals": 10, "early_stop_patience": 20}),
+    ({}, {"prune": False, "prune_audit": False}),
+    ({"prune": True, "prune_audit": True}, {"prune": True, "prune_audit": True}),
+    ({}, {"trial_store": None}),
+    ({"trial_store": "runs/trials.sqlite"}, {"trial_store": "runs/trials.sqlite"}),
+    ({}, {"multi_objective": False}),
+    ({"multi_objective": True}, {"multi_objective": True}),
+])
+def test_optimizer_options_reach_the_config(workbook_copy, tmp_path, monkeypatch, options, expected):
+    config = _optimizer_config(workbook_copy, tmp_path, monkeypatch, **options)
+    assert {k: config.get(k) for k in expected} == expected
+
+
+def test_pt_refit_reaches_the_config(workbook_copy, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "apply_pt_model", lambda config: config)
+    config = _optimizer_config(workbook_copy, tmp_path, monkeypatch, pt_model="my_models:PtModel", pt_refit=True)
+    assert config["pt_model"] == "my_models:PtModel" and config["pt_refit"] is True
+
+
+def test_pt_refit_requires_pt_model(workbook_copy, tmp_path, monkeypatch):
+    with pytest.raises(ValueError, match="pt_refit requires pt_model"):
+        _optimizer_config(workbook_copy, tmp_path, monkeypatch, pt_refit=True)
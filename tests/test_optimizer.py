@@ -0,0 +1,16 @@
+from excel_io import read_dashboard_inputs
+from optimizer import optimize_strategy
+
+PT_IBS = "ML/Pt+IBS_strat_20240703-20250806.xlsx"
+
+
+def test_incremental_walk_forward_is_reported_and_changes_nothing(workbook_copy, capsys):
+    path = workbook_copy(PT_IBS)
+    config = read_dashboard_inputs(path)
+    config.update(excel_path=path, start_date=None, end_date=None, train_window=60, test_window=60,
+                  max_evals=3, seed=1, opt_params=["Gap"], param_ranges={"Gap": (0.0, 1.0, 0.5)})
+    baseline = optimize_strategy(dict(config))
+    requested = optimize_strategy({**config, "incremental_walk_forward": True})
+    assert "incremental_walk_forward only applies to the grid sweep" in capsys.readouterr().out
+    assert requested[2] == baseline[2]
+    assert requested[0].equals(baseline[0])
@@ -0,0 +1,32 @@
+import pytest
+
+from output_writer import BackgroundWriter
+
+
+def test_failed_write_is_raised_once_without_extra_output(capsys):
+    done = []
+
+    def fail():
+        raise OSError("disk full")
+
+    writer = BackgroundWriter()
+    writer.submit(done.append, 1)
+    writer.submit(fail)
+    writer.submit(done.append, 2)
+    with pytest.raises(OSError, match="disk full"):
+        writer.close()
+    # Writes after the failure are skipped; the error is only reported by the re-raise
+    assert done == [1]
+    assert capsys.readouterr().out == ""
+
+
+def test_failed_write_is_reported_when_the_block_already_raises(capsys):
+    def fail():
+        raise OSError("disk full")
+
+    with pytest.raises(ValueError):
+        with BackgroundWriter() as writer:
+            writer.submit(fail)
+            raise ValueError("run failed")
+    out = capsys.readouterr().out
+    assert out.count("disk full") == 1
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+import indicator_builder
+from indicator_builder import compile_indicator_plan
+from trial_store import context_key
+
+
+def _wide_tables():
+    builder = []
+    for k in range(4):
+        builder += [(f"X{k}", "Close", "*", f"P{k}", "+"), (f"X{k}", "High", "-", "Low", "END")]
+    builder += [("Y", "X3", "/", "Close", "END"), ("Z", "Close", "+", "COLP", "END")]
+    talib = []
+    for k in range(3):
+        talib += [(f"RSI{k}", "RSI", "Close", f"R{k}"), (f"ATR{k}", "ATR", "High, Low, Close", f"R{k}"),
+                  (f"U{k}, M{k}, L{k}", "BBANDS", f"X{k}", f"R{k}, S, S")]
+    talib += [("RSIY", "RSI", "Y", "R0"), ("Z2", "SMA", "RSI1", "R1")]
+    return (pd.DataFrame(builder, columns=["Indicator Name", "Indicator A", "Operator", "Value / Param",
+                                           "Combination"]),
+            pd.DataFrame(talib, columns=["TA-Lib Name", "TA-Lib Function", "In order Indicators",
+                                         "In order Param"]))
+
+
+def _bars(n=5000):
+    close = 100 + np.random.default_rng(0).normal(size=n).cumsum()
+    return pd.DataFrame({"Date": pd.date_range("2020-01-01", periods=n, freq="min"), "Open": close,
+                         "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1.0})
+
+
+def test_parallel_build_matches_sheet_order(monkeypatch):
+    monkeypatch.setattr(indicator_builder, "PARALLEL_MIN_ROWS", 0)
+    builder_df, talib_df = _wide_tables()
+    df = _bars()
+    # COLP names a column that is only built later, so Z must still read it before RSI1 exists
+    params = {"P0": 1.0, "P1": 2.0, "P2": 3.0, "P3": 4.0, "R0": 5, "R1": 7, "R2": 9, "S": 2, "COLP": "RSI1"}
+    sequential = compile_indicator_plan(builder_df, talib_df).evaluate(df, params)
+    parallel = compile_indicator_plan(builder_df, talib_df, threads=4).evaluate(df, params)
+    assert list(parallel.columns) == list(sequential.columns)
+    pd.testing.assert_frame_equal(parallel, sequential)
+
+
+def test_thread_count_does_not_change_run_keys():
+    builder_df, talib_df = _wide_tables()
+    one = compile_indicator_plan(builder_df, talib_df, threads=1)
+    four = compile_indicator_plan(builder_df, talib_df, threads=4)
+    assert one == four
+    assert context_key(one) == context_key(four)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import workbook
+from excel_io import read_dashboard_inputs
+from strategy import PositionMachine, compile_strategy_logic, strategy_from_logic
+from test_indicator_parity import WORKBOOKS
+from trade_log import TradeLogBuilder
+
+
+def _row_by_row(df, rules):
+    machine = PositionMachine(rules)
+    results = TradeLogBuilder(len(df))
+    for i in range(len(df)):
+        trade = machine.step(df.iloc[i], i)
+        if trade is not None:
+            results.append(*trade)
+    return results.build()
+
+
+@pytest.mark.parametrize("relative_path", WORKBOOKS)
+def test_mask_backtest_matches_row_by_row(relative_path):
+    config = read_dashboard_inputs(workbook(relative_path))
+    rules = compile_strategy_logic(config["logic_table"])
+    df = config["market_data"]
+    for frame in (df, df.iloc[30:200]):
+        pd.testing.assert_frame_equal(strategy_from_logic(frame, rules).to_pandas(),
+                                      _row_by_row(frame, rules).to_pandas())
+
+
+def test_masks_cover_numeric_columns_only():
+    df = pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=6), "Open": np.arange(6.0),
+                       "Close": np.arange(6.0) + 0.5})
+    rules = compile_strategy_logic(pd.DataFrame(
+        [("Enter-Buy", "Close", ">", 2, "Open", "END"), ("Exit-long", "Close", ">", 4, "Close", "END")],
+        columns=["Rule Type", "Column A", "Operator", "Column B / Value", "Action at", "Logic Type"]))
+    assert rules.masks_cover(df)
+    assert not rules.masks_cover(df.assign(Close=df["Close"].astype(str)))
+    trades = strategy_from_logic(df, rules).to_pandas()
+    # Entering and exiting on the same bar, as PositionMachine does
+    assert trades[["Entry", "Exit"]].values.tolist() == [[2.0, 4.5], [5.0, 5.5]]
+    pd.testing.assert_frame_equal(trades, _row_by_row(df, rules).to_pandas())
@@ -0,0 +1,103 @@
+import inspect
+
+import numpy as np
+import pytest
+
+import talib_numpy
+
+talib = pytest.importorskip("talib")
+
+N_BARS = 120
+
+
+def _market(n=N_BARS, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(size=n).cumsum()
+    return {"real": close, "real0": close, "real1": close + rng.random(n),
+            "high": close + rng.random(n) * 2, "low": close - rng.random(n) * 2, "close": close}
+
+
+def _call(module, name, inputs, period):
+    signature = inspect.signature(getattr(talib_numpy, name))
+    arrays = [inputs[p] for p in signature.parameters if p in inputs]
+    return getattr(module, name)(*arrays, **{p: period for p in signature.parameters if "period" in p})
+
+
+def _outputs(result):
+    return result if isinstance(result, tuple) else (result,)
+
+
+PERIOD_FUNCTIONS = [name for name, func in talib_numpy.FUNCTIONS.items()
+                    if any("period" in p for p in inspect.signature(func).parameters)]
+
+
+@pytest.mark.parametrize("name", PERIOD_FUNCTIONS)
+@pytest.mark.parametrize("period", [1, 2, 3, 14, N_BARS + 5])
+def test_matches_talib(name, period):
+    inputs = _market()
+    try:
+        expected = _call(talib, name, inputs, period)
+    except Exception:
+        # Periods TA-Lib rejects must be rejected here too
+        with pytest.raises(ValueError):
+            _call(talib_numpy, name, inputs, period)
+        return
+    for want, got in zip(_outputs(expected), _outputs(_call(talib_numpy, name, inputs, period))):
+        np.testing.assert_array_equal(np.isnan(got), np.isnan(want))
+        np.testing.assert_allclose(got, want, rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+@pytest.mark.parametrize("name", PERIOD_FUNCTIONS)
+def test_all_nan_input(name):
+    inputs = {k: np.full(30, np.nan) for k in _market(30)}
+    for out in _outputs(_call(talib_numpy, name, inputs, 3 if name != "MACD" else 2)):
+        assert len(out) == 30 and np.isnan(out).all()
+
+
+@pytest.mark.parametrize("name", ["SMA", "EMA", "ATR", "VAR", "MOM", "ROC"])
+def test_sweep_matches_single_calls(name):
+    inputs = _market()
+    arrays = [inputs[p] for p in inspect.signature(getattr(talib_numpy, name)).parameters if p in inputs]
+    periods = [1, 2, 14, N_BARS + 5]
+    (matrix,) = talib_numpy.sweep(name, arrays, [periods[0]], (0,), periods)
+    for row, period in zip(matrix, periods):
+        np.testing.assert_allclose(row, getattr(talib, name)(*arrays, timeperiod=period),
+                                   rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+# Functions that treat NaNs after the leading ones as TA-Lib does
+NAN_LIKE_TALIB = ["EMA", "MACD", "ATR", "NATR", "RSI", "PLUS_DI", "MINUS_DI", "DX", "ADX", "MOM", "ROC",
+                  "ADD", "SUB", "MULT", "DIV"]
+# Rolling windows: NaN only while the NaN is inside the window (TA-Lib's running sums stay NaN)
+ROLLING = ["SMA", "WMA", "SUM", "VAR", "STDDEV", "BBANDS", "LINEARREG", "LINEARREG_SLOPE",
+           "LINEARREG_INTERCEPT", "LINEARREG_ANGLE", "TSF", "MAX", "MIN"]
+GAP = 50
+
+
+def _with_gap():
+    inputs = _market()
+    return {k: np.where(np.arange(N_BARS) == GAP, np.nan, v) for k, v in inputs.items()}
+
+
+@pytest.mark.parametrize("name", NAN_LIKE_TALIB)
+def test_interior_nan_matches_talib(name):
+    inputs = _with_gap()
+    period = 3 if name != "MACD" else 2
+    for want, got in zip(_outputs(_call(talib, name, inputs, period)),
+                         _outputs(_call(talib_numpy, name, inputs, period))):
+        np.testing.assert_allclose(got, want, rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+@pytest.mark.parametrize("name", ROLLING)
+def test_interior_nan_only_blanks_windows_holding_it(name):
+    period = 5
+    for out in _outputs(_call(talib_numpy, name, _with_gap(), period)):
+        nan_bars = np.flatnonzero(np.isnan(out))
+        np.testing.assert_array_equal(nan_bars[nan_bars >= period - 1], np.arange(GAP, GAP + period))
+
+
+def test_talib_running_sums_stay_nan_after_interior_nan():
+    # The documented difference: TA-Lib's SMA never recovers, the NumPy one does
+    inputs = _with_gap()
+    assert np.isnan(talib.SMA(inputs["real"], 5)[GAP:]).all()
+    assert not np.isnan(talib_numpy.SMA(inputs["real"], 5)[GAP + 5:]).any()
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+import talib_numpy
+import talib_stream
+
+
+def _replay(kernel, values):
+    return np.array([kernel.update(float(x)) for x in values])
+
+
+@pytest.mark.parametrize("name", ["SMA", "EMA", "WMA"])
+@pytest.mark.parametrize("period", [1, 2, 14])
+def test_stream_matches_batch(name, period):
+    close = 100 + np.random.default_rng(0).normal(size=200).cumsum()
+    close[:3] = np.nan
+    kernel = talib_stream.make_kernel(name, [period])
+    # Period 1 must get an incremental kernel, not the per-bar recompute over the whole history
+    assert kernel is not None
+    np.testing.assert_allclose(_replay(kernel, close), talib_numpy.FUNCTIONS[name](close, period),
+                               rtol=1e-10, equal_nan=True)
@@ -0,0 +1,40 @@
+from conftest import workbook
+from excel_io import read_dashboard_inputs
+from optimizer import optimize_strategy
+from validation import validate_config
+
+# Optimizes EMA/ATR/Band/ndev, but only Gap has a Low/High/Step range
+PT_IBS = "ML/Pt+IBS_strat_20240703-20250806.xlsx"
+
+
+def _small_windows(config: dict) -> dict:
+    config.update(start_date=None, end_date=None, train_window=60, test_window=60, max_evals=2, seed=1)
+    return config
+
+
+def test_unranged_optimized_parameters_are_warnings_when_one_is_ranged():
+    config = _small_windows(read_dashboard_inputs(workbook(PT_IBS)))
+    config["opt_params"] = config["opt_params"] + ["Gap"]
+    issues = validate_config(config, optimize=True)
+    unranged = [i for i in issues if "has no Low/High/Step range" in i.message]
+    assert {i.severity for i in unranged} == {"warning"}
+    assert len(unranged) == 4
+    assert not [i for i in issues if i.severity == "error"]
+
+
+def test_no_ranged_optimized_parameter_is_an_error():
+    config = _small_windows(read_dashboard_inputs(workbook(PT_IBS)))
+    issues = validate_config(config, optimize=True)
+    assert any(i.severity == "error" and "nothing to optimize" in i.message for i in issues)
+
+
+def test_optimizer_skips_unranged_parameters(workbook_copy):
+    path = workbook_copy(PT_IBS)
+    config = _small_windows(read_dashboard_inputs(path))
+    config["excel_path"] = path
+    config["opt_params"] = config["opt_params"] + ["Gap"]
+    results, trades, best_params, indicators = optimize_strategy(config)
+    assert len(results) == 3
+    for params in best_params:
+        assert set(params) == {"Gap"}
+    assert len(trades) == len(indicators) == 3
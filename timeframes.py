@@ -0,0 +1,118 @@
+"""
+Higher-timeframe columns for the indicator builders.
+
+A builder input written as `Column@Timeframe` ("Close@1D", "High@1W", "Volume@4H") is the
+column resampled to that timeframe: bars are grouped into periods, OHLCV columns aggregated
+(first open, highest high, lowest low, last close, summed volume; other columns take the last
+value) and every bar gets the value of the last *completed* period before its own one. On
+daily bars "Close@1D" is the previous day's close, on hourly bars the previous session's, so
+nothing from the still-forming period leaks into a bar.
+
+The columns are added to the market data once per dataset (`add_timeframe_columns`), with one
+resample per timeframe shared by all columns that use it; trials and walk-forward windows only
+slice them.
+"""
+
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Timeframe units: fixed-length ones are binned with Timestamp.floor, calendar ones with periods
+FIXED_UNITS = {"MIN": "min", "T": "min", "H": "h", "D": "D"}
+CALENDAR_UNITS = {"W": "W", "M": "M", "Q": "Q", "Y": "Y"}
+OHLCV_AGGREGATION = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def parse_reference(name) -> Optional[Tuple[str, str]]:
+    """("Close", "1D") for "Close@1D"; None for a plain column name."""
+    column, sep, timeframe = str(name).rpartition("@")
+    if not sep or not column:
+        return None
+    return column.strip(), timeframe.strip()
+
+
+def parse_timeframe(text) -> Tuple[int, str]:
+    """Count and unit of a timeframe: "15min", "4H", "1D", "1W", "1M" (month), "1Q" or "1Y"."""
+    match = re.fullmatch(r"\s*(\d*)\s*([A-Za-z]+)\s*", str(text))
+    unit = match.group(2).upper() if match else ""
+    if unit not in FIXED_UNITS and unit not in CALENDAR_UNITS:
+        raise ValueError(f"Invalid timeframe {text!r}; expected a count and a unit such as "
+                         "'15min', '4H', '1D', '1W' or '1M'")
+    count = int(match.group(1) or 1)
+    if count < 1:
+        raise ValueError(f"Invalid timeframe {text!r}; the count must be at least 1")
+    return count, unit
+
+
+def period_codes(dates, timeframe) -> np.ndarray:
+    """
+    Consecutive period number (0, 1, ...) of every bar of a sorted Date array. Periods without
+    bars are not numbered, so period k - 1 is always the last period with data before period k.
+    """
+    count, unit = parse_timeframe(timeframe)
+    dates = pd.DatetimeIndex(dates)
+    if unit in FIXED_UNITS:
+        keys = dates.floor(f"{count}{FIXED_UNITS[unit]}").asi8
+    else:
+        keys = dates.to_period(CALENDAR_UNITS[unit]).asi8 // count
+    if len(keys) > 1 and (keys[1:] < keys[:-1]).any():
+        raise ValueError("Market data dates must be sorted in ascending order")
+    return np.concatenate(([0], np.cumsum(keys[1:] != keys[:-1]))) if len(keys) else keys
+
+
+def resample_column(values: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    """Aggregate `values` over the periods beginning at row offsets `starts`."""
+    values = np.asarray(values, dtype=float)
+    if how == "first":
+        return values[starts]
+    if how == "last":
+        return values[np.append(starts[1:], len(values)) - 1]
+    reduce = {"max": np.maximum, "min": np.minimum, "sum": np.add}[how]
+    return reduce.reduceat(values, starts)
+
+
+def previous_period(codes: np.ndarray, per_period: np.ndarray) -> np.ndarray:
+    """Map per-period values back to bars: each bar gets its previous period's value (NaN for the first)."""
+    return np.concatenate(([np.nan], per_period))[codes]
+
+
+def add_timeframe_columns(df: pd.DataFrame, references: Iterable[str]) -> pd.DataFrame:
+    """
+    Copy of df with every `Column@Timeframe` reference in `references` added as a column.
+    References already in df are kept; ones whose column or timeframe is unknown are skipped
+    with a warning (the builder rows using them are then skipped, as for any unknown column).
+    """
+    wanted: Dict[str, Dict[str, str]] = {}
+    for name in references:
+        if name in df.columns:
+            continue
+        parsed = parse_reference(name)
+        if parsed is None:
+            continue
+        column, timeframe = parsed
+        if column not in df.columns or "Date" not in df.columns:
+            print(f"⚠️ Unknown column '{column}' in timeframe reference '{name}'; skipped.")
+            continue
+        try:
+            parse_timeframe(timeframe)
+        except ValueError as e:
+            print(f"⚠️ {e}; '{name}' skipped.")
+            continue
+        wanted.setdefault(timeframe, {})[name] = column
+    if not wanted:
+        return df
+
+    dates = pd.to_datetime(df["Date"]).to_numpy(dtype="datetime64[ns]")
+    added = {}
+    for timeframe, columns in wanted.items():
+        # One binning per timeframe, shared by every column resampled to it
+        codes = period_codes(dates, timeframe)
+        starts = np.flatnonzero(np.diff(codes, prepend=-1))
+        for name, column in columns.items():
+            how = OHLCV_AGGREGATION.get(column, "last")
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+            added[name] = previous_period(codes, resample_column(values, starts, how))
+    print(f"[INFO] Added higher-timeframe columns: {list(added)}")
+    return pd.concat([df, pd.DataFrame(added, index=df.index)], axis=1)
@@ -0,0 +1,191 @@
+"""
+Columnar trade container shared by the strategy engine, metrics, plotting and writers.
+
+A TradeLog keeps one contiguous NumPy array per trade field instead of a list of per-trade
+dicts or a DataFrame. `strategy_from_logic` fills preallocated arrays, concatenating window
+results is one `np.concatenate` per column, and `to_pandas()` wraps the arrays without copying.
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+TRADE_COLUMNS = ("EntryDate", "ExitDate", "Action", "Entry", "Exit",
+                 "Stop Triggered", "Take Profit Triggered", "PnL")
+
+_EMPTY_DTYPES = {
+    "EntryDate": "datetime64[ns]",
+    "ExitDate": "datetime64[ns]",
+    "Action": object,
+    "Entry": float,
+    "Exit": float,
+    "Stop Triggered": bool,
+    "Take Profit Triggered": bool,
+    "PnL": float,
+    "Equity": float,
+    "Returns": float,
+}
+
+
+class TradeLog:
+    """
+    Immutable set of trades stored column-wise (one NumPy array per column).
+
+    Besides the TRADE_COLUMNS, a log may carry derived columns such as the "Equity" and
+    "Returns" added by `with_equity`.
+    """
+
+    __slots__ = ("_columns", "_length")
+
+    def __init__(self, columns: Optional[Dict[str, np.ndarray]] = None):
+        if columns is None:
+            columns = {name: np.empty(0, dtype=_EMPTY_DTYPES[name]) for name in TRADE_COLUMNS}
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"TradeLog columns have different lengths: {sorted(lengths)}")
+        self._columns = dict(columns)
+        self._length = lengths.pop() if lengths else 0
+
+    def __getstate__(self):
+        return self._columns
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def __repr__(self) -> str:
+        return f"TradeLog({self._length} trades, columns={list(self._columns)})"
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def empty(self) -> bool:
+        return self._length == 0
+
+    def to_pandas(self) -> pd.DataFrame:
+        """DataFrame view of the log; the column arrays are wrapped, not copied."""
+        return pd.DataFrame(self._columns, copy=False)
+
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame) -> "TradeLog":
+        """TradeLog from a trades DataFrame (e.g. one produced by an older version of the code)."""
+        if df.empty and not len(df.columns):
+            return cls()
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        for name in ("EntryDate", "ExitDate"):
+            if name in columns:
+                columns[name] = pd.to_datetime(df[name]).to_numpy()
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, logs: Iterable["TradeLog"]) -> "TradeLog":
+        """Concatenate logs column by column; columns missing from some logs are dropped."""
+        logs = [log if isinstance(log, TradeLog) else cls.from_pandas(log) for log in logs]
+        logs = [log for log in logs if not log.empty] or logs[:1]
+        if not logs:
+            return cls()
+        names = [name for name in logs[0].columns if all(name in log for log in logs)]
+        return cls({name: np.concatenate([log[name] for log in logs]) for name in names})
+
+    def take(self, indices: np.ndarray) -> "TradeLog":
+        return TradeLog({name: values[indices] for name, values in self._columns.items()})
+
+    def with_column(self, name: str, values) -> "TradeLog":
+        """Log with one column added (or replaced); a scalar is repeated for every trade."""
+        columns = dict(self._columns)
+        if np.ndim(values) == 0:
+            values = np.full(self._length, values, dtype=object if isinstance(values, str) else None)
+        columns[name] = np.asarray(values)
+        return TradeLog(columns)
+
+    def sorted_by_entry(self) -> "TradeLog":
+        """Trades in EntryDate order (stable, so same-day trades keep their order)."""
+        order = np.argsort(self._columns["EntryDate"], kind="stable")
+        if np.array_equal(order, np.arange(self._length)):
+            return self
+        return self.take(order)
+
+    def equity(self, initial_cash: float = 10_000) -> np.ndarray:
+        """Account equity after each trade, in the log's order."""
+        # Accumulate from initial_cash, trade by trade, like a running account balance
+        return np.cumsum(np.concatenate(([initial_cash], self._columns["PnL"].astype(float))))[1:]
+
+    def with_equity(self, initial_cash: float = 10_000) -> "TradeLog":
+        """Log sorted by EntryDate with "Equity" and "Returns" columns, as shown in the Results sheet."""
+        log = self.sorted_by_entry()
+        columns = dict(log._columns)
+        columns["Equity"] = log.equity(initial_cash)
+        columns["Returns"] = log["PnL"].astype(float) / initial_cash
+        return TradeLog(columns)
+
+
+class TradeLogBuilder:
+    """
+    Fills preallocated trade columns; a backtest over n bars closes at most n trades.
+    The columns double in size when full, so open-ended (streaming) runs can start small.
+    """
+
+    _FIELDS = ("_entry_dates", "_exit_dates", "_actions", "_entries", "_exits",
+               "_stops", "_take_profits", "_pnls")
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(int(capacity), 0)
+        self._entry_dates = np.empty(capacity, dtype=object)
+        self._exit_dates = np.empty(capacity, dtype=object)
+        self._actions = np.empty(capacity, dtype=object)
+        self._entries = np.empty(capacity, dtype=float)
+        self._exits = np.empty(capacity, dtype=float)
+        self._stops = np.empty(capacity, dtype=bool)
+        self._take_profits = np.empty(capacity, dtype=bool)
+        self._pnls = np.empty(capacity, dtype=float)
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _grow(self) -> None:
+        for name in self._FIELDS:
+            values = getattr(self, name)
+            grown = np.empty(max(2 * len(values), 16), dtype=values.dtype)
+            grown[:len(values)] = values
+            setattr(self, name, grown)
+
+    def append(self, entry_date, exit_date, action, entry, exit_, stop, take_profit, pnl) -> None:
+        i = self._n
+        if i == len(self._pnls):
+            self._grow()
+        self._entry_dates[i] = entry_date
+        self._exit_dates[i] = exit_date
+        self._actions[i] = action
+        self._entries[i] = entry
+        self._exits[i] = exit_
+        self._stops[i] = stop
+        self._take_profits[i] = take_profit
+        self._pnls[i] = pnl
+        self._n = i + 1
+
+    def build(self) -> TradeLog:
+        n = self._n
+        if n == 0:
+            return TradeLog()
+        return TradeLog({
+            "EntryDate": pd.to_datetime(self._entry_dates[:n]).to_numpy(),
+            "ExitDate": pd.to_datetime(self._exit_dates[:n]).to_numpy(),
+            "Action": self._actions[:n],
+            "Entry": self._entries[:n],
+            "Exit": self._exits[:n],
+            "Stop Triggered": self._stops[:n],
+            "Take Profit Triggered": self._take_profits[:n],
+            "PnL": self._pnls[:n],
+        })
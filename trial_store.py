@@ -0,0 +1,157 @@
+"""
+Persistent store for optimizer trial results.
+
+Every objective evaluation in `optimize_strategy` is a pure function of the train slice,
+the compiled strategy rules, the indicator plan, the objective settings and the parameter
+set. The store keys each loss by a content hash of those inputs, so re-running an
+optimization after a small change (a new test_window, more max_evals...) reuses every
+evaluation that was already scored.
+
+Usage:
+    python trial_store.py stats [--db PATH]
+    python trial_store.py invalidate [--db PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import time
+from typing import Optional
+
+import pandas as pd
+
+DEFAULT_DB_PATH = os.path.join("data", "trial_store.sqlite")
+# Bump when the meaning of a stored loss changes (strategy engine, metrics, objective)
+SCHEMA_VERSION = 1
+
+
+def _canonical(value):
+    """JSON-friendly, quantized form of a parameter value so 20, 20.0 and np.int64(20) hash alike."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if math.isnan(number):
+        return "nan"
+    return round(number, 9)
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame's columns and values (the index is ignored)."""
+    h = hashlib.sha256()
+    h.update(repr(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def context_key(*parts) -> str:
+    """Hash of everything a trial's loss depends on apart from its parameters."""
+    h = hashlib.sha256(f"v{SCHEMA_VERSION}".encode())
+    for part in parts:
+        h.update(b"\0")
+        h.update(part.encode() if isinstance(part, str) else repr(part).encode())
+    return h.hexdigest()
+
+
+class TrialStore:
+    """SQLite-backed (context, params) -> loss store with least-recently-used eviction."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS trials ("
+            "key TEXT PRIMARY KEY, context TEXT NOT NULL, params TEXT NOT NULL, "
+            "loss REAL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS trials_last_used ON trials (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def _key(context: str, params: dict):
+        payload = json.dumps({k: _canonical(v) for k, v in params.items()}, sort_keys=True)
+        return hashlib.sha256(f"{context}\0{payload}".encode()).hexdigest(), payload
+
+    def get(self, context: str, params: dict) -> Optional[float]:
+        """Stored loss for params under context, or None if it was never scored."""
+        key, _ = self._key(context, params)
+        row = self.conn.execute("SELECT loss FROM trials WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE trials SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._pending += 1
+        loss = row[0]
+        return float("nan") if loss is None else loss
+
+    def put(self, context: str, params: dict, loss: float) -> None:
+        key, payload = self._key(context, params)
+        loss = None if loss is None or not math.isfinite(loss) else float(loss)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO trials (key, context, params, loss, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, context, payload, loss, time.time()),
+        )
+        self._pending += 1
+        if self._pending >= 500:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit pending writes and evict the least recently used entries beyond max_entries."""
+        self.evict()
+        self.conn.commit()
+        self._pending = 0
+
+    def evict(self) -> int:
+        count = self.conn.execute("SELECT COUNT(*) FROM trials").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM trials WHERE key IN (SELECT key FROM trials ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        return excess
+
+    def invalidate(self, context: Optional[str] = None) -> int:
+        """Delete every stored result, or only those of one context. Returns the number removed."""
+        if context is None:
+            removed = self.conn.execute("DELETE FROM trials").rowcount
+        else:
+            removed = self.conn.execute("DELETE FROM trials WHERE context = ?", (context,)).rowcount
+        self.conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        count, contexts = self.conn.execute("SELECT COUNT(*), COUNT(DISTINCT context) FROM trials").fetchone()
+        return {"Entries": count, "Contexts": contexts, "Hits": self.hits, "Misses": self.misses}
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or clear the optimizer trial-result store.")
+    parser.add_argument("command", choices=["stats", "invalidate"])
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"store path (default: {DEFAULT_DB_PATH})")
+    args = parser.parse_args(argv)
+    store = TrialStore(args.db)
+    if args.command == "invalidate":
+        print(f"[INFO] Removed {store.invalidate()} stored trial results from {args.db}")
+    else:
+        print(f"[INFO] {args.db}: {store.stats()}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Preflight validation of a Dashboard configuration.
+
+`preflight(config)` runs once before a backtest or optimization and checks everything that
+would otherwise only fail (or silently do nothing) deep inside the per-bar loops: rule
+columns and operators, Indicator Builder references, TA-Lib function names and parameters,
+parameter ranges and optimizer settings. All problems are collected into one report;
+errors raise a single PreflightError, warnings are printed once.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicator_builder import ARITHMETIC_OPS, compile_indicator_plan, resolve_ta_function
+from performance_metrics import metric_key_map
+from strategy import COMPARISON_OPERATORS, LOGIC_COLUMNS, compile_strategy_logic
+from walk_forward import window_schedule
+
+RULE_PREFIXES = ("Enter-", "Exit-long", "Exit-short", "StopLoss-long", "StopLoss-short",
+                 "TakeProfit-long", "TakeProfit-short")
+LOGIC_TYPES = ("", "END", "AND", "OR")
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    """One problem found by preflight; `row` is the 1-based data row of the table, if any."""
+    section: str
+    row: Optional[int]
+    message: str
+    severity: str = "error"
+
+    def __str__(self) -> str:
+        where = f"{self.section} row {self.row}" if self.row is not None else self.section
+        return f"[{where}] {self.message}"
+
+
+class PreflightError(ValueError):
+    """Raised by `preflight` when the configuration has errors; `issues` holds every problem found."""
+
+    def __init__(self, issues: List[ValidationIssue]):
+        self.issues = issues
+        super().__init__(format_report(issues))
+
+
+def format_report(issues: Iterable[ValidationIssue]) -> str:
+    issues = list(issues)
+    errors = [i for i in issues if i.severity == "error"]
+    warnings = [i for i in issues if i.severity != "error"]
+    lines = [f"Preflight found {len(errors)} error(s) and {len(warnings)} warning(s):"]
+    lines += [f"  ❌ {issue}" for issue in errors]
+    lines += [f"  ⚠️ {issue}" for issue in warnings]
+    return "\n".join(lines)
+
+
+def _blank(value) -> bool:
+    if value is None:
+        return True
+    try:
+        if pd.isna(value):
+            return True
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip() == ""
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _tokens(value) -> List[str]:
+    return [] if _blank(value) else [p.strip() for p in str(value).split(",") if p.strip()]
+
+
+def _non_numeric_count(series: pd.Series) -> int:
+    """Values a rule comparison cannot handle: blanks and text in an object column."""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return 0
+    return int(sum(1 for v in series if not isinstance(v, (int, float, np.number)) or isinstance(v, bool)))
+
+
+def check_indicator_builder(builder_df: Optional[pd.DataFrame], known: set, param_map: dict) -> List[ValidationIssue]:
+    issues = []
+    if builder_df is None:
+        return issues
+    section = "Indicator Builder"
+    for i, row in enumerate(builder_df.to_dict("records"), start=1):
+        name = row.get("Indicator Name")
+        if _blank(name):
+            continue
+        fields = [row.get("Indicator A"), row.get("Operator"), row.get("Value / Param")]
+        if any(_blank(v) for v in fields):
+            issues.append(ValidationIssue(section, i, f"'{name}' is missing Indicator A, Operator or "
+                                                      "Value / Param; the row is ignored", "warning"))
+            continue
+        ind_a, op, token = (str(v).strip() for v in fields)
+        if op not in ARITHMETIC_OPS:
+            issues.append(ValidationIssue(section, i, f"'{name}': unknown operator '{op}' "
+                                                      f"(expected one of {sorted(ARITHMETIC_OPS)})"))
+        if ind_a not in known:
+            issues.append(ValidationIssue(section, i, f"'{name}': Indicator A '{ind_a}' is not a column or indicator"))
+        if token in param_map:
+            value = param_map[token]
+            if not _is_number(value) and str(value) not in known:
+                issues.append(ValidationIssue(section, i, f"'{name}': parameter {token} = {value!r} is neither "
+                                                          "a number nor a column"))
+        elif token not in known and not _is_number(token):
+            issues.append(ValidationIssue(section, i, f"'{name}': Value / Param '{token}' is not a parameter, "
+                                                      "column or number"))
+        combination = row.get("Combination")
+        if "Combination" in builder_df.columns and not _blank(combination):
+            combination = str(combination).strip().upper()
+            if combination != "END" and combination not in ARITHMETIC_OPS:
+                issues.append(ValidationIssue(section, i, f"'{name}': unknown Combination '{combination}'"))
+    return issues
+
+
+def _params_to_try(keys: List[str], param_map: dict, param_ranges: dict):
+    """Parameter value lists to test a TA-Lib call with: initial values, then each range's ends."""
+    base = [param_map.get(k, k) for k in keys]
+    yield "initial values", base
+    for j, key in enumerate(keys):
+        if key in param_ranges:
+            low, high, _ = param_ranges[key]
+            for value in (low, high):
+                trial = list(base)
+                trial[j] = value
+                yield f"{key} = {value:g}", trial
+
+
+def _coerce(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number.is_integer() else number
+
+
+def check_talib_builder(talib_df: Optional[pd.DataFrame], known: set, param_map: dict, param_ranges: dict,
+                        backend: str) -> List[ValidationIssue]:
+    issues = []
+    if talib_df is None:
+        return issues
+    section = "TA-Lib Builder"
+    sample = np.linspace(100.0, 110.0, 256)
+    for i, row in enumerate(talib_df.to_dict("records"), start=1):
+        name, func_name = row.get("TA-Lib Name"), row.get("TA-Lib Function")
+        if _blank(name) or _blank(func_name):
+            continue
+        func_name = str(func_name).strip()
+        func = resolve_ta_function(func_name, backend)
+        if func is None:
+            issues.append(ValidationIssue(section, i, f"'{name}': unknown TA-Lib function '{func_name}'"))
+            continue
+        inputs = _tokens(row.get("In order Indicators"))
+        if not inputs:
+            issues.append(ValidationIssue(section, i, f"'{name}': no input columns"))
+        missing = [col for col in inputs if col not in known]
+        if missing:
+            issues.append(ValidationIssue(section, i, f"'{name}': input columns {missing} do not exist"))
+        keys = _tokens(row.get("In order Param"))
+        unknown = [k for k in keys if k not in param_map and not _is_number(k)]
+        if unknown:
+            issues.append(ValidationIssue(section, i, f"'{name}': parameters {unknown} are not in the "
+                                                      "parameter table"))
+        if missing or unknown or not inputs:
+            continue
+        for label, values in _params_to_try(keys, param_map, param_ranges):
+            try:
+                with np.errstate(all="ignore"):
+                    func(*(sample for _ in inputs), *(_coerce(v) for v in values))
+            except Exception as e:
+                issues.append(ValidationIssue(section, i, f"'{name}': {func_name} fails with {label}: {e}"))
+                break
+    return issues
+
+
+def check_logic_table(logic_df: Optional[pd.DataFrame], known: set,
+                      market_data: Optional[pd.DataFrame] = None) -> List[ValidationIssue]:
+    section = "Strategy Logic"
+    if logic_df is None:
+        return [ValidationIssue(section, None, "no Strategy Logic table")]
+    missing = [c for c in LOGIC_COLUMNS if c not in logic_df.columns]
+    if missing:
+        return [ValidationIssue(section, None, f"table is missing columns: {missing}")]
+    issues = []
+    used = set()
+    for i, row in enumerate(logic_df.to_dict("records"), start=1):
+        rule_type = str(row["Rule Type"]).strip()
+        col_a = str(row["Column A"]).strip()
+        op = str(row["Operator"]).strip()
+        col_b = str(row["Column B / Value"]).strip()
+        action_at = str(row["Action at"]).strip()
+        logic = "" if _blank(row["Logic Type"]) else str(row["Logic Type"]).strip().upper()
+        if not rule_type.startswith(RULE_PREFIXES):
+            issues.append(ValidationIssue(section, i, f"Rule Type '{rule_type}' is never evaluated "
+                                                      f"(expected a prefix in {list(RULE_PREFIXES)})", "warning"))
+        if op not in COMPARISON_OPERATORS:
+            issues.append(ValidationIssue(section, i, f"unknown operator '{op}' "
+                                                      f"(expected one of {sorted(COMPARISON_OPERATORS)})"))
+        if logic not in LOGIC_TYPES:
+            issues.append(ValidationIssue(section, i, f"unknown Logic Type '{logic}' (expected AND, OR or END)"))
+        if col_a not in known:
+            issues.append(ValidationIssue(section, i, f"Column A '{col_a}' is not a column or indicator"))
+        else:
+            used.add(col_a)
+        # Same literal test as compile_strategy_logic: anything else is read as a column name
+        if not col_b.replace(".", "", 1).isdigit():
+            if col_b not in known:
+                issues.append(ValidationIssue(section, i, f"Column B '{col_b}' is not a column, indicator or "
+                                                          "non-negative number"))
+            else:
+                used.add(col_b)
+        if action_at not in known:
+            default = "Open" if rule_type.startswith("Enter-") else "Close"
+            issues.append(ValidationIssue(section, i, f"Action at '{action_at}' is not a column; the {default} "
+                                                      "price is used instead", "warning"))
+    if not any(issue.severity == "error" for issue in issues):
+        try:
+            compile_strategy_logic(logic_df)
+        except ValueError as e:
+            issues.append(ValidationIssue(section, None, str(e)))
+    if market_data is not None:
+        for col in sorted(used):
+            if col in market_data.columns:
+                bad = _non_numeric_count(market_data[col])
+                if bad:
+                    issues.append(ValidationIssue(section, None, f"column '{col}' has {bad} blank or non-numeric "
+                                                                 "values; rules using it are False on those bars",
+                                                  "warning"))
+    return issues
+
+
+def check_parameters(config: dict, optimize: bool) -> List[ValidationIssue]:
+    section = "Parameters"
+    issues = []
+    param_map = config.get("param_map", {})
+    for key, (low, high, step) in config.get("param_ranges", {}).items():
+        if low > high:
+            issues.append(ValidationIssue(section, None, f"{key}: range low {low:g} is above high {high:g}"))
+        if not step > 0:
+            issues.append(ValidationIssue(section, None, f"{key}: range step must be positive, got {step}"))
+        initial = param_map.get(key)
+        if _is_number(initial) and not low <= float(initial) <= high:
+            issues.append(ValidationIssue(section, None, f"{key}: initial value {initial} is outside "
+                                                         f"[{low:g}, {high:g}]", "warning"))
+    if not optimize:
+        return issues
+    opt_params = config.get("opt_params", [])
+    ranged = [key for key in opt_params if key in config.get("param_ranges", {})]
+    for key in opt_params:
+        if key not in ranged:
+            issues.append(ValidationIssue(section, None, f"optimized parameter '{key}' has no Low/High/Step "
+                                                         "range and is not optimized", "warning"))
+    if opt_params and not ranged:
+        issues.append(ValidationIssue(section, None, "none of the optimized parameters has a Low/High/Step "
+                                                     "range; there is nothing to optimize"))
+
+    section = "Settings"
+    n_bars = len(config.get("market_data", ()))
+    for key in ("train_window", "test_window", "max_evals"):
+        value = config.get(key)
+        if value is not None and int(value) < 1:
+            issues.append(ValidationIssue(section, None, f"{key} must be at least 1, got {value}"))
+    if n_bars and not any(issue.section == section for issue in issues):
+        try:
+            ranged, windows = window_schedule(config)
+        except ValueError as e:
+            issues.append(ValidationIssue(section, None, str(e)))
+        else:
+            if not windows:
+                train = config.get("train_period", config.get("train_window", 20))
+                test = config.get("test_period", config.get("test_window", 5))
+                issues.append(ValidationIssue(section, None, f"train/test windows ({train} + {test}) leave no "
+                                                             f"walk-forward window in the {len(ranged)} bars of the "
+                                                             f"backtest range (Duration)"))
+    if str(config.get("objective_type", "MAX")).upper() not in ("MAX", "MIN"):
+        issues.append(ValidationIssue(section, None, f"objective type must be MAX or MIN, "
+                                                     f"got {config.get('objective_type')!r}"))
+    key_map = metric_key_map()
+    for metric in config.get("objective_weights", {}):
+        if metric not in key_map and metric not in key_map.values():
+            issues.append(ValidationIssue(section, None, f"unknown optimization metric '{metric}' "
+                                                         f"(expected one of {list(key_map)})"))
+    return issues
+
+
+def validate_config(config: dict, optimize: bool = False) -> List[ValidationIssue]:
+    """Every problem in the configuration; settings only used by the optimizer are checked if optimize."""
+    market_data = config.get("market_data")
+    plan = config.get("indicator_plan")
+    if plan is None:
+        plan = compile_indicator_plan(config.get("indicator_builder"), config.get("talib_builder"))
+    columns = tuple(market_data.columns) if market_data is not None else ()
+    known = set(plan.bind(columns).names)
+    param_map = config.get("param_map", {})
+    issues = []
+    issues += check_indicator_builder(config.get("indicator_builder"), known, param_map)
+    issues += check_talib_builder(config.get("talib_builder"), known, param_map,
+                                  config.get("param_ranges", {}), plan.backend)
+    issues += check_logic_table(config.get("logic_table"), known, market_data)
+    issues += check_parameters(config, optimize)
+    return issues
+
+
+def preflight(config: dict, optimize: bool = False) -> List[ValidationIssue]:
+    """
+    Validate config once before running. Raises PreflightError listing every problem when
+    there are errors; prints the warnings otherwise. The issues are kept in
+    config["preflight_issues"].
+    """
+    issues = validate_config(config, optimize)
+    config["preflight_issues"] = issues
+    if any(issue.severity == "error" for issue in issues):
+        raise PreflightError(issues)
+    if issues:
+        print(format_report(issues))
+    return issues
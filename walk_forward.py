@@ -0,0 +1,116 @@
+"""
+Walk-forward window scheduling.
+
+Windows are defined either by bar counts (`train_window` / `test_window`) or by calendar spans
+(`train_period` / `test_period` such as "6M" / "1M"), rolling or anchored at the first bar.
+Calendar boundaries are resolved to row bounds with one `searchsorted` over the sorted Date
+column, so building the schedule costs O(windows x log bars).
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+WINDOW_MODES = ("rolling", "anchored")
+PERIOD_UNITS = {"D": "days", "W": "weeks", "M": "months", "Y": "years"}
+
+
+def parse_period(text) -> pd.DateOffset:
+    """Calendar span from a count and a unit: "10D", "2W", "6M" or "1Y"."""
+    match = re.fullmatch(r"\s*(\d+)\s*([DWMY])\s*", str(text), re.IGNORECASE)
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Invalid period {text!r}; expected a count and a unit such as '10D', '2W', '6M' or '1Y'")
+    return pd.DateOffset(**{PERIOD_UNITS[match.group(2).upper()]: int(match.group(1))})
+
+
+def is_period(value) -> bool:
+    """True for a calendar span string like "6M" (bar counts are plain numbers)."""
+    try:
+        parse_period(value)
+    except ValueError:
+        return False
+    return True
+
+
+def date_index(df: pd.DataFrame) -> np.ndarray:
+    """The Date column as a sorted datetime64[ns] array."""
+    dates = pd.to_datetime(df["Date"]).to_numpy(dtype="datetime64[ns]")
+    if len(dates) > 1 and (dates[1:] < dates[:-1]).any():
+        raise ValueError("Market data dates must be sorted in ascending order")
+    return dates
+
+
+def backtest_range(df: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Rows of df dated from start_date to end_date inclusive; a missing bound is open.
+    An end date without a time of day includes every bar of that day.
+    """
+    if "Date" not in df.columns or (pd.isna(start_date) and pd.isna(end_date)):
+        return df
+    dates = date_index(df)
+    lo, hi = 0, len(dates)
+    if not pd.isna(start_date):
+        lo = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date), "ns"), side="left"))
+    if not pd.isna(end_date):
+        end = pd.Timestamp(end_date)
+        if end == end.normalize():
+            hi = int(np.searchsorted(dates, np.datetime64(end + pd.Timedelta(days=1), "ns"), side="left"))
+        else:
+            hi = int(np.searchsorted(dates, np.datetime64(end, "ns"), side="right"))
+    return df.iloc[lo:hi]
+
+
+def walk_forward_windows(df: pd.DataFrame, train_window: int = 20, test_window: int = 5,
+                         train_period=None, test_period=None,
+                         mode: str = "rolling") -> List[Tuple[int, int, int]]:
+    """
+    (train_start, train_stop, test_stop) row bounds of every walk-forward window of df.
+
+    With train_period and test_period the windows are calendar spans: test periods follow each
+    other from the end of the first train period and the last one may end early at the last bar.
+    Otherwise they are train_window / test_window bars and only complete windows are returned.
+    "anchored" keeps every train window starting at the first bar.
+    """
+    mode = str(mode).lower()
+    if mode not in WINDOW_MODES:
+        raise ValueError(f"Unknown window mode {mode!r}; expected one of {WINDOW_MODES}")
+    if (train_period is None) != (test_period is None):
+        raise ValueError("train_period and test_period must be given together")
+    n_bars = len(df)
+    if train_period is None:
+        train_window, test_window = int(train_window), int(test_window)
+        test_starts = np.arange(train_window, n_bars - test_window + 1, test_window)
+        test_stops = test_starts + test_window
+        train_starts = np.zeros_like(test_starts) if mode == "anchored" else test_starts - train_window
+    else:
+        if n_bars == 0:
+            return []
+        train_offset, test_offset = parse_period(train_period), parse_period(test_period)
+        dates = date_index(df)
+        first, last = pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])
+        # Offsets from the first bar (not chained from the previous window) so month ends do not drift
+        boundaries = []
+        k = 0
+        while first + train_offset + test_offset * k <= last:
+            test_start = first + train_offset + test_offset * k
+            train_start = first if mode == "anchored" else test_start - train_offset
+            boundaries.append((train_start, test_start, first + train_offset + test_offset * (k + 1)))
+            k += 1
+        if not boundaries:
+            return []
+        rows = np.searchsorted(dates, np.array(boundaries, dtype="datetime64[ns]"), side="left")
+        train_starts, test_starts, test_stops = rows.T
+    # Calendar gaps can leave a span without bars; such windows are skipped
+    return [(int(a), int(b), int(c)) for a, b, c in zip(train_starts, test_starts, test_stops) if a < b < c]
+
+
+def window_schedule(config: dict, df: Optional[pd.DataFrame] = None) -> Tuple[pd.DataFrame, List[Tuple[int, int, int]]]:
+    """Market data restricted to the configured backtest range, and its walk-forward windows."""
+    df = config["market_data"] if df is None else df
+    df = backtest_range(df, config.get("start_date"), config.get("end_date"))
+    windows = walk_forward_windows(df, config.get("train_window", 20), config.get("test_window", 5),
+                                   config.get("train_period"), config.get("test_period"),
+                                   config.get("window_mode", "rolling"))
+    return df, windows